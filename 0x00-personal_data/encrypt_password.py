@@ -2,11 +2,10 @@
 """A module for encrypting passwords.
 This module provides functions for hashing passwords and
 validating hashed passwords.
+bcrypt is imported on the first call, not with the module.
 
 """
 
-import bcrypt
-
 
 def hash_password(password: str) -> bytes:
     """Hashes a password using a random salt.
@@ -18,6 +17,8 @@ def hash_password(password: str) -> bytes:
         bytes: The salted and hashed password.
 
     """
+    import bcrypt
+
     return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
 
 
@@ -32,6 +33,8 @@ def is_valid(hashed_password: bytes, password: str) -> bool:
         bool: True if the password is valid, False otherwise.
 
     """
+    import bcrypt
+
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password)
 
 if __name__ == "__main__":
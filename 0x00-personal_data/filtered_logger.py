@@ -2,13 +2,18 @@
 """A module for filtering logs.
 This module provides functions and classes for filtering and
 formatting log messages.
+
+The MySQL driver is only imported by `get_db`, so that the redaction
+API can be used where it is not installed.
 """
 
 import os
 import re
 import logging
-import mysql.connector
-from typing import List
+from typing import List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import mysql.connector
 
 
 patterns = {
@@ -53,13 +58,15 @@ def get_logger() -> logging.Logger:
     return logger
 
 
-def get_db() -> mysql.connector.connection.MySQLConnection:
+def get_db() -> "mysql.connector.connection.MySQLConnection":
     """Creates a connector to a database.
 
     Returns:
         mysql.connector.connection.MySQLConnection: The database connection.
 
     """
+    import mysql.connector
+
     db_host = os.getenv("PERSONAL_DATA_DB_HOST", "localhost")
     db_name = os.getenv("PERSONAL_DATA_DB_NAME", "")
     db_user = os.getenv("PERSONAL_DATA_DB_USERNAME", "root")
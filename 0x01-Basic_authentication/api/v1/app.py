@@ -6,9 +6,12 @@ from os import getenv
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 
+from api.v1 import metrics, profiler
 from api.v1.views import app_views
 from api.v1.auth.auth import Auth
 from api.v1.auth.basic_auth import BasicAuth
+from models.base import Base
+from models.user import User
 
 
 app = Flask(__name__)
@@ -22,6 +25,14 @@ if auth_type == 'auth':
 if auth_type == 'basic_auth':
     auth = BasicAuth()
 
+metrics.init_app(app)
+profiler.init_app(app)
+if auth:
+    metrics.instrument(auth, 'current_user', 'auth.current_user')
+metrics.instrument(Base, 'search', 'store.search')
+metrics.instrument(Base, 'save_to_file', 'store.save_to_file')
+metrics.instrument(User, 'is_valid_password', 'user.is_valid_password')
+
 
 @app.errorhandler(404)
 def not_found(error) -> str:
@@ -53,6 +64,8 @@ def authenticate_user():
             '/api/v1/status/',
             '/api/v1/unauthorized/',
             '/api/v1/forbidden/',
+            '/api/v1/metrics/',
+            '/api/v1/profiler/',
         ]
         if auth.require_auth(request.path, excluded_paths):
             auth_header = auth.authorization_header(request)
@@ -4,12 +4,31 @@
 import re
 import base64
 import binascii
-from typing import Tuple, TypeVar
+from functools import partial
+from typing import Optional, Tuple, TypeVar
 
 from .auth import Auth
 from models.user import User
 
 
+try:
+    binascii.a2b_base64(b'', strict_mode=True)
+except TypeError:
+    _B64_ALPHABET = (b'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+                     b'abcdefghijklmnopqrstuvwxyz0123456789+/')
+
+    def _decode_base64(data: bytes) -> bytes:
+        """Decodes base64 with the checks of b64decode(validate=True)
+        before Python 3.11.
+        """
+        body = data.rstrip(b'=')
+        if len(data) - len(body) > 2 or body.translate(None, _B64_ALPHABET):
+            raise binascii.Error('Non-base64 digit found')
+        return binascii.a2b_base64(data)
+else:
+    _decode_base64 = partial(binascii.a2b_base64, strict_mode=True)
+
+
 class BasicAuth(Auth):
     """Basic authentication class.
     """
@@ -61,6 +80,33 @@ class BasicAuth(Auth):
                 return user, password
         return None, None
 
+    def extract_credentials(
+            self,
+            authorization_header: str,
+            ) -> Optional[Tuple[str, str]]:
+        """Extracts the user credentials from a Basic Authorization
+        header in one pass, without regexes or an intermediate base64
+        string. Returns the same credentials as the chain of
+        extract_base64_authorization_header,
+        decode_base64_authorization_header and extract_user_credentials,
+        or None where that chain gives (None, None) or raises on a
+        non-ASCII token.
+        """
+        if type(authorization_header) is not str:
+            return None
+        header = authorization_header.strip()
+        if not header.startswith('Basic '):
+            return None
+        try:
+            decoded = _decode_base64(header[6:].encode('ascii'))
+            credentials = decoded.decode('utf-8').strip()
+        except (UnicodeError, binascii.Error):
+            return None
+        user, _, password = credentials.partition(':')
+        if not user or not password or '\n' in password:
+            return None
+        return user, password
+
     def user_object_from_credentials(
             self,
             user_email: str,
@@ -82,7 +128,7 @@ class BasicAuth(Auth):
         """Retrieves the user from a request.
         """
         auth_header = self.authorization_header(request)
-        b64_auth_token = self.extract_base64_authorization_header(auth_header)
-        auth_token = self.decode_base64_authorization_header(b64_auth_token)
-        email, password = self.extract_user_credentials(auth_token)
-        return self.user_object_from_credentials(email, password)
+        credentials = self.extract_credentials(auth_header)
+        if credentials is None:
+            return None
+        return self.user_object_from_credentials(*credentials)
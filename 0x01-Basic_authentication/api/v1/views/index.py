@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Module of Index views.
 """
-from flask import jsonify, abort
+from flask import jsonify, abort, request, Response
 from api.v1.views import app_views
 from api.v1.auth.auth import Auth
 
@@ -35,6 +35,48 @@ def stats() -> str:
     return jsonify(stats)
 
 
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> Response:
+    """GET /api/v1/metrics
+    Return:
+      - request and operation latencies in the Prometheus text format.
+      - 403 if the METRICS_TOKEN bearer token is missing or wrong.
+      - 404 if metrics are disabled.
+    """
+    from api.v1 import metrics
+    if not metrics.METRICS_ENABLED:
+        abort(404)
+    if not metrics.is_authorized(request.headers.get('Authorization')):
+        abort(403)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app_views.route('/profiler', methods=['GET'], strict_slashes=False)
+def profiler_stats() -> Response:
+    """GET /api/v1/profiler
+    Query parameters:
+      - sort (optional): pstats sort key, cumulative by default.
+      - limit (optional): number of functions listed, 50 by default.
+    Return:
+      - the aggregated profile of the sampled requests.
+      - 403 if the profiler token header is missing or wrong.
+      - 404 if profiling is disabled.
+    """
+    from api.v1 import profiler
+    if not profiler.PROFILER_ENABLED:
+        abort(404)
+    token = request.headers.get(profiler.PROFILER_HEADER)
+    if not profiler.profiler.is_authorized(token):
+        abort(403)
+    sort = request.args.get('sort', 'cumulative')
+    try:
+        limit = int(request.args.get('limit', '50'))
+        report = profiler.profiler.report(sort, limit)
+    except (KeyError, ValueError):
+        return jsonify({"error": "Wrong format"}), 400
+    return Response(report, mimetype='text/plain')
+
+
 @app_views.route('/unauthorized/', strict_slashes=False)
 def unauthorized() -> None:
     """GET /api/v1/unauthorized
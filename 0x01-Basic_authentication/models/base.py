@@ -2,19 +2,36 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
-import json
+from typing import Dict, TypeVar, List, Iterable, Iterator, Tuple
 import uuid
 
+from models import storage
+from models.negative_cache import NegativeCache, NEGATIVE_CACHE_CAPACITY
+from models.storage import DATA, TIMESTAMP_FORMAT
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
-DATA = {}
+
+LOOKUPS = {}
 
 
 class Base():
     """ Base class
+
+    Objects are stored by the backend of models.storage, selected with
+    the MODELS_STORAGE environment variable.
+
+    LOOKUP_KEYS lists the attributes with a negative cache: search() on
+    a value no saved object has returns [] without scanning DATA. It only
+    applies to the in-memory backend.
+
+    INDEX_KEYS lists the attributes the in-memory backend keeps sorted
+    indexes of for query().
+
+    Objects may be saved and read from several threads: save() and
+    remove() hold the lock of the class while they update the store and
+    the negative caches, readers take no lock.
     """
+    LOOKUP_KEYS: Tuple[str, ...] = ()
+    INDEX_KEYS: Tuple[str, ...] = ('created_at',)
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
@@ -58,55 +75,80 @@ class Base():
         return result
 
     @classmethod
-    def load_from_file(cls):
-        """ Load all objects from file
+    def _lookups(cls) -> Dict[str, NegativeCache]:
+        """ Return the negative caches of the class, rebuilding them from
+        DATA if it was changed other than through save() and remove() or
+        if they are too full
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        objs = DATA[s_class]
+        entry = LOOKUPS.get(s_class)
+        if entry is None or entry[0] is not objs or entry[1] != len(objs) \
+                or any(c.saturated for c in entry[2].values()):
+            with storage.BACKEND.lock(cls):
+                snapshot = list(objs.values())
+                capacity = max(NEGATIVE_CACHE_CAPACITY, 2 * len(snapshot))
+                caches = {key: NegativeCache(capacity)
+                          for key in cls.LOOKUP_KEYS}
+                for obj in snapshot:
+                    for key, cache in caches.items():
+                        cache.add(getattr(obj, key, None))
+                entry = [objs, len(snapshot), caches]
+                LOOKUPS[s_class] = entry
+        return entry[2]
+
+    @classmethod
+    def _in_memory_lookups(cls) -> bool:
+        """ Whether the class has negative caches to maintain
+        """
+        return bool(cls.LOOKUP_KEYS) and storage.BACKEND.in_memory
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def load_from_file(cls):
+        """ Load all objects from file
+        """
+        LOOKUPS.pop(cls.__name__, None)
+        storage.BACKEND.load(cls)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
-
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+        storage.BACKEND.dump(cls)
 
     def save(self):
-        """ Save current object
+        """ Save current object, returning once it is on disk
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        with storage.BACKEND.lock(self.__class__):
+            self.updated_at = datetime.utcnow()
+            caches = self.__class__._lookups() \
+                if self._in_memory_lookups() else {}
+            storage.BACKEND.save(self)
+            for key, cache in caches.items():
+                cache.add(getattr(self, key, None))
+            if caches:
+                LOOKUPS[s_class][1] = len(DATA[s_class])
+        storage.BACKEND.flush(self.__class__)
 
     def remove(self):
-        """ Remove object
+        """ Remove object, returning once it is removed from disk
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        with storage.BACKEND.lock(self.__class__):
+            if self._in_memory_lookups():
+                self.__class__._lookups()
+            if not storage.BACKEND.remove(self):
+                return
+            if self._in_memory_lookups():
+                LOOKUPS[s_class][1] = len(DATA[s_class])
+        storage.BACKEND.flush(self.__class__)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
-        s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return storage.BACKEND.count(cls)
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -118,20 +160,40 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return storage.BACKEND.get(cls, id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
-        s_class = cls.__name__
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+        if not cls._in_memory_lookups():
+            return storage.BACKEND.search(cls, attributes)
+        cache = None
+        caches = cls._lookups()
+        for k, v in attributes.items():
+            if k in caches and not caches[k].might_contain(v):
+                return []
+        if len(attributes) == 1:
+            cache = caches.get(next(iter(attributes)))
+            generation = cache.generation if cache else None
+        result = storage.BACKEND.search(cls, attributes)
+        if cache is not None and not result:
+            cache.record_miss(next(iter(attributes.values())), generation)
+        return result
+
+    @classmethod
+    def query(cls, filters: dict = {}, order_by: str = None,
+              limit: int = None, offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """ Return a lazy iterator over the objects matching filters
+
+        Filter keys are attribute names, optionally suffixed with one of
+        `__ne`, `__lt`, `__lte`, `__gt`, `__gte` or `__startswith`;
+        e.g. {'created_at__gte': start, 'email__startswith': 'bob'}.
+        `order_by` names an attribute, prefixed with `-` for descending
+        order; objects with a None value come first in ascending order,
+        ties are broken by id. Without `order_by`, the order is
+        unspecified. `offset` and `limit` select a page of the results.
+        """
+        conditions = storage.parse_filters(filters)
+        return storage.BACKEND.query(cls, conditions, order_by, limit,
+                                     offset)
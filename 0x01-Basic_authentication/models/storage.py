@@ -0,0 +1,888 @@
+#!/usr/bin/env python3
+""" Storage backends module
+
+`Base` stores its objects through the backend selected by the
+`MODELS_STORAGE` environment variable:
+
+- `json` (default): every object lives in memory, in `DATA`, and each
+  change rewrites the `.db_<class>.json` file of its class.
+- `sqlite`: objects live in the SQLite database `MODELS_SQLITE_PATH`
+  (`.db.sqlite3` by default), one table per class and one column per
+  attribute. Each change is one upsert, a search is one `SELECT` with
+  an index created on first use for every searched attribute, and only
+  the objects a query returns are in memory. On first load, a class
+  whose table is empty imports its `.db_<class>.json` file.
+
+Both backends implement load(), dump(), get(), search(), query(),
+count(), all(), save(), save_many(), remove(), remove_many(), flush(),
+data_version(), lock() and after_fork().
+
+query() takes (attribute, operator, value) conditions, parsed from
+`attribute__operator` keys by parse_filters(). The JSON backend keeps a
+sorted index of (value, id) pairs, maintained with bisect, for each of
+a class's INDEX_KEYS; it is built on the first query and then updated by
+save() and remove(). A query walks the index of its order_by attribute,
+or else the narrowest index range of its conditions, so ranges, prefixes
+and top-K queries only visit the matching part of the index. The SQLite
+backend runs the query as SQL on indexed columns.
+
+Concurrency: writes to a class are serialized by a per-class lock, which
+Base also holds while it updates its own bookkeeping (lock()). Readers
+never take it. They iterate over a snapshot of the objects, and sorted
+indexes are copied on write, so a query keeps a consistent view while
+writers go on. JSON files are only written by one background thread:
+each write request marks the class dirty and flush() waits for the
+next rewrite, so concurrent saves share one rewrite (group commit).
+Files are replaced atomically, so a crash never leaves a partial file.
+"""
+import json
+import operator
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime
+from itertools import islice
+from os import getenv, getpid, path, replace
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+MODELS_STORAGE = getenv('MODELS_STORAGE', 'json')
+MODELS_SQLITE_PATH = getenv('MODELS_SQLITE_PATH', '.db.sqlite3')
+DATA = {}
+OPERATORS = {
+    'eq': operator.eq,
+    'ne': operator.ne,
+    'lt': operator.lt,
+    'lte': operator.le,
+    'gt': operator.gt,
+    'gte': operator.ge,
+    'startswith': lambda value, prefix:
+        isinstance(value, str) and value.startswith(prefix),
+}
+
+
+def parse_filters(filters: dict) -> List[Tuple[str, str, object]]:
+    """Split `attribute__operator` filter keys into conditions. A key
+    without a known operator suffix tests equality.
+    """
+    conditions = []
+    for key, value in filters.items():
+        attribute, _, op = key.rpartition('__')
+        if not attribute or op not in OPERATORS:
+            attribute, op = key, 'eq'
+        conditions.append((attribute, op, value))
+    return conditions
+
+
+def _matches(obj, conditions: List[Tuple[str, str, object]],
+             get=getattr) -> bool:
+    """Whether an object meets all conditions. A comparison between
+    values of different types, such as None and a string, is false.
+    `get` reads an attribute; dict.get checks a JSON dictionary.
+    """
+    for attribute, op, value in conditions:
+        try:
+            if not OPERATORS[op](get(obj, attribute, None), value):
+                return False
+        except TypeError:
+            return False
+    return True
+
+
+def _successor(prefix: str) -> Optional[str]:
+    """Return the smallest string greater than every string starting
+    with `prefix`, or None if there is none.
+    """
+    prefix = prefix.rstrip(chr(0x10ffff))
+    if not prefix:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _sort_key(value) -> tuple:
+    """Return the index key of a value: None first, then the values.
+    """
+    return (False, 0) if value is None else (True, value)
+
+
+class _Top:
+    """Compares greater than any object id.
+    """
+
+    def __lt__(self, other) -> bool:
+        """Never less than anything.
+        """
+        return False
+
+    def __gt__(self, other) -> bool:
+        """Always greater than anything.
+        """
+        return True
+
+
+_TOP = _Top()
+
+
+class SortedIndex:
+    """The (key, id) pairs of one attribute, sorted with bisect. Writes
+    replace the list of entries instead of changing it, so a view()
+    never changes.
+    """
+
+    def __init__(self, attribute: str, objs: Iterable = ()) -> None:
+        """Index the given objects.
+        """
+        self.attribute = attribute
+        self._keys = {
+            obj.id: _sort_key(getattr(obj, attribute, None)) for obj in objs}
+        self._entries = sorted(
+            (key, obj_id) for obj_id, key in self._keys.items())
+
+    def __len__(self) -> int:
+        """Return the number of indexed objects.
+        """
+        return len(self._entries)
+
+    def view(self) -> 'SortedIndex':
+        """Return a read-only index of the current entries.
+        """
+        view = SortedIndex(self.attribute)
+        view._entries = self._entries
+        return view
+
+    def add(self, obj) -> None:
+        """Index an object, replacing its previous entry.
+        """
+        self.update((obj,))
+
+    def update(self, objs: Iterable) -> None:
+        """Index a few objects, replacing their previous entries.
+        """
+        entries = list(self._entries)
+        for obj in objs:
+            key = self._keys.pop(obj.id, None)
+            if key is not None:
+                del entries[bisect_left(entries, (key, obj.id))]
+            key = _sort_key(getattr(obj, self.attribute, None))
+            self._keys[obj.id] = key
+            insort(entries, (key, obj.id))
+        self._entries = entries
+
+    def discard(self, obj_id: str) -> None:
+        """Remove the entry of an object.
+        """
+        key = self._keys.pop(obj_id, None)
+        if key is not None:
+            entries = list(self._entries)
+            del entries[bisect_left(entries, (key, obj_id))]
+            self._entries = entries
+
+    def bounds(self, conditions: List[Tuple[str, str, object]]
+               ) -> Tuple[int, int]:
+        """Return the range of entries that can meet the conditions on
+        the indexed attribute.
+        """
+        entries = self._entries
+        first, stop = 0, len(entries)
+        values = bisect_left(entries, ((True,),))
+        for attribute, op, value in conditions:
+            if attribute != self.attribute or op == 'ne':
+                continue
+            if value is None:
+                if op != 'eq':
+                    return 0, 0
+                stop = min(stop, values)
+                continue
+            key = (True, value)
+            low, high = values, len(entries)
+            if op in ('eq', 'gte', 'startswith'):
+                low = bisect_left(entries, (key,))
+            elif op == 'gt':
+                low = bisect_left(entries, (key, _TOP))
+            if op in ('eq', 'lte'):
+                high = bisect_left(entries, (key, _TOP))
+            elif op == 'lt':
+                high = bisect_left(entries, (key,))
+            elif op == 'startswith':
+                if not isinstance(value, str):
+                    return 0, 0
+                successor = _successor(value)
+                if successor is not None:
+                    high = bisect_left(entries, ((True, successor),))
+            first, stop = max(first, low), min(stop, high)
+        return first, max(first, stop)
+
+    def ids(self, first: int, stop: int,
+            descending: bool = False) -> Iterator[str]:
+        """Yield the ids of a range of entries, in key order.
+        """
+        positions = range(stop - 1, first - 1, -1) if descending \
+            else range(first, stop)
+        entries = self._entries
+        for position in positions:
+            yield entries[position][1]
+
+
+def _file_path(cls) -> str:
+    """Return the JSON file of a class.
+    """
+    return ".db_{}.json".format(cls.__name__)
+
+
+def _read_file(cls) -> Dict[str, dict]:
+    """Return the objects of the JSON file of a class, by id.
+    """
+    if not path.exists(_file_path(cls)):
+        return {}
+    with open(_file_path(cls), 'r') as f:
+        return json.load(f)
+
+
+class ClassLocks:
+    """One lock per class, created on first use.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty set of locks.
+        """
+        self._locks: Dict[str, threading.RLock] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, cls) -> threading.RLock:
+        """Return the lock of a class.
+        """
+        lock = self._locks.get(cls.__name__)
+        if lock is None:
+            with self._lock:
+                lock = self._locks.setdefault(cls.__name__, threading.RLock())
+        return lock
+
+
+class FileWriter:
+    """Background thread rewriting the files of dirty classes.
+    """
+
+    def __init__(self, write) -> None:
+        """Initialize a writer calling `write(cls)` for each rewrite.
+        """
+        self._write = write
+        self._cond = threading.Condition()
+        self._dirty: Dict[str, type] = {}
+        self._requested = 0
+        self._written = 0
+        self._errors: List[Tuple[int, int, Exception]] = []
+        self._thread = None
+        self._pid = None
+
+    def request(self, cls) -> None:
+        """Mark a class as dirty.
+        """
+        with self._cond:
+            self._dirty[cls.__name__] = cls
+            self._requested += 1
+            if self._thread is None or self._pid != getpid():
+                self._pid = getpid()
+                self._thread = threading.Thread(
+                    target=self._run, name='storage-writer', daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        """Wait until every request made so far is written, raising the
+        error of the rewrite that failed to write it, if any.
+        """
+        with self._cond:
+            ticket = self._requested
+            while self._written < ticket:
+                self._cond.wait()
+            for first, last, error in self._errors:
+                if first <= ticket <= last:
+                    raise error
+
+    def _run(self) -> None:
+        """Rewrite the dirty classes, one batch at a time.
+        """
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+                dirty, self._dirty = self._dirty, {}
+                first, last = self._written + 1, self._requested
+            error = None
+            for cls in dirty.values():
+                try:
+                    self._write(cls)
+                except Exception as e:
+                    error = e
+            with self._cond:
+                self._written = last
+                self._errors = self._errors[-15:]
+                if error is not None:
+                    self._errors.append((first, last, error))
+                self._cond.notify_all()
+
+
+class JSONStorage:
+    """Objects in memory, written to one JSON file per class.
+    """
+    name = 'json'
+    in_memory = True
+
+    def __init__(self) -> None:
+        """Initialize the backend, without any sorted index yet.
+        """
+        self._sorted: Dict[str, list] = {}
+        self.lock = ClassLocks()
+        self._file_locks = ClassLocks()
+        self._writer = FileWriter(lambda cls: cls.save_to_file())
+
+    def _indexes(self, cls) -> Dict[str, SortedIndex]:
+        """Return the sorted indexes of a class, rebuilding them if DATA
+        was changed other than through save() and remove().
+        """
+        s_class = cls.__name__
+        objs = DATA[s_class]
+        entry = self._sorted.get(s_class)
+        if entry is None or entry[0] is not objs or entry[1] != len(objs):
+            with self.lock(cls):
+                snapshot = list(objs.values())
+                indexes = {key: SortedIndex(key, snapshot)
+                           for key in cls.INDEX_KEYS}
+                entry = [objs, len(snapshot), indexes]
+                self._sorted[s_class] = entry
+        return entry[2]
+
+    def _synced(self, cls) -> Optional[list]:
+        """Return the sorted indexes entry of a class if it matches DATA,
+        dropping it otherwise.
+        """
+        s_class = cls.__name__
+        entry = self._sorted.get(s_class)
+        if entry is None:
+            return None
+        if entry[0] is not DATA.get(s_class) or entry[1] != len(entry[0]):
+            del self._sorted[s_class]
+            return None
+        return entry
+
+    def load(self, cls, conditions: List[Tuple[str, str, object]] = ()
+             ) -> Iterable:
+        """Load the objects of a class from its file. Objects not meeting
+        the conditions are checked on their JSON dictionary, without
+        being built, and dropped from the file.
+        """
+        s_class = cls.__name__
+        conditions = [(key, op, _to_column(value))
+                      for key, op, value in conditions]
+        DATA[s_class] = {}
+        self._sorted.pop(s_class, None)
+        dropped = False
+        for obj_id, obj_json in _read_file(cls).items():
+            if _matches(obj_json, conditions, dict.get):
+                DATA[s_class][obj_id] = cls(**obj_json)
+            else:
+                dropped = True
+        if dropped:
+            self._writer.request(cls)
+        return DATA[s_class].values()
+
+    def dump(self, cls):
+        """Write all objects of a class to its file, replacing it
+        atomically.
+        """
+        file_path = _file_path(cls)
+        with self._file_locks(cls):
+            objs_json = {}
+            for obj_id, obj in list(DATA[cls.__name__].items()):
+                objs_json[obj_id] = obj.to_json(True)
+
+            with open(file_path + '.tmp', 'w') as f:
+                json.dump(objs_json, f)
+            replace(file_path + '.tmp', file_path)
+
+    def flush(self, cls):
+        """Wait until the file of a class has every change made so far.
+        """
+        self._writer.flush()
+
+    def after_fork(self):
+        """Drop the file writer inherited from the parent process.
+        """
+        self._writer = FileWriter(lambda cls: cls.save_to_file())
+
+    def data_version(self) -> int:
+        """Return a number that changes when another process changes the
+        stored objects: never, as no other process shares them.
+        """
+        return 0
+
+    def get(self, cls, id: str):
+        """Return one object by ID.
+        """
+        return DATA[cls.__name__].get(id)
+
+    def search(self, cls, attributes: dict) -> List:
+        """Return all objects with matching attributes.
+        """
+        def _search(obj):
+            if len(attributes) == 0:
+                return True
+            for k, v in attributes.items():
+                if (getattr(obj, k) != v):
+                    return False
+            return True
+
+        return list(filter(_search, list(DATA[cls.__name__].values())))
+
+    def query(self, cls, conditions: List[Tuple[str, str, object]],
+              order_by: str = None, limit: int = None,
+              offset: int = 0) -> Iterator:
+        """Yield the objects meeting the conditions, through the sorted
+        indexes where possible.
+        """
+        objs = DATA[cls.__name__]
+        indexes = {key: index.view()
+                   for key, index in self._indexes(cls).items()}
+        descending = order_by is not None and order_by.startswith('-')
+        order_key = order_by.lstrip('-') if order_by else None
+        try:
+            ranges = {key: index.bounds(conditions)
+                      for key, index in indexes.items()
+                      if any(c[0] == key for c in conditions)}
+        except TypeError:
+            return iter(())
+        ordered = order_key is None or order_key in indexes
+        if order_key in indexes:
+            first, stop = ranges.get(order_key, (0, len(objs)))
+            candidates = (objs.get(i) for i in indexes[order_key].ids(
+                first, stop, descending))
+        elif ranges:
+            key = min(ranges, key=lambda k: ranges[k][1] - ranges[k][0])
+            candidates = (objs.get(i) for i in indexes[key].ids(*ranges[key]))
+        else:
+            candidates = iter(list(objs.values()))
+        matches = (obj for obj in candidates
+                   if obj is not None and _matches(obj, conditions))
+        if not ordered:
+            matches = iter(sorted(
+                matches, reverse=descending,
+                key=lambda obj: (_sort_key(getattr(obj, order_key, None)),
+                                 obj.id)))
+        return islice(matches, offset, None if limit is None
+                      else offset + limit)
+
+    def count(self, cls) -> int:
+        """Count all objects of a class.
+        """
+        return len(DATA[cls.__name__].keys())
+
+    def all(self, cls) -> List:
+        """Return all objects of a class.
+        """
+        return self.search(cls, {})
+
+    def save(self, obj):
+        """Store an object and request a rewrite of its class's file.
+        """
+        with self.lock(obj.__class__):
+            objects = DATA[obj.__class__.__name__]
+            entry = self._synced(obj.__class__)
+            objects[obj.id] = obj
+            if entry is not None:
+                for index in entry[2].values():
+                    index.add(obj)
+                entry[1] = len(objects)
+        self._writer.request(obj.__class__)
+
+    def save_many(self, cls, objs: Iterable):
+        """Store many objects of a class with a single file rewrite.
+        The sorted indexes are updated for a batch that is small next
+        to the class, and rebuilt on the next query otherwise.
+        """
+        objs = list(objs)
+        with self.lock(cls):
+            objects = DATA.setdefault(cls.__name__, {})
+            entry = self._synced(cls)
+            for obj in objs:
+                objects[obj.id] = obj
+            if entry is not None and len(objs) * 16 < len(objects):
+                for index in entry[2].values():
+                    index.update(objs)
+                entry[1] = len(objects)
+            else:
+                self._sorted.pop(cls.__name__, None)
+        self._writer.request(cls)
+        self.flush(cls)
+
+    def remove(self, obj) -> bool:
+        """Remove an object and request a rewrite of its class's file,
+        returning whether it was stored.
+        """
+        with self.lock(obj.__class__):
+            objects = DATA[obj.__class__.__name__]
+            if objects.get(obj.id) is None:
+                return False
+            entry = self._synced(obj.__class__)
+            del objects[obj.id]
+            if entry is not None:
+                for index in entry[2].values():
+                    index.discard(obj.id)
+                entry[1] = len(objects)
+        self._writer.request(obj.__class__)
+        return True
+
+    def remove_many(self, cls, objs: Iterable) -> list:
+        """Remove many objects of a class and request a single rewrite of
+        its file, returning those that were stored.
+        """
+        removed = []
+        with self.lock(cls):
+            objects = DATA.setdefault(cls.__name__, {})
+            entry = self._synced(cls)
+            for obj in objs:
+                if objects.pop(obj.id, None) is None:
+                    continue
+                removed.append(obj)
+                if entry is not None:
+                    for index in entry[2].values():
+                        index.discard(obj.id)
+            if entry is not None:
+                entry[1] = len(objects)
+        if removed:
+            self._writer.request(cls)
+        return removed
+
+
+SQL_OPERATORS = {
+    'eq': 'IS', 'ne': 'IS NOT', 'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>=',
+}
+
+
+def _quote(name: str) -> str:
+    """Quote an SQL identifier.
+    """
+    return '"{}"'.format(name.replace('"', '""'))
+
+
+def _to_column(value):
+    """Convert an attribute value to the value of its column.
+    """
+    if isinstance(value, datetime):
+        return value.strftime(TIMESTAMP_FORMAT)
+    return value
+
+
+class SQLiteStorage:
+    """Objects in an SQLite database, one table per class.
+    """
+    name = 'sqlite'
+    in_memory = False
+
+    def __init__(self, db_path: str = MODELS_SQLITE_PATH) -> None:
+        """Open the database.
+        """
+        self._db_path = db_path
+        self._connect()
+        self.lock = ClassLocks()
+        self._columns: Dict[str, List[str]] = {}
+        self._indexes = set()
+        self._upserts: Dict[tuple, str] = {}
+
+    def _connect(self) -> None:
+        """Open the connection to the database.
+        """
+        self._conn = sqlite3.connect(self._db_path, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._lock = threading.RLock()
+
+    def after_fork(self):
+        """Open a connection of its own in a forked process. The parent's
+        connection is kept, never used nor closed, as SQLite requires.
+        """
+        self._inherited = self._conn
+        self._connect()
+
+    def data_version(self) -> int:
+        """Return a number that changes when another connection, such as
+        that of another worker, commits a change to the database.
+        """
+        with self._lock:
+            return self._conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _table(self, cls) -> List[str]:
+        """Return the columns of the table of a class, creating the table
+        from the attributes of a blank instance if needed.
+        """
+        s_class = cls.__name__
+        columns = self._columns.get(s_class)
+        if columns is not None:
+            return columns
+        with self._lock:
+            info = 'PRAGMA table_info({})'.format(_quote(s_class))
+            columns = [row[1] for row in self._conn.execute(info)]
+            if not columns:
+                columns = ['id'] + [
+                    key for key in cls().to_json(True) if key != 'id']
+                self._conn.execute('CREATE TABLE IF NOT EXISTS {} ({})'.format(
+                    _quote(s_class),
+                    ', '.join(_quote(key) + (' PRIMARY KEY' if key == 'id'
+                                             else '') for key in columns)))
+            self._columns[s_class] = columns
+        return columns
+
+    def _row(self, cls, obj) -> dict:
+        """Return the column values of an object, adding a column for
+        each attribute the table does not have yet.
+        """
+        row = obj.to_json(True)
+        columns = self._table(cls)
+        missing = [key for key in row if key not in columns]
+        if missing:
+            with self._lock:
+                for key in missing:
+                    if key in columns:
+                        continue
+                    self._conn.execute('ALTER TABLE {} ADD COLUMN {}'.format(
+                        _quote(cls.__name__), _quote(key)))
+                    columns.append(key)
+        return row
+
+    def _upsert(self, cls, keys: tuple) -> str:
+        """Return the statement inserting or updating these columns.
+        """
+        sql = self._upserts.get((cls.__name__, keys))
+        if sql is None:
+            sql = 'INSERT INTO {} ({}) VALUES ({}) ON CONFLICT(id) ' \
+                'DO UPDATE SET {}'.format(
+                    _quote(cls.__name__),
+                    ', '.join(_quote(key) for key in keys),
+                    ', '.join('?' * len(keys)),
+                    ', '.join('{0} = excluded.{0}'.format(_quote(key))
+                              for key in keys if key != 'id'))
+            self._upserts[(cls.__name__, keys)] = sql
+        return sql
+
+    def _index(self, cls, key: str) -> None:
+        """Create the index of a searched column.
+        """
+        name = 'ix_{}_{}'.format(cls.__name__, key)
+        if key == 'id' or name in self._indexes:
+            return
+        with self._lock:
+            self._conn.execute('CREATE INDEX IF NOT EXISTS {} ON {} ({})'
+                               .format(_quote(name), _quote(cls.__name__),
+                                       _quote(key)))
+            self._indexes.add(name)
+
+    def _query(self, cls, sql: str, params: tuple = ()) -> List:
+        """Return the objects of the rows selected by a query.
+        """
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [cls(**dict(row)) for row in rows]
+
+    def _iterate(self, cls, sql: str, params: tuple = (),
+                 size: int = 1000) -> Iterator:
+        """Yield the objects of the rows selected by a query, reading
+        `size` rows at a time.
+        """
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(size)
+            if not rows:
+                return
+            for row in rows:
+                yield cls(**dict(row))
+
+    def load(self, cls, conditions: List[Tuple[str, str, object]] = ()
+             ) -> Iterable:
+        """Open the table of a class, importing its JSON file if the
+        table is empty, delete the objects not meeting the conditions
+        and yield the others.
+        """
+        self._table(cls)
+        if self.count(cls) == 0:
+            json_conditions = [(key, op, _to_column(value))
+                               for key, op, value in conditions]
+            objs_json = _read_file(cls)
+            if objs_json:
+                self.save_many(cls, (
+                    cls(**obj_json) for obj_json in objs_json.values()
+                    if _matches(obj_json, json_conditions, dict.get)))
+        if conditions:
+            where, params = self._where(cls, conditions)
+            with self._lock:
+                self._conn.execute('DELETE FROM {} WHERE NOT ({})'.format(
+                    _quote(cls.__name__), ' AND '.join(where)), params)
+        return self._iterate(cls, 'SELECT * FROM {} ORDER BY rowid'.format(
+            _quote(cls.__name__)))
+
+    def dump(self, cls):
+        """Nothing to do: every change is committed when made.
+        """
+
+    def flush(self, cls):
+        """Nothing to do: every change is committed when made.
+        """
+
+    def get(self, cls, id: str):
+        """Return one object by ID.
+        """
+        objs = self._query(cls, 'SELECT * FROM {} WHERE id = ?'.format(
+            _quote(cls.__name__)), (id,))
+        return objs[0] if objs else None
+
+    def search(self, cls, attributes: dict) -> List:
+        """Return all objects with matching attributes, in the order they
+        were first saved.
+        """
+        columns = self._table(cls)
+        where, params = [], []
+        for key, value in attributes.items():
+            if key not in columns:
+                return []
+            self._index(cls, key)
+            where.append('{} IS ?'.format(_quote(key)))
+            params.append(_to_column(value))
+        sql = 'SELECT * FROM {}{} ORDER BY rowid'.format(
+            _quote(cls.__name__),
+            ' WHERE ' + ' AND '.join(where) if where else '')
+        return self._query(cls, sql, tuple(params))
+
+    def _column(self, cls, key: str) -> str:
+        """Return the SQL of an attribute in a query, indexing it.
+        """
+        if key not in self._table(cls):
+            return 'NULL'
+        self._index(cls, key)
+        return _quote(key)
+
+    def _where(self, cls, conditions: List[Tuple[str, str, object]]
+               ) -> Tuple[List[str], List]:
+        """Return the SQL clauses and parameters of query conditions.
+        """
+        self._table(cls)
+        where, params = [], []
+        for key, op, value in conditions:
+            value = _to_column(value)
+            if op != 'startswith':
+                where.append('{} {} ?'.format(self._column(cls, key),
+                                              SQL_OPERATORS[op]))
+                params.append(value)
+                continue
+            if not isinstance(value, str):
+                where.append('0')
+                continue
+            where.append('{} >= ?'.format(self._column(cls, key)))
+            params.append(value)
+            successor = _successor(value)
+            if successor is not None:
+                where.append('{} < ?'.format(self._column(cls, key)))
+                params.append(successor)
+        return where, params
+
+    def query(self, cls, conditions: List[Tuple[str, str, object]],
+              order_by: str = None, limit: int = None,
+              offset: int = 0) -> Iterator:
+        """Yield the objects meeting the conditions, running the query as
+        SQL on indexed columns.
+        """
+        where, params = self._where(cls, conditions)
+        sql = 'SELECT * FROM {}'.format(_quote(cls.__name__))
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        if order_by:
+            direction = ' DESC' if order_by.startswith('-') else ''
+            sql += ' ORDER BY {0}{1}, id{1}'.format(
+                self._column(cls, order_by.lstrip('-')), direction)
+        if limit is not None or offset:
+            sql += ' LIMIT ? OFFSET ?'
+            params += [-1 if limit is None else limit, offset]
+        return self._iterate(cls, sql, tuple(params))
+
+    def count(self, cls) -> int:
+        """Count all objects of a class.
+        """
+        self._table(cls)
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM {}'.format(
+                _quote(cls.__name__))).fetchone()[0]
+
+    def all(self, cls) -> List:
+        """Return all objects of a class.
+        """
+        return self.search(cls, {})
+
+    def save(self, obj):
+        """Insert or update an object.
+        """
+        row = self._row(obj.__class__, obj)
+        sql = self._upsert(obj.__class__, tuple(row))
+        with self._lock:
+            self._conn.execute(sql, tuple(row.values()))
+
+    def save_many(self, cls, objs: Iterable):
+        """Insert or update many objects of a class in one transaction.
+        """
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for obj in objs:
+                    row = self._row(cls, obj)
+                    self._conn.execute(self._upsert(cls, tuple(row)),
+                                       tuple(row.values()))
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+
+    def remove(self, obj) -> bool:
+        """Remove an object, returning whether it was stored.
+        """
+        self._table(obj.__class__)
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM {} WHERE id = ?'.format(
+                _quote(obj.__class__.__name__)), (obj.id,))
+        return cursor.rowcount > 0
+
+    def remove_many(self, cls, objs: Iterable) -> list:
+        """Remove many objects of a class in one transaction, returning
+        those that were stored.
+        """
+        self._table(cls)
+        removed = []
+        sql = 'DELETE FROM {} WHERE id = ?'.format(_quote(cls.__name__))
+        with self._lock:
+            self._conn.execute('BEGIN')
+            try:
+                for obj in objs:
+                    if self._conn.execute(sql, (obj.id,)).rowcount > 0:
+                        removed.append(obj)
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+        return removed
+
+
+BACKENDS = {'json': JSONStorage, 'sqlite': SQLiteStorage}
+BACKEND = None
+
+
+def use(backend: str, **kwargs) -> None:
+    """Select the storage backend of every model.
+    """
+    global BACKEND
+    if backend not in BACKENDS:
+        raise ValueError("Storage backend {} is not available".format(
+            backend))
+    BACKEND = BACKENDS[backend](**kwargs)
+
+
+use(MODELS_STORAGE)
@@ -1,13 +1,15 @@
 #!/usr/bin/env python3
 """ User module
 """
-import hashlib
 from models.base import Base
+from models.password import hash_password, verify_password
 
 
 class User(Base):
     """ User class
     """
+    LOOKUP_KEYS = ('email',)
+    INDEX_KEYS = ('created_at', 'updated_at', 'email')
 
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a User instance
@@ -26,22 +28,27 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """ Setter of a new password: encrypt in SHA256
+        """ Setter of a new password: hash it with the configured
+        scheme (see models.password)
         """
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = hash_password(pwd)
 
     def is_valid_password(self, pwd: str) -> bool:
-        """ Validate a password
+        """ Validate a password, upgrading a stored hash of another
+        scheme than the configured one once the password matched
         """
         if pwd is None or type(pwd) is not str:
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        valid, upgraded = verify_password(self.id, pwd, self.password)
+        if upgraded is not None:
+            self._password = upgraded
+            self.save()
+        return valid
 
     def display_name(self) -> str:
         """ Display User name based on email/first_name/last_name
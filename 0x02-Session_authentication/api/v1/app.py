@@ -6,29 +6,43 @@ from os import getenv
 from flask import Flask, jsonify, abort, request
 from flask_cors import (CORS, cross_origin)
 
+from api.v1 import json_provider, metrics, profiler
 from api.v1.views import app_views
-from api.v1.auth.auth import Auth
-from api.v1.auth.basic_auth import BasicAuth
-from api.v1.auth.session_auth import SessionAuth
-from api.v1.auth.session_db_auth import SessionDBAuth
-from api.v1.auth.session_exp_auth import SessionExpAuth
+from api.v1.auth import get_auth
+from models import storage
+from models.base import Base
+from models.user import User
 
 
+EXCLUDED_PATHS = [
+    "/api/v1/status/",
+    "/api/v1/unauthorized/",
+    "/api/v1/forbidden/",
+    "/api/v1/auth_session/login/",
+    "/api/v1/metrics/",
+    "/api/v1/profiler/",
+]
 app = Flask(__name__)
+json_provider.init_app(app)
 app.register_blueprint(app_views)
 CORS(app, resources={r"/api/v1/*": {"origins": "*"}})
-auth = None
 auth_type = getenv('AUTH_TYPE', 'auth')
-if auth_type == 'auth':
-    auth = Auth()
-if auth_type == 'basic_auth':
-    auth = BasicAuth()
-if auth_type == 'session_auth':
-    auth = SessionAuth()
-if auth_type == 'session_exp_auth':
-    auth = SessionExpAuth()
-if auth_type == 'session_db_auth':
-    auth = SessionDBAuth()
+auth = get_auth(auth_type)
+models_load = getenv('MODELS_LOAD', 'background')
+if models_load == 'eager':
+    Base.wait_loaded()
+elif models_load != 'lazy':
+    Base.load_in_background()
+
+metrics.init_app(app)
+profiler.init_app(app)
+if auth:
+    metrics.instrument(auth, 'current_user', 'auth.current_user')
+if hasattr(auth, 'destroy_user_sessions'):
+    User.REVOKE_HOOKS.append(auth.destroy_user_sessions)
+metrics.instrument(Base, 'search', 'store.search')
+metrics.instrument(Base, 'save_to_file', 'store.save_to_file')
+metrics.instrument(User, 'is_valid_password', 'user.is_valid_password')
 
 
 @app.errorhandler(404)
@@ -52,18 +66,20 @@ def forbidden(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+@app.before_request
+def wait_for_models():
+    """Waits for the stored objects to be loaded, except for the status.
+    """
+    if not Base.loaded() and request.path.rstrip('/') != '/api/v1/status':
+        Base.wait_loaded()
+
+
 @app.before_request
 def authenticate_user():
     """Authenticates a user before processing a request.
     """
     if auth:
-        excluded_paths = [
-            "/api/v1/status/",
-            "/api/v1/unauthorized/",
-            "/api/v1/forbidden/",
-            "/api/v1/auth_session/login/",
-        ]
-        if auth.require_auth(request.path, excluded_paths):
+        if auth.require_auth(request.path, EXCLUDED_PATHS):
             user = auth.current_user(request)
             if auth.authorization_header(request) is None and \
                     auth.session_cookie(request) is None:
@@ -73,6 +89,23 @@ def authenticate_user():
             request.current_user = user
 
 
+def warm_up() -> None:
+    """Builds the lazily built state, before workers are forked from
+    this process (see api.v1.prefork).
+    """
+    Base.wait_loaded()
+    Base.warm_up()
+    if auth:
+        auth.require_auth("/api/v1/users", EXCLUDED_PATHS)
+
+
+def post_fork() -> None:
+    """Reopens what a forked worker cannot share with its parent.
+    """
+    storage.BACKEND.after_fork()
+    Base.after_fork()
+
+
 if __name__ == "__main__":
     host = getenv("API_HOST", "0.0.0.0")
     port = getenv("API_PORT", "5000")
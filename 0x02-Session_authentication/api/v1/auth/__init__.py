@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+"""Authentication backends module for the API.
+
+AUTH_TYPES maps each AUTH_TYPE to the module and the class of its
+backend, so that only the backend in use is imported.
+"""
+from importlib import import_module
+from typing import Dict, Tuple
+
+
+AUTH_TYPES: Dict[str, Tuple[str, str]] = {
+    'auth': ('api.v1.auth.auth', 'Auth'),
+    'basic_auth': ('api.v1.auth.basic_auth', 'BasicAuth'),
+    'session_auth': ('api.v1.auth.session_auth', 'SessionAuth'),
+    'session_exp_auth': ('api.v1.auth.session_exp_auth', 'SessionExpAuth'),
+    'session_db_auth': ('api.v1.auth.session_db_auth', 'SessionDBAuth'),
+}
+
+
+def get_auth(auth_type: str):
+    """Returns a new instance of the backend of an AUTH_TYPE, importing
+    its module, or None if it is not one of AUTH_TYPES.
+    """
+    backend = AUTH_TYPES.get(auth_type)
+    if backend is None:
+        return None
+    module, name = backend
+    return getattr(import_module(module), name)()
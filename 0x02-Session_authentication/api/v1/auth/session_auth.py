@@ -1,32 +1,54 @@
 #!/usr/bin/env python3
 """Session authentication module for the API.
 """
-from uuid import uuid4
+from typing import List
 from flask import request
 
 from .auth import Auth
+from .session_store import SessionStore
 from models.user import User
 
 
 class SessionAuth(Auth):
     """Session authentication class.
+
+    Sessions are kept in a SessionStore, which also indexes them by user
+    id, so that all the sessions of a user are listed or destroyed
+    without a scan of every session.
     """
-    user_id_by_session_id = {}
+    user_id_by_session_id = SessionStore()
 
     def create_session(self, user_id: str = None) -> str:
         """Creates a session id for the user.
         """
         if type(user_id) is str:
-            session_id = str(uuid4())
-            self.user_id_by_session_id[session_id] = user_id
-            return session_id
+            return self.user_id_by_session_id.create(user_id)
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """Retrieves the user id of the user associated with
         a given session id.
         """
-        if type(session_id) is str:
-            return self.user_id_by_session_id.get(session_id)
+        record = self.user_id_by_session_id.get(session_id)
+        if record is not None:
+            return record.user_id
+
+    def _forget_session(self, session_id: str) -> None:
+        """Removes a session from the store.
+        """
+        self.user_id_by_session_id.remove(session_id)
+
+    def user_session_ids(self, user_id: str) -> List[str]:
+        """Returns the session ids of a user.
+        """
+        return self.user_id_by_session_id.session_ids(user_id)
+
+    def destroy_user_sessions(self, user_id: str) -> int:
+        """Destroys all the sessions of a user, returning their number.
+        """
+        session_ids = self.user_session_ids(user_id)
+        for session_id in session_ids:
+            self._forget_session(session_id)
+        return len(session_ids)
 
     def current_user(self, request=None) -> User:
         """Retrieves the user associated with the request.
@@ -41,6 +63,5 @@ class SessionAuth(Auth):
         user_id = self.user_id_for_session_id(session_id)
         if (request is None or session_id is None) or user_id is None:
             return False
-        if session_id in self.user_id_by_session_id:
-            del self.user_id_by_session_id[session_id]
+        self._forget_session(session_id)
         return True
@@ -2,17 +2,35 @@
 """Session authentication with expiration
 and storage support module for the API.
 """
+import threading
 from flask import request
 from datetime import datetime, timedelta
+from typing import Dict, List
 
+from models import storage
 from models.user_session import UserSession
 from .session_exp_auth import SessionExpAuth
 
 
 class SessionDBAuth(SessionExpAuth):
     """Session authentication class with expiration and storage support.
+
+    The last use of a stored session is its updated_at. Uses are only
+    recorded once per touch interval per session, in memory, and written
+    in one batch at most once per interval, so a request never rewrites
+    the sessions file just to extend a session. The touch interval is
+    SESSION_TOUCH_INTERVAL, capped at half of SESSION_IDLE_DURATION so
+    that a session in use never expires.
     """
 
+    def __init__(self) -> None:
+        """Initializes a new SessionDBAuth instance.
+        """
+        super().__init__()
+        self._touches: Dict[str, datetime] = {}
+        self._touches_lock = threading.Lock()
+        self._touches_written_at = datetime.utcnow()
+
     def create_session(self, user_id=None) -> str:
         """Creates and stores a session id for the user.
         """
@@ -36,13 +54,58 @@ class SessionDBAuth(SessionExpAuth):
             return None
         if len(sessions) <= 0:
             return None
-        cur_time = datetime.now()
+        cur_time = datetime.utcnow()
         time_span = timedelta(seconds=self.session_duration)
         exp_time = sessions[0].created_at + time_span
         if exp_time < cur_time:
             return None
+        if self.session_idle_duration > 0 and \
+                not self._touch(sessions[0]):
+            return None
         return sessions[0].user_id
 
+    def _touch(self, user_session: UserSession) -> bool:
+        """Records a use of a stored session, returning False if it has
+        been idle for too long.
+        """
+        now = datetime.utcnow()
+        interval = timedelta(seconds=min(self.session_touch_interval,
+                                         self.session_idle_duration // 2))
+        accessed_at = max(user_session.updated_at, self._touches.get(
+            user_session.session_id, user_session.updated_at))
+        if accessed_at + timedelta(
+                seconds=self.session_idle_duration) < now:
+            return False
+        if now - accessed_at >= interval:
+            self._touches[user_session.session_id] = now
+        if self._touches and now - self._touches_written_at >= interval:
+            self.write_touches()
+        return True
+
+    def write_touches(self) -> int:
+        """Writes the recorded uses of sessions in one batch, returning
+        the number of sessions updated. Does nothing if another thread
+        is already writing them.
+        """
+        if not self._touches_lock.acquire(blocking=False):
+            return 0
+        try:
+            self._touches_written_at = datetime.utcnow()
+            touches, self._touches = self._touches, {}
+            user_sessions = []
+            with storage.BACKEND.lock(UserSession):
+                for session_id, accessed_at in touches.items():
+                    for user_session in UserSession.search(
+                            {'session_id': session_id}):
+                        if user_session.updated_at < accessed_at:
+                            user_session.updated_at = accessed_at
+                            user_sessions.append(user_session)
+                if user_sessions:
+                    storage.BACKEND.save_many(UserSession, user_sessions)
+            return len(user_sessions)
+        finally:
+            self._touches_lock.release()
+
     def destroy_session(self, request=None) -> bool:
         """Destroys an authenticated session.
         """
@@ -54,4 +117,30 @@ class SessionDBAuth(SessionExpAuth):
         if len(sessions) <= 0:
             return False
         sessions[0].remove()
+        self._forget_session(session_id)
+        self._touches.pop(session_id, None)
         return True
+
+    def user_session_ids(self, user_id: str) -> List[str]:
+        """Returns the session ids of a user, found through the user_id
+        index of UserSession.
+        """
+        try:
+            user_sessions = UserSession.query({'user_id': user_id})
+        except Exception:
+            return []
+        return [user_session.session_id for user_session in user_sessions]
+
+    def destroy_user_sessions(self, user_id: str) -> int:
+        """Destroys all the stored sessions of a user, returning their
+        number.
+        """
+        try:
+            user_sessions = list(UserSession.query({'user_id': user_id}))
+        except Exception:
+            return 0
+        UserSession.remove_many(user_sessions)
+        for user_session in user_sessions:
+            self._forget_session(user_session.session_id)
+            self._touches.pop(user_session.session_id, None)
+        return len(user_sessions)
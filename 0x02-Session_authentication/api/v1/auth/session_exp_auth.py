@@ -3,13 +3,17 @@
 """
 import os
 from flask import request
-from datetime import datetime, timedelta
 
 from .session_auth import SessionAuth
 
 
 class SessionExpAuth(SessionAuth):
     """Session authentication class with expiration.
+
+    A session expires SESSION_DURATION seconds after its creation and,
+    if SESSION_IDLE_DURATION is set, that many seconds after its last
+    use. In-memory sessions record every use; stored sessions only
+    record one per SESSION_TOUCH_INTERVAL seconds (see SessionDBAuth).
     """
 
     def __init__(self) -> None:
@@ -20,32 +24,32 @@ class SessionExpAuth(SessionAuth):
             self.session_duration = int(os.getenv('SESSION_DURATION', '0'))
         except Exception:
             self.session_duration = 0
-
-    def create_session(self, user_id=None):
-        """Creates a session id for the user.
-        """
-        session_id = super().create_session(user_id)
-        if type(session_id) != str:
-            return None
-        self.user_id_by_session_id[session_id] = {
-            'user_id': user_id,
-            'created_at': datetime.now(),
-        }
-        return session_id
+        try:
+            self.session_idle_duration = int(
+                os.getenv('SESSION_IDLE_DURATION', '0'))
+        except Exception:
+            self.session_idle_duration = 0
+        try:
+            self.session_touch_interval = int(
+                os.getenv('SESSION_TOUCH_INTERVAL', '60'))
+        except Exception:
+            self.session_touch_interval = 60
 
     def user_id_for_session_id(self, session_id=None) -> str:
         """Retrieves the user id of the user associated with
         a given session id.
         """
-        if session_id in self.user_id_by_session_id:
-            session_dict = self.user_id_by_session_id[session_id]
-            if self.session_duration <= 0:
-                return session_dict['user_id']
-            if 'created_at' not in session_dict:
-                return None
-            cur_time = datetime.now()
-            time_span = timedelta(seconds=self.session_duration)
-            exp_time = session_dict['created_at'] + time_span
-            if exp_time < cur_time:
+        record = self.user_id_by_session_id.get(session_id)
+        if record is None:
+            return None
+        if self.session_duration <= 0 and self.session_idle_duration <= 0:
+            return record.user_id
+        now = self.user_id_by_session_id.now()
+        if self.session_duration > 0 and \
+                record.created_at + self.session_duration < now:
+            return None
+        if self.session_idle_duration > 0:
+            if record.accessed_at + self.session_idle_duration < now:
                 return None
-            return session_dict['user_id']
+            record.accessed_at = now
+        return record.user_id
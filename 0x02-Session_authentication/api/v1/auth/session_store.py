@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Compact in-memory session store module for the API.
+
+A session is kept as a SessionRecord, a slotted object holding the
+interned user id and the creation and last access times in integer
+epoch seconds, keyed by the 16 bytes of its UUID instead of the
+36-character string. now() returns the same int object for every call
+in the same second, so the timestamps of sessions created or used in
+that second share it. Each user id maps to the key of its only session,
+or to the list of keys of its sessions, so that they are listed without
+a scan.
+"""
+import sys
+import threading
+import time
+from typing import Iterator, List, Optional
+from uuid import UUID, uuid4
+
+
+class SessionRecord:
+    """A live session.
+    """
+    __slots__ = ('user_id', 'created_at', 'accessed_at')
+
+    def __init__(self, user_id: str, created_at: int) -> None:
+        """Initializes a new SessionRecord instance.
+        """
+        self.user_id = user_id
+        self.created_at = created_at
+        self.accessed_at = created_at
+
+
+def session_key(session_id: str) -> Optional[bytes]:
+    """Returns the 16-byte key of a session id, or None if it is not a
+    UUID in hyphenated hex form (of either case, as UUIDs are).
+    """
+    if type(session_id) is not str or len(session_id) != 36 or not \
+            session_id[8] == session_id[13] == session_id[18] == \
+            session_id[23] == '-':
+        return None
+    try:
+        key = bytes.fromhex(session_id.replace('-', ''))
+    except ValueError:
+        return None
+    return key if len(key) == 16 else None
+
+
+class SessionStore:
+    """Sessions by 16-byte key, with their keys by user id.
+    """
+
+    def __init__(self) -> None:
+        """Initializes an empty SessionStore.
+        """
+        self._records = {}
+        self._keys_by_user_id = {}
+        self._now = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        """Returns the number of sessions.
+        """
+        return len(self._records)
+
+    def __contains__(self, session_id: str) -> bool:
+        """Whether a session exists.
+        """
+        return self.get(session_id) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterates over the session ids.
+        """
+        for key in list(self._records):
+            yield str(UUID(bytes=key))
+
+    def now(self) -> int:
+        """Returns the current epoch second, as the same int object for
+        every call in that second.
+        """
+        now = self._now
+        second = int(time.time())
+        if second != now:
+            # A new second: cache its int for the calls that follow.
+            now = self._now = second
+        return now
+
+    def create(self, user_id: str) -> str:
+        """Creates a session for a user, returning its id.
+        """
+        uuid = uuid4()
+        self._add(uuid.bytes, user_id, None)
+        return str(uuid)
+
+    def add(self, session_id: str, user_id: str,
+            created_at: int = None) -> None:
+        """Stores a session, created now unless `created_at` is given.
+        """
+        key = session_key(session_id)
+        if key is None:
+            raise ValueError("Invalid session id {}".format(session_id))
+        self._add(key, user_id, created_at)
+
+    def _add(self, key: bytes, user_id: str, created_at: int) -> None:
+        """Stores the session of a key.
+        """
+        user_id = sys.intern(user_id)
+        if created_at is None:
+            created_at = self.now()
+        with self._lock:
+            self._discard(key)
+            self._records[key] = SessionRecord(user_id, created_at)
+            keys = self._keys_by_user_id.get(user_id)
+            if keys is None:
+                self._keys_by_user_id[user_id] = key
+            elif type(keys) is bytes:
+                self._keys_by_user_id[user_id] = [keys, key]
+            else:
+                keys.append(key)
+
+    def get(self, session_id: str) -> Optional[SessionRecord]:
+        """Returns the record of a session, or None.
+        """
+        key = session_key(session_id)
+        if key is None:
+            return None
+        return self._records.get(key)
+
+    def remove(self, session_id: str) -> Optional[SessionRecord]:
+        """Removes a session, returning its record, if any.
+        """
+        key = session_key(session_id)
+        if key is None:
+            return None
+        with self._lock:
+            return self._discard(key)
+
+    def _discard(self, key: bytes) -> Optional[SessionRecord]:
+        """Removes the session of a key, under the lock.
+        """
+        record = self._records.pop(key, None)
+        if record is None:
+            return None
+        keys = self._keys_by_user_id.get(record.user_id)
+        if keys == key:
+            del self._keys_by_user_id[record.user_id]
+        elif type(keys) is list:
+            keys.remove(key)
+            if len(keys) == 1:
+                self._keys_by_user_id[record.user_id] = keys[0]
+        return record
+
+    def session_ids(self, user_id: str) -> List[str]:
+        """Returns the session ids of a user.
+        """
+        keys = self._keys_by_user_id.get(user_id)
+        if keys is None:
+            return []
+        if type(keys) is bytes:
+            keys = (keys,)
+        return [str(UUID(bytes=key)) for key in list(keys)]
+
+    def clear(self) -> None:
+        """Removes every session.
+        """
+        with self._lock:
+            self._records.clear()
+            self._keys_by_user_id.clear()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""JSON provider module for the API.
+
+Makes `jsonify` go through `models.json_codec`, i.e. orjson when it is
+installed, so that the responses and the file store share one encoder
+and the same datetime layout. Response keys are sorted, as Flask's own
+provider does, unless the app sets `app.json.sort_keys` to False. Flask
+versions older than 2.2, which have no JSON provider API, get an encoder
+with the same datetime layout.
+"""
+from typing import Any
+
+from flask import Flask
+
+from models import json_codec
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    DefaultJSONProvider = None
+
+
+if DefaultJSONProvider is not None:
+    class CodecJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by models.json_codec.
+        """
+
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            """Serialize data as JSON text.
+            """
+            return json_codec.dumps(obj, self.sort_keys).decode()
+
+        def loads(self, s: Any, **kwargs: Any) -> Any:
+            """Deserialize data as JSON.
+            """
+            return json_codec.loads(s)
+
+        def response(self, *args: Any, **kwargs: Any):
+            """Serialize the jsonify arguments into a response.
+            """
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                json_codec.dumps(obj, self.sort_keys) + b'\n',
+                mimetype=self.mimetype)
+else:
+    from flask.json import JSONEncoder
+
+    class CodecJSONEncoder(JSONEncoder):
+        """Flask JSON encoder with the json_codec datetime layout.
+        """
+
+        def default(self, o: Any) -> Any:
+            """Serialize the types json does not know about.
+            """
+            return json_codec._default(o)
+
+
+def init_app(app: Flask) -> None:
+    """Installs the codec-backed JSON provider on the app.
+    """
+    if DefaultJSONProvider is not None:
+        app.json = CodecJSONProvider(app)
+    else:
+        app.json_encoder = CodecJSONEncoder
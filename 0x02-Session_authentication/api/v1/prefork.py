@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""Pre-forking server module for the API.
+
+The parent process imports the app, which loads the stored objects,
+builds the caches the workers would otherwise each build on their first
+requests (warm_up()), freezes the garbage collector and forks
+SERVER_WORKERS workers sharing its listening socket. The workers share
+the parent's memory pages copy-on-write until they write to them.
+
+Each worker serves requests on a pool of SERVER_THREADS threads and
+closes the connection after each response, so that an idle client never
+holds a thread. After SERVER_MAX_REQUESTS requests, plus a random jitter
+of up to SERVER_MAX_REQUESTS_JITTER so that workers do not all restart
+together, a worker stops accepting connections, finishes the requests
+in progress and exits, and the parent forks a fresh one. SIGHUP
+recycles every worker that way. SIGTERM and SIGINT stop the server,
+killing the workers still busy after SERVER_GRACEFUL_TIMEOUT seconds.
+
+Several workers need MODELS_STORAGE=sqlite: with the JSON storage, each
+worker would rewrite the files from its own copy of the objects.
+
+Usage:
+    MODELS_STORAGE=sqlite SERVER_WORKERS=4 SERVER_THREADS=8 \
+        python3 -m api.v1.prefork
+"""
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+SERVER_WORKERS = int(os.getenv('SERVER_WORKERS', str(os.cpu_count() or 1)))
+SERVER_THREADS = int(os.getenv('SERVER_THREADS', '8'))
+SERVER_MAX_REQUESTS = int(os.getenv('SERVER_MAX_REQUESTS', '0'))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv('SERVER_MAX_REQUESTS_JITTER', '0'))
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv('SERVER_GRACEFUL_TIMEOUT', '30'))
+IN_MEMORY_SESSIONS = ('session_auth', 'session_exp_auth')
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Request handler closing the connection after each response.
+    """
+    protocol_version = 'HTTP/1.0'
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling connections on a fixed pool of threads,
+    stopping after `max_requests` of them if it is set.
+    """
+    multithread = True
+    multiprocess = True
+
+    def __init__(self, host: str, port: int, app, threads: int,
+                 max_requests: int = 0, fd: int = None) -> None:
+        """Initializes a new PooledWSGIServer instance.
+        """
+        super().__init__(host, port, app, RequestHandler, fd=fd)
+        self.max_requests = max_requests
+        self.handled = 0
+        self._pool = ThreadPoolExecutor(max(1, threads),
+                                        thread_name_prefix='request')
+        self._stopping = threading.Event()
+
+    def process_request(self, request, client_address) -> None:
+        """Hands a connection to the pool.
+        """
+        self._pool.submit(self._process, request, client_address)
+        self.handled += 1
+        if self.max_requests and self.handled >= self.max_requests:
+            self.stop()
+
+    def _process(self, request, client_address) -> None:
+        """Serves a connection on a thread of the pool.
+        """
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def stop(self) -> None:
+        """Stops accepting connections; safe from any thread and from a
+        signal handler.
+        """
+        if not self._stopping.is_set():
+            self._stopping.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def serve(self) -> None:
+        """Serves until stopped, then waits for the requests in progress.
+        """
+        self.serve_forever()
+        self._pool.shutdown(wait=True)
+
+
+def _worker(app, sock: socket.socket, host: str, threads: int,
+            max_requests: int, post_fork: Callable[[], None]) -> None:
+    """Runs a worker process; never returns.
+    """
+    status = 1
+    try:
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        if post_fork is not None:
+            post_fork()
+        port = sock.getsockname()[1]
+        server = PooledWSGIServer(host, port, app, threads, max_requests,
+                                  fd=sock.fileno())
+        sock.close()
+        # Another worker may accept a connection this one was woken up
+        # for: accept() must then fail instead of blocking shutdown().
+        server.socket.setblocking(False)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: server.stop())
+        server.serve()
+        status = 0
+    except Exception:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+def serve(app, host: str = '0.0.0.0', port: int = 5000,
+          workers: int = SERVER_WORKERS, threads: int = SERVER_THREADS,
+          max_requests: int = SERVER_MAX_REQUESTS,
+          max_requests_jitter: int = SERVER_MAX_REQUESTS_JITTER,
+          graceful_timeout: float = SERVER_GRACEFUL_TIMEOUT,
+          warm_up: Callable[[], None] = None,
+          post_fork: Callable[[], None] = None) -> None:
+    """Serves a WSGI app with pre-forked workers until SIGTERM or SIGINT.
+    `warm_up` runs in the parent before the workers are forked and
+    `post_fork` in each worker, before it serves requests.
+    """
+    sock = socket.create_server((host, int(port)), backlog=2048)
+    sock.set_inheritable(True)
+    if warm_up is not None:
+        warm_up()
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = []
+
+    def spawn() -> None:
+        limit = max_requests
+        if limit and max_requests_jitter:
+            limit += random.randint(0, max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            _worker(app, sock, host, threads, limit, post_fork)
+        children[pid] = time.monotonic()
+
+    def signal_workers(signum: int) -> None:
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def stop(*_) -> None:
+        if not stopping:
+            stopping.append(True)
+            signal_workers(signal.SIGTERM)
+            signal.alarm(max(1, int(graceful_timeout)))
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, lambda *_: signal_workers(signal.SIGTERM))
+    signal.signal(signal.SIGALRM, lambda *_: signal_workers(signal.SIGKILL))
+    print(' * Serving on http://{}:{} with {} workers of {} threads'.format(
+        host, sock.getsockname()[1], workers, threads), file=sys.stderr)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+        started_at = children.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        if status != 0 and time.monotonic() - started_at < 1:
+            # Do not fork in a tight loop if workers die on startup.
+            time.sleep(1)
+        spawn()
+    signal.alarm(0)
+    sock.close()
+
+
+def main() -> None:
+    """Serves the API on API_HOST:API_PORT.
+
+    Refuses to start several workers with a storage kept in memory,
+    which each worker would rewrite from its own copy, or with AUTH_TYPE
+    session_auth or session_exp_auth, whose sessions only exist in the
+    worker that created them, and warns about the login rate limits,
+    counted per worker.
+    """
+    from api.v1 import rate_limit
+    from api.v1.app import app, auth_type, post_fork, warm_up
+    from models import storage
+
+    if SERVER_WORKERS > 1:
+        if storage.BACKEND.in_memory:
+            sys.exit(' * Error: each worker would keep its own copy of the '
+                     '{} storage and rewrite its files from it, overwriting '
+                     'the changes made by the others; use MODELS_STORAGE='
+                     'sqlite or SERVER_WORKERS=1'.format(storage.BACKEND.name))
+        if auth_type in IN_MEMORY_SESSIONS:
+            sys.exit(' * Error: AUTH_TYPE={} keeps the sessions in the '
+                     'memory of the worker that created them, so the other '
+                     'workers would reject them; use AUTH_TYPE='
+                     'session_db_auth with MODELS_STORAGE=sqlite, or '
+                     'SERVER_WORKERS=1'.format(auth_type))
+        if rate_limit.RATE_LIMIT_BACKEND != 'redis' and (
+                rate_limit.LOGIN_RATE_LIMIT_IP > 0 or
+                rate_limit.LOGIN_RATE_LIMIT_EMAIL > 0):
+            print(' * Warning: each worker counts login attempts on its '
+                  'own, so the login rate limits are multiplied by the '
+                  'number of workers; use RATE_LIMIT_BACKEND=redis',
+                  file=sys.stderr)
+    serve(app, os.getenv('API_HOST', '0.0.0.0'),
+          int(os.getenv('API_PORT', '5000')), warm_up=warm_up,
+          post_fork=post_fork)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Request profiling module for the API.
+
+When `PROFILER_ENABLED` is set, every `PROFILER_SAMPLE_EVERY`-th request
+and every request carrying the `PROFILER_HEADER` header set to
+`PROFILER_TOKEN` is run under cProfile. Profiles are aggregated in
+memory, dumped every `PROFILER_FLUSH_EVERY` profiled requests to a
+`.pstats` file in `PROFILER_DIR`, and only the newest
+`PROFILER_MAX_FILES` files are kept. Only one request is profiled at a
+time; a request that is due while another one is being profiled runs
+normally.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import threading
+import time
+from os import getenv
+from typing import List
+
+from flask import Flask, g, request
+
+
+PROFILER_ENABLED = getenv('PROFILER_ENABLED', '').lower() in (
+    '1', 'true', 'yes')
+PROFILER_SAMPLE_EVERY = int(getenv('PROFILER_SAMPLE_EVERY', '0'))
+PROFILER_HEADER = getenv('PROFILER_HEADER', 'X-Debug-Profile')
+PROFILER_TOKEN = getenv('PROFILER_TOKEN', '')
+PROFILER_DIR = getenv('PROFILER_DIR', '.profiles')
+PROFILER_MAX_FILES = int(getenv('PROFILER_MAX_FILES', '20'))
+PROFILER_FLUSH_EVERY = int(getenv('PROFILER_FLUSH_EVERY', '50'))
+
+
+class Profiler:
+    """Samples requests under cProfile and aggregates their stats.
+    """
+
+    def __init__(self, directory: str = PROFILER_DIR,
+                 sample_every: int = PROFILER_SAMPLE_EVERY,
+                 flush_every: int = PROFILER_FLUSH_EVERY,
+                 max_files: int = PROFILER_MAX_FILES) -> None:
+        """Initializes a new Profiler instance.
+        """
+        self.directory = directory
+        self.sample_every = sample_every
+        self.flush_every = max(1, flush_every)
+        self.max_files = max(1, max_files)
+        self._active = threading.Lock()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._pending = []
+
+    def is_authorized(self, token: str) -> bool:
+        """Checks a token against PROFILER_TOKEN in constant time.
+        """
+        if not PROFILER_TOKEN or token is None:
+            return False
+        return hmac.compare_digest(token.encode(), PROFILER_TOKEN.encode())
+
+    def should_profile(self) -> bool:
+        """Decides whether the current request is profiled.
+        """
+        with self._lock:
+            self._requests += 1
+            sampled = self.sample_every > 0 and \
+                self._requests % self.sample_every == 0
+        return sampled or self.is_authorized(
+            request.headers.get(PROFILER_HEADER))
+
+    def start(self) -> None:
+        """Starts profiling the current request if it is due.
+        """
+        if not self.should_profile():
+            return
+        if not self._active.acquire(blocking=False):
+            return
+        profile = cProfile.Profile()
+        g.profiler_profile = profile
+        profile.enable()
+
+    def stop(self, error: Exception = None) -> None:
+        """Stops profiling the current request and records its stats.
+        """
+        profile = g.pop('profiler_profile', None)
+        if profile is None:
+            return
+        profile.disable()
+        self._active.release()
+        with self._lock:
+            self._pending.append(profile)
+            if len(self._pending) >= self.flush_every:
+                self._flush()
+
+    def _files(self) -> List[str]:
+        """Returns the dumped stats files, oldest first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        names = sorted(n for n in os.listdir(self.directory)
+                       if n.endswith('.pstats'))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _flush(self) -> None:
+        """Dumps the pending profiles to a new file and rotates old ones.
+        Must be called with the lock held.
+        """
+        if not self._pending:
+            return
+        stats = pstats.Stats(self._pending[0])
+        for profile in self._pending[1:]:
+            stats.add(profile)
+        self._pending = []
+        os.makedirs(self.directory, exist_ok=True)
+        file_name = 'profile-{}.pstats'.format(time.time_ns())
+        stats.dump_stats(os.path.join(self.directory, file_name))
+        for old_file in self._files()[:-self.max_files]:
+            os.remove(old_file)
+
+    def report(self, sort: str = 'cumulative', limit: int = 50) -> str:
+        """Returns the aggregated stats of every kept profile as text.
+        """
+        with self._lock:
+            self._flush()
+            files = self._files()
+        if not files:
+            return 'No profiled requests yet.\n'
+        out = io.StringIO()
+        stats = pstats.Stats(*files, stream=out)
+        stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+
+profiler = Profiler()
+
+
+def init_app(app: Flask) -> None:
+    """Registers the profiling hooks when profiling is enabled.
+    The start hook runs before every other `before_request` hook so that
+    authentication is part of the profile.
+    """
+    if not PROFILER_ENABLED:
+        return
+    app.before_request_funcs.setdefault(None, []).insert(0, profiler.start)
+    app.teardown_request(profiler.stop)
@@ -1,7 +1,7 @@
 #!/usr/bin/env python3
 """Module of Index views.
 """
-from flask import jsonify, abort
+from flask import jsonify, abort, request, Response
 from api.v1.views import app_views
 
 
@@ -19,13 +19,66 @@ def stats() -> str:
     """GET /api/v1/stats
     Return:
       - the number of each objects.
+      - the number of users per email domain and created per day.
+      - the number of active sessions, when sessions are stored.
     """
     from models.user import User
+    from models.user_session import UserSession
+    from api.v1.app import auth_type
     stats = {}
     stats['users'] = User.count()
+    user_stats = User.stats()
+    stats['users_by_email_domain'] = user_stats['values']['email_domain']
+    stats['users_created_by_day'] = user_stats['created']
+    if auth_type == 'session_db_auth':
+        session_stats = UserSession.stats()
+        stats['sessions'] = session_stats['count']
+        stats['users_with_sessions'] = len(session_stats['values']['user_id'])
     return jsonify(stats)
 
 
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def metrics() -> Response:
+    """GET /api/v1/metrics
+    Return:
+      - request and operation latencies in the Prometheus text format.
+      - 403 if the METRICS_TOKEN bearer token is missing or wrong.
+      - 404 if metrics are disabled.
+    """
+    from api.v1 import metrics
+    if not metrics.METRICS_ENABLED:
+        abort(404)
+    if not metrics.is_authorized(request.headers.get('Authorization')):
+        abort(403)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app_views.route('/profiler', methods=['GET'], strict_slashes=False)
+def profiler_stats() -> Response:
+    """GET /api/v1/profiler
+    Query parameters:
+      - sort (optional): pstats sort key, cumulative by default.
+      - limit (optional): number of functions listed, 50 by default.
+    Return:
+      - the aggregated profile of the sampled requests.
+      - 403 if the profiler token header is missing or wrong.
+      - 404 if profiling is disabled.
+    """
+    from api.v1 import profiler
+    if not profiler.PROFILER_ENABLED:
+        abort(404)
+    token = request.headers.get(profiler.PROFILER_HEADER)
+    if not profiler.profiler.is_authorized(token):
+        abort(403)
+    sort = request.args.get('sort', 'cumulative')
+    try:
+        limit = int(request.args.get('limit', '50'))
+        report = profiler.profiler.report(sort, limit)
+    except (KeyError, ValueError):
+        return jsonify({"error": "Wrong format"}), 400
+    return Response(report, mimetype='text/plain')
+
+
 @app_views.route('/unauthorized/', strict_slashes=False)
 def unauthorized() -> None:
     """GET /api/v1/unauthorized
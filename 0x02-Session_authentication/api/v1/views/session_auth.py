@@ -6,6 +6,7 @@ from typing import Tuple
 from flask import abort, jsonify, request
 
 from models.user import User
+from api.v1.rate_limit import login_limiter
 from api.v1.views import app_views
 
 
@@ -14,6 +15,8 @@ def login() -> Tuple[str, int]:
     """POST /api/v1/auth_session/login
     Return:
       - JSON representation of a User object.
+      - 429 if too many login attempts came from the client or for the
+        email, with a Retry-After header.
     """
     not_found_res = {"error": "no user found for this email"}
     email = request.form.get('email')
@@ -22,6 +25,11 @@ def login() -> Tuple[str, int]:
     password = request.form.get('password')
     if password is None or len(password.strip()) == 0:
         return jsonify({"error": "password missing"}), 400
+    allowed, retry_after = login_limiter.check(request.remote_addr, email)
+    if not allowed:
+        res = jsonify({"error": "too many login attempts"})
+        res.headers['Retry-After'] = str(retry_after)
+        return res, 429
     try:
         users = User.search({'email': email})
     except Exception:
@@ -31,7 +39,7 @@ def login() -> Tuple[str, int]:
     if users[0].is_valid_password(password):
         from api.v1.app import auth
         sessiond_id = auth.create_session(getattr(users[0], 'id'))
-        res = jsonify(users[0].to_json())
+        res = jsonify(users[0].to_dict())
         res.set_cookie(os.getenv("SESSION_NAME"), sessiond_id)
         return res
     return jsonify({"error": "wrong password"}), 401
@@ -1,19 +1,62 @@
 #!/usr/bin/env python3
 """Module of Users views.
 """
+from datetime import datetime, timezone
+from typing import Callable
 from api.v1.views import app_views
-from flask import abort, jsonify, request
+from flask import abort, jsonify, make_response, request, Response
 from models.user import User
 
 
+def is_not_modified(etag: str, last_modified: datetime) -> bool:
+    """Checks the conditional headers of the request against a resource.
+    If-None-Match takes precedence over If-Modified-Since.
+    """
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    since = request.if_modified_since
+    if since is None or last_modified is None:
+        return False
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return last_modified.replace(microsecond=0) <= since
+
+
+def conditional_response(etag: str, last_modified: datetime,
+                         build: Callable[[], object]) -> Response:
+    """Returns a 304 response if the client's copy is fresh, otherwise
+    the JSON representation returned by `build`, with validators set.
+    """
+    if is_not_modified(etag, last_modified):
+        response = make_response('', 304)
+    else:
+        response = jsonify(build())
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return response
+
+
+def user_response(user: User) -> Response:
+    """Returns the conditional JSON response of a single user. Its ETag
+    changes on every save, even within the second updated_at is stored to.
+    """
+    etag = "{}-{}".format(user.id, user._revision)
+    return conditional_response(etag, user.updated_at, user.to_dict)
+
+
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
 def view_all_users() -> str:
     """GET /api/v1/users
     Return:
       - list of all User objects JSON represented.
+      - 304 if the list did not change since the client's copy.
     """
-    all_users = [user.to_json() for user in User.all()]
-    return jsonify(all_users)
+    version, changed_at = User.version()
+    return conditional_response(
+        "users-{}".format(version), changed_at,
+        lambda: [user.to_dict() for user in User.all()],
+    )
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -23,6 +66,7 @@ def view_one_user(user_id: str = None) -> str:
       - User ID.
     Return:
       - User object JSON represented.
+      - 304 if the User did not change since the client's copy.
       - 404 if the User ID doesn't exist.
     """
     if user_id is None:
@@ -31,11 +75,11 @@ def view_one_user(user_id: str = None) -> str:
         if request.current_user is None:
             abort(404)
         else:
-            return jsonify(request.current_user.to_json())
+            return user_response(request.current_user)
     user = User.get(user_id)
     if user is None:
         abort(404)
-    return jsonify(user.to_json())
+    return user_response(user)
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
@@ -88,7 +132,7 @@ def create_user() -> str:
             user.first_name = rj.get("first_name")
             user.last_name = rj.get("last_name")
             user.save()
-            return jsonify(user.to_json()), 201
+            return jsonify(user.to_dict()), 201
         except Exception as e:
             error_msg = "Can't create User: {}".format(e)
     return jsonify({'error': error_msg}), 400
@@ -124,4 +168,4 @@ def update_user(user_id: str = None) -> str:
     if rj.get('last_name') is not None:
         user.last_name = rj.get('last_name')
     user.save()
-    return jsonify(user.to_json()), 200
+    return jsonify(user.to_dict()), 200
@@ -1,20 +1,67 @@
 #!/usr/bin/env python3
 """Base module.
 """
-import json
+import threading
 import uuid
-from os import path
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import TypeVar, List, Iterable
+from typing import Callable, Dict, TypeVar, List, Iterable, Iterator, Tuple
 
+from models import storage
+from models.json_codec import TIMESTAMP_FORMAT
+from models.negative_cache import NegativeCache, NEGATIVE_CACHE_CAPACITY
+from models.storage import DATA
 
-TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
-DATA = {}
+
+STATS_BUCKET_FORMAT = "%Y-%m-%d"
+STATS = {}
+VERSIONS = {}
+LOOKUPS = {}
+MODELS = {}
+LOADING = {'thread': None, 'error': None}
+LOADED = threading.Event()
+LOADING_LOCK = threading.Lock()
+STORE_ID = uuid.uuid4().hex[:12]
 
 
 class Base():
     """Base class.
+
+    Objects are stored by the backend of models.storage, selected with
+    the MODELS_STORAGE environment variable.
+
+    STATS_KEYS maps the name of a tracked statistic to a function that
+    computes its value for an object. The number of objects per value is
+    kept up to date by save() and remove(), along with the number of
+    objects created per day, so that stats() never scans DATA.
+
+    LOOKUP_KEYS lists the attributes with a negative cache: search() on
+    a value no saved object has returns [] without scanning DATA. It only
+    applies to the in-memory backend.
+
+    INDEX_KEYS lists the attributes the in-memory backend keeps sorted
+    indexes of for query().
+
+    Every subclass is registered in MODELS, and load_all() loads them
+    all. load_filters() selects the objects worth loading: the others,
+    such as expired sessions, are dropped from the store while it loads.
+    load_in_background() runs load_all() once in a background thread, and
+    wait_loaded() waits for it, so that a process can serve requests that
+    do not need the stored objects while they load.
+
+    Objects may be saved and read from several threads: save() and
+    remove() hold the lock of the class while they update the store and
+    this bookkeeping, readers take no lock.
     """
+    STATS_KEYS: Dict[str, Callable[['Base'], object]] = {}
+    LOOKUP_KEYS: Tuple[str, ...] = ()
+    INDEX_KEYS: Tuple[str, ...] = ('created_at',)
+
+    def __init_subclass__(cls, **kwargs):
+        """Register a model class.
+        """
+        super().__init_subclass__(**kwargs)
+        MODELS[cls.__name__] = cls
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a Base instance.
@@ -34,6 +81,7 @@ class Base():
                                                 TIMESTAMP_FORMAT)
         else:
             self.updated_at = datetime.utcnow()
+        self._revision = kwargs.get('_revision') or 0
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """Equality.
@@ -44,6 +92,14 @@ class Base():
             return False
         return (self.id == other.id)
 
+    def to_dict(self, for_serialization: bool = False) -> dict:
+        """Convert the object to a dictionary, keeping datetimes as is
+        for json_codec to serialize natively.
+        """
+        if for_serialization:
+            return dict(self.__dict__)
+        return {k: v for k, v in self.__dict__.items() if k[0] != '_'}
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """Convert the object a JSON dictionary.
         """
@@ -58,55 +114,269 @@ class Base():
         return result
 
     @classmethod
-    def load_from_file(cls):
-        """Load all objects from file.
+    def _stats(cls) -> dict:
+        """Return the aggregates of the class, creating them if needed.
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
+        if STATS.get(s_class) is None:
+            STATS[s_class] = {
+                'entries': {},
+                'values': {key: {} for key in cls.STATS_KEYS},
+                'created': {},
+            }
+        return STATS[s_class]
+
+    def _stats_add(self):
+        """Count the current object in the aggregates of its class.
+        """
+        stats = self.__class__._stats()
+        values = tuple(
+            (key, fn(self)) for key, fn in self.__class__.STATS_KEYS.items()
+        )
+        bucket = self.created_at.strftime(STATS_BUCKET_FORMAT)
+        stats['entries'][self.id] = (values, bucket)
+        for key, value in values:
+            counts = stats['values'][key]
+            counts[value] = counts.get(value, 0) + 1
+        stats['created'][bucket] = stats['created'].get(bucket, 0) + 1
+
+    def _stats_discard(self):
+        """Remove the current object from the aggregates of its class.
+        """
+        stats = self.__class__._stats()
+        entry = stats['entries'].pop(self.id, None)
+        if entry is None:
             return
+        values, bucket = entry
+        for key, value in values:
+            counts = stats['values'][key]
+            counts[value] -= 1
+            if counts[value] == 0:
+                del counts[value]
+        stats['created'][bucket] -= 1
+        if stats['created'][bucket] == 0:
+            del stats['created'][bucket]
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def _lookups(cls) -> Dict[str, NegativeCache]:
+        """Return the negative caches of the class, rebuilding them from
+        DATA if it was changed other than through save() and remove() or
+        if they are too full.
+        """
+        s_class = cls.__name__
+        objs = DATA[s_class]
+        entry = LOOKUPS.get(s_class)
+        if entry is None or entry[0] is not objs or entry[1] != len(objs) \
+                or any(c.saturated for c in entry[2].values()):
+            with storage.BACKEND.lock(cls):
+                snapshot = list(objs.values())
+                capacity = max(NEGATIVE_CACHE_CAPACITY, 2 * len(snapshot))
+                caches = {key: NegativeCache(capacity)
+                          for key in cls.LOOKUP_KEYS}
+                for obj in snapshot:
+                    for key, cache in caches.items():
+                        cache.add(getattr(obj, key, None))
+                entry = [objs, len(snapshot), caches]
+                LOOKUPS[s_class] = entry
+        return entry[2]
 
     @classmethod
-    def save_to_file(cls):
-        """Save all objects to file.
+    def _bump_version(cls, data_version: int = None):
+        """Record that the collection of the class has changed, as seen
+        at the given data_version() of the storage backend.
+        """
+        s_class = cls.__name__
+        number, _, seen = VERSIONS.get(s_class, (0, None, None))
+        if data_version is None:
+            data_version = seen
+        VERSIONS[s_class] = (number + 1, datetime.utcnow(), data_version)
+
+    @classmethod
+    def version(cls) -> Tuple[str, datetime]:
+        """Return a token that changes whenever an object of the class is
+        saved, removed or loaded, by this process or by another one
+        sharing the storage, along with the time of that change.
+        """
+        s_class = cls.__name__
+        data_version = storage.BACKEND.data_version()
+        entry = VERSIONS.get(s_class)
+        if entry is None or entry[2] != data_version:
+            with storage.BACKEND.lock(cls):
+                entry = VERSIONS.get(s_class)
+                if entry is None or entry[2] != data_version:
+                    cls._bump_version(data_version)
+        number, changed_at, _ = VERSIONS[s_class]
+        return "{}.{}".format(STORE_ID, number), changed_at
+
+    @staticmethod
+    def after_fork():
+        """Give a forked process a store id of its own, so that the
+        versions it returns never match those of its parent or siblings.
+        """
+        global STORE_ID
+        STORE_ID = uuid.uuid4().hex[:12]
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Return the maintained statistics of the class: the number of
+        objects, the number of objects per value of each STATS_KEYS entry
+        and the number of objects created per day.
+        """
+        stats = cls._stats()
+        return {
+            'count': len(stats['entries']),
+            'values': {k: dict(v) for k, v in stats['values'].items()},
+            'created': dict(stats['created']),
+        }
+
+    @classmethod
+    def _in_memory_lookups(cls) -> bool:
+        """Whether the class has negative caches to maintain.
+        """
+        return bool(cls.LOOKUP_KEYS) and storage.BACKEND.in_memory
+
+    @classmethod
+    def load_filters(cls) -> dict:
+        """Return the filters, as for query(), of the objects to load.
+        """
+        return {}
+
+    @classmethod
+    def load_from_file(cls):
+        """Load all objects from file, dropping those not matching
+        load_filters().
         """
         s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        STATS.pop(s_class, None)
+        LOOKUPS.pop(s_class, None)
+        cls._stats()
+        cls._bump_version()
+        conditions = storage.parse_filters(cls.load_filters())
+        for obj in storage.BACKEND.load(cls, conditions):
+            obj._stats_add()
+
+    @staticmethod
+    def warm_up():
+        """Build the negative caches and sorted indexes of every model
+        class, and wait for pending file writes.
+        """
+        for cls in list(MODELS.values()):
+            if cls._in_memory_lookups():
+                cls._lookups()
+            cls.query(limit=0)
+            storage.BACKEND.flush(cls)
+
+    @staticmethod
+    def load_all():
+        """Load the objects of every model class, one thread per class.
+        """
+        with ThreadPoolExecutor(max(len(MODELS), 1)) as pool:
+            list(pool.map(lambda cls: cls.load_from_file(),
+                          list(MODELS.values())))
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @staticmethod
+    def load_in_background() -> threading.Thread:
+        """Start load_all() in a background thread, unless it was started
+        already, and return that thread.
+        """
+        with LOADING_LOCK:
+            if LOADING['thread'] is None:
+                LOADING['thread'] = threading.Thread(
+                    target=Base._load_in_background, name='models-load',
+                    daemon=True)
+                LOADING['thread'].start()
+            return LOADING['thread']
+
+    @staticmethod
+    def _load_in_background():
+        """Run load_all(), keeping its error for wait_loaded().
+        """
+        try:
+            Base.load_all()
+            LOADED.set()
+        except Exception as e:
+            LOADING['error'] = e
+
+    @staticmethod
+    def loaded() -> bool:
+        """Whether load_in_background() has loaded every object.
+        """
+        return LOADED.is_set()
+
+    @staticmethod
+    def wait_loaded():
+        """Wait for load_in_background() to load every object, starting
+        it if needed, and raise its error if it failed.
+        """
+        if not LOADED.is_set():
+            Base.load_in_background().join()
+            if LOADING['error'] is not None:
+                raise LOADING['error']
+
+    @classmethod
+    def save_to_file(cls):
+        """Save all objects to file.
+        """
+        storage.BACKEND.dump(cls)
 
     def save(self):
-        """Save current object.
+        """Save current object, returning once it is on disk.
         """
         s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        with storage.BACKEND.lock(self.__class__):
+            self.updated_at = datetime.utcnow()
+            self._revision = getattr(self, '_revision', 0) + 1
+            caches = self.__class__._lookups() \
+                if self._in_memory_lookups() else {}
+            self._stats_discard()
+            self._stats_add()
+            self.__class__._bump_version()
+            storage.BACKEND.save(self)
+            for key, cache in caches.items():
+                cache.add(getattr(self, key, None))
+            if caches:
+                LOOKUPS[s_class][1] = len(DATA[s_class])
+        storage.BACKEND.flush(self.__class__)
 
     def remove(self):
-        """Remove object.
+        """Remove object, returning once it is removed from disk.
         """
         s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        with storage.BACKEND.lock(self.__class__):
+            if self._in_memory_lookups():
+                self.__class__._lookups()
+            if not storage.BACKEND.remove(self):
+                return
+            self._stats_discard()
+            self.__class__._bump_version()
+            if self._in_memory_lookups():
+                LOOKUPS[s_class][1] = len(DATA[s_class])
+        storage.BACKEND.flush(self.__class__)
+
+    @classmethod
+    def remove_many(cls, objs: Iterable['Base']) -> int:
+        """Remove many objects of the class with a single file rewrite,
+        returning the number removed once they are removed from disk.
+        """
+        s_class = cls.__name__
+        with storage.BACKEND.lock(cls):
+            if cls._in_memory_lookups():
+                cls._lookups()
+            removed = storage.BACKEND.remove_many(cls, objs)
+            for obj in removed:
+                obj._stats_discard()
+            if removed:
+                cls._bump_version()
+            if cls._in_memory_lookups():
+                LOOKUPS[s_class][1] = len(DATA[s_class])
+        storage.BACKEND.flush(cls)
+        return len(removed)
 
     @classmethod
     def count(cls) -> int:
         """Count all objects.
         """
-        s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return storage.BACKEND.count(cls)
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
@@ -118,20 +388,40 @@ class Base():
     def get(cls, id: str) -> TypeVar('Base'):
         """Return one object by ID.
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return storage.BACKEND.get(cls, id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """Search all objects with matching attributes.
         """
-        s_class = cls.__name__
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-
-        return list(filter(_search, DATA[s_class].values()))
+        if not cls._in_memory_lookups():
+            return storage.BACKEND.search(cls, attributes)
+        cache = None
+        caches = cls._lookups()
+        for k, v in attributes.items():
+            if k in caches and not caches[k].might_contain(v):
+                return []
+        if len(attributes) == 1:
+            cache = caches.get(next(iter(attributes)))
+            generation = cache.generation if cache else None
+        result = storage.BACKEND.search(cls, attributes)
+        if cache is not None and not result:
+            cache.record_miss(next(iter(attributes.values())), generation)
+        return result
+
+    @classmethod
+    def query(cls, filters: dict = {}, order_by: str = None,
+              limit: int = None, offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """Return a lazy iterator over the objects matching filters.
+
+        Filter keys are attribute names, optionally suffixed with one of
+        `__ne`, `__lt`, `__lte`, `__gt`, `__gte` or `__startswith`;
+        e.g. {'created_at__gte': start, 'email__startswith': 'bob'}.
+        `order_by` names an attribute, prefixed with `-` for descending
+        order; objects with a None value come first in ascending order,
+        ties are broken by id. Without `order_by`, the order is
+        unspecified. `offset` and `limit` select a page of the results.
+        """
+        conditions = storage.parse_filters(filters)
+        return storage.BACKEND.query(cls, conditions, order_by, limit,
+                                     offset)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""JSON codec module.
+
+Serializes the file store and the API responses with orjson when it is
+installed, and with the standard library otherwise. Both encoders write
+datetimes natively in the `TIMESTAMP_FORMAT` layout, so objects can be
+dumped without converting each datetime field to a string first. The
+`JSON_ENCODER` environment variable (`orjson` or `json`) forces one.
+"""
+import json
+from datetime import datetime
+from os import getenv
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
+BACKENDS = ('orjson', 'json') if orjson is not None else ('json',)
+BACKEND = None
+
+
+def _default(obj: Any) -> Any:
+    """Serialize the types the standard library does not know about.
+    """
+    if isinstance(obj, datetime):
+        return obj.strftime(TIMESTAMP_FORMAT)
+    raise TypeError(
+        "Object of type {} is not JSON serializable".format(type(obj)))
+
+
+def _json_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize with the standard library.
+    """
+    return json.dumps(obj, default=_default, separators=(',', ':'),
+                      sort_keys=sort_keys).encode()
+
+
+def _orjson_dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize with orjson.
+    """
+    option = orjson.OPT_OMIT_MICROSECONDS
+    if sort_keys:
+        option |= orjson.OPT_SORT_KEYS
+    return orjson.dumps(obj, default=_default, option=option)
+
+
+def use(backend: str) -> None:
+    """Select the encoder used by dumps() and loads().
+    """
+    global BACKEND, _dumps, _loads
+    if backend not in BACKENDS:
+        raise ValueError("JSON encoder {} is not available".format(backend))
+    BACKEND = backend
+    if backend == 'orjson':
+        _dumps, _loads = _orjson_dumps, orjson.loads
+    else:
+        _dumps, _loads = _json_dumps, json.loads
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize an object to JSON bytes, with the keys of its objects
+    sorted if `sort_keys` is set.
+    """
+    return _dumps(obj, sort_keys)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Deserialize JSON bytes or text.
+    """
+    return _loads(data)
+
+
+use(getenv('JSON_ENCODER', BACKENDS[0]))
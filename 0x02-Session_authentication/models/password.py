@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""Password hashing module.
+
+Stored passwords are hashed by one of the HASHERS: `sha256` (the legacy
+unsalted hex digest), `bcrypt` or `argon2`. The scheme of a stored hash
+is recognized from its format, so hashes of every scheme keep working;
+new passwords use the `PASSWORD_HASHER` environment variable (`sha256`
+by default), and a stored hash of another scheme, or with weaker
+parameters, is replaced after the next successful check. bcrypt and
+argon2 need the `bcrypt` and `argon2-cffi` packages, imported on use.
+
+Strong hashes cost tens of milliseconds to check, which Basic auth would
+pay on every request. Successful bcrypt and argon2 checks are therefore
+remembered for `PASSWORD_CACHE_TTL` seconds: the cache maps an HMAC of
+the user id and password, under a per-process random key, to the stored
+hash it was checked against, so a cached password is never kept in
+clear and a password change invalidates it.
+"""
+import hashlib
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'sha256')
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+PASSWORD_CACHE_TTL = float(os.getenv('PASSWORD_CACHE_TTL', '60'))
+PASSWORD_CACHE_SIZE = int(os.getenv('PASSWORD_CACHE_SIZE', '10000'))
+
+
+class Sha256Hasher:
+    """Legacy unsalted SHA-256 hex digests.
+    """
+    name = 'sha256'
+
+    @staticmethod
+    def identify(hashed: str) -> bool:
+        """Whether a stored hash has this scheme's format.
+        """
+        return len(hashed) == 64 and \
+            not hashed.strip('0123456789abcdef')
+
+    def hash(self, password: str) -> str:
+        """Hash a password.
+        """
+        return hashlib.sha256(password.encode()).hexdigest().lower()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash in constant time.
+        """
+        return hmac.compare_digest(self.hash(password), hashed)
+
+    def needs_update(self, hashed: str) -> bool:
+        """Whether a stored hash of this scheme should be recomputed.
+        """
+        return False
+
+
+class BcryptHasher:
+    """bcrypt hashes, with BCRYPT_ROUNDS rounds.
+    """
+    name = 'bcrypt'
+
+    def __init__(self, rounds: int = BCRYPT_ROUNDS) -> None:
+        """Initialize a bcrypt hasher.
+        """
+        import bcrypt
+
+        self._bcrypt = bcrypt
+        self.rounds = rounds
+
+    @staticmethod
+    def identify(hashed: str) -> bool:
+        """Whether a stored hash has this scheme's format.
+        """
+        return hashed.startswith(('$2a$', '$2b$', '$2y$'))
+
+    def hash(self, password: str) -> str:
+        """Hash a password.
+        """
+        salt = self._bcrypt.gensalt(self.rounds)
+        return self._bcrypt.hashpw(password.encode(), salt).decode()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash in constant time.
+        """
+        try:
+            return self._bcrypt.checkpw(password.encode(), hashed.encode())
+        except ValueError:
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        """Whether a stored hash has other rounds than the configured ones.
+        """
+        return hashed[4:6] != '{:02d}'.format(self.rounds)
+
+
+class Argon2Hasher:
+    """argon2id hashes with the argon2-cffi default parameters.
+    """
+    name = 'argon2'
+
+    def __init__(self) -> None:
+        """Initialize an argon2 hasher.
+        """
+        import argon2
+
+        self._exceptions = argon2.exceptions
+        self._hasher = argon2.PasswordHasher()
+
+    @staticmethod
+    def identify(hashed: str) -> bool:
+        """Whether a stored hash has this scheme's format.
+        """
+        return hashed.startswith('$argon2')
+
+    def hash(self, password: str) -> str:
+        """Hash a password.
+        """
+        return self._hasher.hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Check a password against a stored hash in constant time.
+        """
+        try:
+            return self._hasher.verify(hashed, password)
+        except (self._exceptions.VerificationError,
+                self._exceptions.InvalidHash):
+            return False
+
+    def needs_update(self, hashed: str) -> bool:
+        """Whether a stored hash has other parameters than the defaults.
+        """
+        return self._hasher.check_needs_rehash(hashed)
+
+
+HASHERS = {
+    hasher.name: hasher
+    for hasher in (Sha256Hasher, BcryptHasher, Argon2Hasher)
+}
+_instances: Dict[str, object] = {}
+
+
+def get_hasher(name: str = None):
+    """Return the hasher of a scheme, PASSWORD_HASHER by default.
+    """
+    name = name or PASSWORD_HASHER
+    if name not in _instances:
+        if name not in HASHERS:
+            raise ValueError("Unknown password hasher {}".format(name))
+        _instances[name] = HASHERS[name]()
+    return _instances[name]
+
+
+def identify(hashed: str):
+    """Return the hasher of a stored hash, or None if unknown.
+    """
+    for name, hasher_class in HASHERS.items():
+        if hasher_class.identify(hashed):
+            return get_hasher(name)
+    return None
+
+
+class VerifiedCache:
+    """Bounded, short-lived cache of successful password checks.
+    """
+
+    def __init__(self, ttl: float = PASSWORD_CACHE_TTL,
+                 max_size: int = PASSWORD_CACHE_SIZE) -> None:
+        """Initialize a new VerifiedCache instance.
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self._key = os.urandom(32)
+        self._entries: 'OrderedDict[bytes, Tuple[str, float]]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def _digest(self, user_id: str, password: str) -> bytes:
+        """Key an entry by an HMAC of the user id and password.
+        """
+        message = '{}\0{}'.format(user_id, password).encode()
+        return hmac.new(self._key, message, hashlib.sha256).digest()
+
+    def get(self, user_id: str, password: str, hashed: str) -> bool:
+        """Whether this password was recently checked against `hashed`.
+        """
+        if self.ttl <= 0:
+            return False
+        entry = self._entries.get(self._digest(user_id, password))
+        if entry is None:
+            return False
+        return hmac.compare_digest(entry[0], hashed) and \
+            entry[1] > time.monotonic()
+
+    def add(self, user_id: str, password: str, hashed: str) -> None:
+        """Remember a successful check.
+        """
+        if self.ttl <= 0:
+            return
+        digest = self._digest(user_id, password)
+        with self._lock:
+            self._entries[digest] = (hashed, time.monotonic() + self.ttl)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+verified_cache = VerifiedCache()
+
+
+def hash_password(password: str) -> str:
+    """Hash a new password with the configured scheme.
+    """
+    return get_hasher().hash(password)
+
+
+def verify_password(user_id: str, password: str,
+                    hashed: str) -> Tuple[bool, Optional[str]]:
+    """Check a password against a stored hash of any scheme.
+    Returns whether it matches and, when the stored hash should be
+    upgraded to the configured scheme, the new hash to store. Hashes are
+    never migrated to the legacy sha256 scheme, and sha256 checks are
+    cheaper than the cache, so they skip it.
+    """
+    hasher = identify(hashed)
+    if hasher is None:
+        return False, None
+    cached = hasher.name != 'sha256'
+    if cached and verified_cache.get(user_id, password, hashed):
+        return True, None
+    if not hasher.verify(password, hashed):
+        return False, None
+    upgraded = None
+    current = get_hasher()
+    if current.name != 'sha256' and \
+            (hasher is not current or current.needs_update(hashed)):
+        upgraded = hashed = current.hash(password)
+        cached = True
+    if cached:
+        verified_cache.add(user_id, password, hashed)
+    return True, upgraded
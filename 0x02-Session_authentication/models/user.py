@@ -1,13 +1,35 @@
 #!/usr/bin/env python3
 """User module.
 """
-import hashlib
+from typing import Callable, Dict, List
+
 from models.base import Base
+from models.password import hash_password, verify_password
+
+
+def _email_domain(user: 'User') -> str:
+    """Return the domain part of a user's email, or "" if it has none,
+    so that every stat key is a string JSON encoders accept.
+    """
+    if type(user.email) is not str:
+        return ""
+    return user.email.rpartition('@')[2].lower()
 
 
 class User(Base):
     """User class.
+
+    REVOKE_HOOKS are called with the id of a user when it is removed or
+    saved with another password hash than the one it had, so that the API
+    can destroy its sessions. A new password that is never saved revokes
+    nothing. _saved_passwords keeps, by user id, the hash a user had
+    before its password was last set, until it is saved.
     """
+    STATS_KEYS = {'email_domain': _email_domain}
+    LOOKUP_KEYS = ('email',)
+    INDEX_KEYS = ('created_at', 'updated_at', 'email')
+    REVOKE_HOOKS: List[Callable[[str], object]] = []
+    _saved_passwords: Dict[str, str] = {}
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initialize a User instance.
@@ -26,25 +48,51 @@ class User(Base):
 
     @password.setter
     def password(self, pwd: str):
-        """Setter of a new password: encrypt in SHA256.
-
-        WARNING: Use a better password hashing algorithm like argon2
-        or bcrypt in real-world projects.
+        """Setter of a new password: hash it with the configured
+        scheme (see models.password).
         """
+        if self._password is not None:
+            self._saved_passwords.setdefault(self.id, self._password)
         if pwd is None or type(pwd) is not str:
             self._password = None
         else:
-            self._password = hashlib.sha256(pwd.encode()).hexdigest().lower()
+            self._password = hash_password(pwd)
+
+    def save(self):
+        """Save the user, revoking its sessions if its password hash was
+        replaced since it was last saved.
+        """
+        saved_password = self._saved_passwords.pop(self.id, None)
+        super().save()
+        if saved_password is not None and saved_password != self._password:
+            self.revoke()
+
+    def revoke(self):
+        """Call the REVOKE_HOOKS for this user.
+        """
+        for hook in self.REVOKE_HOOKS:
+            hook(self.id)
+
+    def remove(self):
+        """Remove the user and revoke what was granted to it.
+        """
+        self._saved_passwords.pop(self.id, None)
+        super().remove()
+        self.revoke()
 
     def is_valid_password(self, pwd: str) -> bool:
-        """Validate a password.
+        """Validate a password, upgrading a stored hash of another
+        scheme than the configured one once the password matched.
         """
         if pwd is None or type(pwd) is not str:
             return False
         if self.password is None:
             return False
-        pwd_e = pwd.encode()
-        return hashlib.sha256(pwd_e).hexdigest().lower() == self.password
+        valid, upgraded = verify_password(self.id, pwd, self.password)
+        if upgraded is not None:
+            self._password = upgraded
+            self.save()
+        return valid
 
     def display_name(self) -> str:
         """Display User name based on email/first_name/last_name.
@@ -1,12 +1,31 @@
 #!/usr/bin/env python3
 """User session module.
 """
+import os
+from datetime import datetime, timedelta
+
 from models.base import Base
 
 
+def _seconds(name: str) -> int:
+    """Return a duration in seconds from the environment, 0 if unset.
+    """
+    try:
+        return int(os.getenv(name, '0'))
+    except ValueError:
+        return 0
+
+
+SESSION_DURATION = _seconds('SESSION_DURATION')
+SESSION_IDLE_DURATION = _seconds('SESSION_IDLE_DURATION')
+
+
 class UserSession(Base):
     """User session class.
     """
+    STATS_KEYS = {'user_id': lambda user_session: user_session.user_id}
+    LOOKUP_KEYS = ('session_id',)
+    INDEX_KEYS = ('created_at', 'user_id')
 
     def __init__(self, *args: list, **kwargs: dict):
         """Initializes a User session instance.
@@ -14,3 +33,18 @@ class UserSession(Base):
         super().__init__(*args, **kwargs)
         self.user_id = kwargs.get('user_id')
         self.session_id = kwargs.get('session_id')
+
+    @classmethod
+    def load_filters(cls) -> dict:
+        """Only load the sessions SessionDBAuth would still accept given
+        SESSION_DURATION and SESSION_IDLE_DURATION; without either, all
+        of them.
+        """
+        filters = {}
+        if SESSION_DURATION > 0:
+            filters['created_at__gte'] = \
+                datetime.utcnow() - timedelta(seconds=SESSION_DURATION)
+        if SESSION_IDLE_DURATION > 0:
+            filters['updated_at__gte'] = \
+                datetime.utcnow() - timedelta(seconds=SESSION_IDLE_DURATION)
+        return filters
@@ -9,18 +9,54 @@ Routes:
     - GET /profile: Returns the user's profile information.
     - POST /reset_password: Handles requesting a password reset.
     - PUT /reset_password: Handles updating a user's password.
+    - GET /metrics: Returns latency metrics, if METRICS_ENABLED is set.
+
+Password hashing runs on a bounded executor (see `hasher`); when it is
+saturated the hashing routes answer 503 with a `Retry-After` header so
+that a login storm cannot starve the other endpoints.
 
 """
 
-from flask import Flask, jsonify, request, abort, redirect
+from flask import Flask, Response, jsonify, request, abort, redirect
+import auth
+import json_provider
+import metrics
 from auth import Auth
+from db import DB
+from hasher import HashQueueFull
+from rate_limit import login_limiter
 
 # Initialize the Flask app
 app = Flask(__name__)
+json_provider.init_app(app)
 
 # Create an instance of the Auth class
 AUTH = Auth()
 
+# Time requests, database lookups and bcrypt calls if metrics are enabled
+metrics.init_app(app)
+metrics.instrument(DB, "find_user_by", "db.find_user_by")
+metrics.instrument(DB, "update_user", "db.update_user")
+metrics.instrument(auth, "_hash_password", "bcrypt.hashpw")
+metrics.instrument(auth, "_check_password", "bcrypt.checkpw")
+
+
+@app.teardown_request
+def remove_db_session(error: Exception = None) -> None:
+    """Releases the request thread's database session."""
+    AUTH._db.remove_session()
+
+
+@app.errorhandler(HashQueueFull)
+def hash_queue_full(error: HashQueueFull) -> str:
+    """Handles a saturated password hashing queue.
+    Returns:
+        The service unavailable payload with a `Retry-After` header.
+    """
+    response = jsonify({"message": "service busy, retry later"})
+    response.headers["Retry-After"] = str(error.retry_after)
+    return response, 503
+
 
 @app.route("/", methods=["GET"], strict_slashes=False)
 def index() -> str:
@@ -49,9 +85,15 @@ def users() -> str:
 def login() -> str:
     """POST /sessions
     Returns:
-        The account login payload.
+        The account login payload, or 429 with a `Retry-After` header if
+        too many attempts came from the client or for the email.
     """
     email, password = request.form.get("email"), request.form.get("password")
+    allowed, retry_after = login_limiter.check(request.remote_addr, email)
+    if not allowed:
+        response = jsonify({"message": "too many login attempts"})
+        response.headers["Retry-After"] = str(retry_after)
+        return response, 429
     if not AUTH.valid_login(email, password):
         abort(401)
     session_id = AUTH.create_session(email)
@@ -124,6 +166,32 @@ def update_password() -> str:
     return jsonify({"email": email, "message": "Password updated"})
 
 
+@app.route("/metrics", methods=["GET"], strict_slashes=False)
+def metrics_endpoint() -> Response:
+    """GET /metrics
+    Returns:
+        Request and operation latencies in the Prometheus text format,
+        403 without the `METRICS_TOKEN` bearer token.
+    """
+    if not metrics.METRICS_ENABLED:
+        abort(404)
+    if not metrics.is_authorized(request.headers.get("Authorization")):
+        abort(403)
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def warm_up() -> None:
+    """Builds the lazily built state before workers are forked from this
+    process (see `prefork`).
+    """
+    AUTH.warm_up()
+
+
+def post_fork() -> None:
+    """Reopens what a forked worker cannot share with its parent."""
+    AUTH.after_fork()
+
+
 if __name__ == "__main__":
     # Run the app on 0.0.0.0:5000
     app.run(host="0.0.0.0", port="5000")
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""An ASGI app with user authentication features.
+This module exposes the same routes as `app.py`, backed by `AsyncAuth`
+so that database calls and bcrypt never block the event loop. It has no
+framework dependency; serve it with any ASGI server, e.g.:
+
+    uvicorn asgi_app:app --host 0.0.0.0 --port 5000
+
+Routes:
+    - GET /: Returns the home page's payload.
+    - POST /users: Handles account creation.
+    - POST /sessions: Handles account login.
+    - DELETE /sessions: Handles account logout.
+    - GET /profile: Returns the user's profile information.
+    - POST /reset_password: Handles requesting a password reset.
+    - PUT /reset_password: Handles updating a user's password.
+
+"""
+
+import asyncio
+import json
+from http import HTTPStatus
+from http.cookies import SimpleCookie
+from typing import Awaitable, Callable, Dict, List, Tuple
+from urllib.parse import parse_qsl
+
+from async_auth import AsyncAuth
+from hasher import HashQueueFull
+from rate_limit import RedisBackend, login_limiter
+
+# Create an instance of the AsyncAuth class
+AUTH = AsyncAuth()
+
+Headers = List[Tuple[bytes, bytes]]
+
+
+class Request:
+    """The parts of an HTTP request used by the routes.
+    """
+
+    def __init__(self, scope: dict, body: bytes) -> None:
+        """Initializes a new Request instance."""
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.remote_addr = (scope.get("client") or (None,))[0]
+        self.form = {}
+        self.cookies = {}
+        content_type = b""
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                cookie = SimpleCookie(value.decode("latin-1"))
+                for key, morsel in cookie.items():
+                    self.cookies[key] = morsel.value
+            elif name == b"content-type":
+                content_type = value
+        if content_type.startswith(b"application/x-www-form-urlencoded"):
+            self.form = dict(parse_qsl(body.decode("utf-8")))
+
+
+class Response:
+    """An HTTP response produced by the routes.
+    """
+
+    def __init__(
+            self, body: bytes, status: int = 200,
+            content_type: bytes = b"application/json",
+            ) -> None:
+        """Initializes a new Response instance."""
+        self.body = body
+        self.status = status
+        self.headers = [(b"content-type", content_type)]
+
+    def set_cookie(self, key: str, value: str) -> None:
+        """Adds a `Set-Cookie` header, like Flask's `set_cookie`."""
+        cookie = "{}={}; Path=/".format(key, value)
+        self.headers.append((b"set-cookie", cookie.encode("latin-1")))
+
+
+def jsonify(payload: dict, status: int = 200) -> Response:
+    """Builds a JSON response."""
+    return Response(json.dumps(payload).encode("utf-8"), status)
+
+
+def abort(status: int) -> Response:
+    """Builds an error response, like Flask's default error pages."""
+    phrase = HTTPStatus(status).phrase
+    body = "<!doctype html>\n<title>{} {}</title>\n<h1>{}</h1>\n".format(
+        status, phrase, phrase)
+    return Response(body.encode("utf-8"), status, b"text/html")
+
+
+def redirect(location: str) -> Response:
+    """Builds a redirect response."""
+    response = abort(302)
+    response.headers.append((b"location", location.encode("latin-1")))
+    return response
+
+
+async def index(request: Request) -> Response:
+    """GET /
+    Returns:
+        The home page's payload.
+    """
+    return jsonify({"message": "Bienvenue"})
+
+
+async def users(request: Request) -> Response:
+    """POST /users
+    Returns:
+        The account creation payload.
+    """
+    email, password = request.form.get("email"), request.form.get("password")
+    try:
+        await AUTH.register_user(email, password)
+        return jsonify({"email": email, "message": "user created"})
+    except ValueError:
+        return jsonify({"message": "email already registered"}, 400)
+
+
+async def login(request: Request) -> Response:
+    """POST /sessions
+    Returns:
+        The account login payload, or 429 with a `Retry-After` header if
+        too many attempts came from the client or for the email.
+    """
+    email, password = request.form.get("email"), request.form.get("password")
+    if isinstance(login_limiter.backend, RedisBackend):
+        # A round trip to Redis must not block the event loop.
+        allowed, retry_after = await asyncio.to_thread(
+            login_limiter.check, request.remote_addr, email)
+    else:
+        allowed, retry_after = login_limiter.check(
+            request.remote_addr, email)
+    if not allowed:
+        response = jsonify({"message": "too many login attempts"}, 429)
+        response.headers.append(
+            (b"retry-after", str(retry_after).encode("latin-1")))
+        return response
+    if not await AUTH.valid_login(email, password):
+        return abort(401)
+    session_id = await AUTH.create_session(email)
+    response = jsonify({"email": email, "message": "logged in"})
+    response.set_cookie("session_id", session_id)
+    return response
+
+
+async def logout(request: Request) -> Response:
+    """DELETE /sessions
+    Returns:
+        Redirects to home route.
+    """
+    session_id = request.cookies.get("session_id")
+    user = await AUTH.get_user_from_session_id(session_id)
+    if user is None:
+        return abort(403)
+    await AUTH.destroy_session(user.id)
+    return redirect("/")
+
+
+async def profile(request: Request) -> Response:
+    """GET /profile
+    Returns:
+        The user's profile information.
+    """
+    session_id = request.cookies.get("session_id")
+    user = await AUTH.get_user_from_session_id(session_id)
+    if user is None:
+        return abort(403)
+    return jsonify({"email": user.email})
+
+
+async def get_reset_password_token(request: Request) -> Response:
+    """POST /reset_password
+    Returns:
+        The user's password reset payload.
+    """
+    email = request.form.get("email")
+    try:
+        reset_token = await AUTH.get_reset_password_token(email)
+    except ValueError:
+        return abort(403)
+    return jsonify({"email": email, "reset_token": reset_token})
+
+
+async def update_password(request: Request) -> Response:
+    """PUT /reset_password
+    Returns:
+        The user's password updated payload.
+    """
+    email = request.form.get("email")
+    reset_token = request.form.get("reset_token")
+    new_password = request.form.get("new_password")
+    try:
+        await AUTH.update_password(reset_token, new_password)
+    except ValueError:
+        return abort(403)
+    return jsonify({"email": email, "message": "Password updated"})
+
+
+ROUTES: Dict[Tuple[str, str], Callable[[Request], Awaitable[Response]]] = {
+    ("GET", "/"): index,
+    ("POST", "/users"): users,
+    ("POST", "/sessions"): login,
+    ("DELETE", "/sessions"): logout,
+    ("GET", "/profile"): profile,
+    ("POST", "/reset_password"): get_reset_password_token,
+    ("PUT", "/reset_password"): update_password,
+}
+
+
+async def dispatch(request: Request) -> Response:
+    """Routes a request to its handler, ignoring trailing slashes."""
+    path = request.path.rstrip("/") or "/"
+    handler = ROUTES.get((request.method, path))
+    if handler is None:
+        methods = [m for m, p in ROUTES if p == path]
+        return abort(405 if methods else 404)
+    try:
+        return await handler(request)
+    except HashQueueFull as error:
+        response = jsonify({"message": "service busy, retry later"}, 503)
+        response.headers.append(
+            (b"retry-after", str(error.retry_after).encode("latin-1")))
+        return response
+
+
+async def lifespan(receive: Callable, send: Callable) -> None:
+    """Handles the ASGI lifespan protocol."""
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await AUTH._db.setup()
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await AUTH._db.dispose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope: dict, receive: Callable, send: Callable) -> None:
+    """The ASGI application callable."""
+    if scope["type"] == "lifespan":
+        await lifespan(receive, send)
+        return
+    if scope["type"] != "http":
+        return
+    body, more_body = b"", True
+    while more_body:
+        message = await receive()
+        body += message.get("body", b"")
+        more_body = message.get("more_body", False)
+    response = await dispatch(Request(scope, body))
+    await send({
+        "type": "http.response.start",
+        "status": response.status,
+        "headers": response.headers,
+    })
+    await send({"type": "http.response.body", "body": response.body})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Run the app on 0.0.0.0:5000
+    uvicorn.run(app, host="0.0.0.0", port=5000)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""A module for asynchronous authentication-related routines.
+
+This module mirrors `auth.Auth` for the ASGI app: every database call
+goes through `AsyncDB` and every bcrypt call is offloaded to the bounded
+`PasswordHasher` executor, so the event loop never blocks on either.
+The semantics of each method are the same as in `auth.Auth`.
+
+Classes and Functions:
+    - AsyncAuth: Async Auth class for the authentication database.
+
+"""
+
+import asyncio
+from typing import Any, Callable, Union
+from sqlalchemy.orm.exc import NoResultFound
+
+from async_db import AsyncDB
+from auth import _check_password, _generate_uuid, _hash_password
+from hasher import PasswordHasher
+from user import User
+
+
+class AsyncAuth:
+    """Async Auth class to interact with the authentication database.
+    Attributes:
+        _db (AsyncDB): An instance of the async database interface.
+        _hasher (PasswordHasher): The bounded executor running bcrypt.
+    Methods:
+        - register_user: Adds a new user to the database.
+        - valid_login: Checks if a user's login details are valid.
+        - create_session: Creates a new session for a user.
+        - get_user_from_session_id: Retrieves a user based on given session ID
+        - destroy_session: Destroys a session associated with a given user.
+        - get_reset_password_token: Generates a password reset token for a user
+        - update_password: Updates user's password given the user's reset token
+
+    """
+
+    def __init__(self, db: AsyncDB = None, hasher: PasswordHasher = None):
+        """Initializes a new AsyncAuth instance.
+        Args:
+            db (AsyncDB): The async database interface.
+            hasher (PasswordHasher): The executor running bcrypt calls.
+        """
+        self._db = db if db is not None else AsyncDB()
+        self._hasher = hasher if hasher is not None else PasswordHasher()
+
+    async def _run_hash(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs a bcrypt call on the hasher without blocking the loop.
+        Raises:
+            HashQueueFull: If the password hashing queue is saturated.
+        """
+        return await asyncio.wrap_future(self._hasher.submit(fn, *args))
+
+    async def register_user(self, email: str, password: str) -> User:
+        """Adds a new user to the database.
+        Args:
+            email (str): The user's email.
+            password (str): The user's plaintext password.
+        Returns:
+            User: The newly registered user.
+        Raises:
+            ValueError: If the user already exists.
+            HashQueueFull: If the password hashing queue is saturated.
+        """
+        try:
+            await self._db.find_user_by(email=email)
+        except NoResultFound:
+            hashed_password = await self._run_hash(_hash_password, password)
+            return await self._db.add_user(email, hashed_password)
+        raise ValueError("User {} already exists".format(email))
+
+    async def valid_login(self, email: str, password: str) -> bool:
+        """Checks if a user's login details are valid.
+        Args:
+            email (str): The user's email.
+            password (str): The user's plaintext password.
+        Returns:
+            bool: True if the login details are valid, False otherwise.
+        Raises:
+            HashQueueFull: If the password hashing queue is saturated.
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            return False
+        return await self._run_hash(
+            _check_password,
+            password,
+            user.hashed_password,
+        )
+
+    async def create_session(self, email: str) -> str:
+        """Creates a new session for a user.
+        Args:
+            email (str): The user's email.
+        Returns:
+            str: The generated session ID.
+
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            return None
+        session_id = _generate_uuid()
+        await self._db.update_user(user.id, session_id=session_id)
+        return session_id
+
+    async def get_user_from_session_id(
+            self, session_id: str) -> Union[User, None]:
+        """Retrieves a user based on a given session ID.
+        Args:
+            session_id (str): The session ID.
+        Returns:
+            Union[User, None]: The user if found, None otherwise.
+
+        """
+        if session_id is None:
+            return None
+        try:
+            return await self._db.find_user_by(session_id=session_id)
+        except NoResultFound:
+            return None
+
+    async def destroy_session(self, user_id: int) -> None:
+        """Destroys a session associated with a given user.
+        Args:
+            user_id (int): The ID of the user.
+
+        """
+        if user_id is None:
+            return None
+        await self._db.update_user(user_id, session_id=None)
+
+    async def get_reset_password_token(self, email: str) -> str:
+        """Generates a password reset token for a user.
+        Args:
+            email (str): The user's email.
+        Returns:
+            str: The generated reset token.
+        Raises:
+            ValueError: If the user does not exist.
+
+        """
+        try:
+            user = await self._db.find_user_by(email=email)
+        except NoResultFound:
+            raise ValueError()
+        reset_token = _generate_uuid()
+        await self._db.update_user(user.id, reset_token=reset_token)
+        return reset_token
+
+    async def update_password(self, reset_token: str, password: str) -> None:
+        """Updates a user's password given the user's reset token.
+        Args:
+            reset_token (str): The user's reset token.
+            password (str): The new plaintext password.
+        Raises:
+            ValueError: If the user does not exist.
+            HashQueueFull: If the password hashing queue is saturated.
+
+        """
+        try:
+            user = await self._db.find_user_by(reset_token=reset_token)
+        except NoResultFound:
+            raise ValueError()
+        new_password_hash = await self._run_hash(_hash_password, password)
+        await self._db.update_user(
+            user.id,
+            hashed_password=new_password_hash,
+            reset_token=None,
+        )
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Async DB module
+"""
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm.exc import NoResultFound
+
+from user import Base, User
+
+
+class AsyncDB:
+    """Async DB class mirroring `db.DB` on top of SQLAlchemy asyncio.
+    """
+
+    def __init__(self, url: str = "sqlite+aiosqlite:///a.db") -> None:
+        """Initialize a new AsyncDB instance.
+        """
+        self._engine = create_async_engine(url, echo=False)
+        self._sessionmaker = sessionmaker(
+            bind=self._engine,
+            class_=AsyncSession,
+            expire_on_commit=False,
+        )
+
+    async def setup(self) -> None:
+        """Reset the schema, like `DB.__init__` does for the sync app.
+        """
+        async with self._engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+
+    async def dispose(self) -> None:
+        """Close every pooled connection.
+        """
+        await self._engine.dispose()
+
+    async def add_user(self, email: str, hashed_password: str) -> User:
+        """Add a new user to the database.
+        """
+        async with self._sessionmaker() as session:
+            try:
+                new_user = User(email=email, hashed_password=hashed_password)
+                session.add(new_user)
+                await session.commit()
+            except Exception:
+                await session.rollback()
+                new_user = None
+        return new_user
+
+    async def find_user_by(self, **kwargs) -> User:
+        """Find a user in the database based on the provided query arguments.
+        """
+        fields, values = [], []
+        for key, value in kwargs.items():
+            if hasattr(User, key):
+                fields.append(getattr(User, key))
+                values.append(value)
+            else:
+                raise InvalidRequestError()
+        query = select(User).filter(tuple_(*fields).in_([tuple(values)]))
+        async with self._sessionmaker() as session:
+            result = (await session.execute(query.limit(1))).scalar()
+        if result is None:
+            raise NoResultFound()
+        return result
+
+    async def update_user(self, user_id: int, **kwargs) -> None:
+        """Update a user in the database based on the user ID.
+        """
+        await self.find_user_by(id=user_id)
+        update_source = {}
+        for key, value in kwargs.items():
+            if hasattr(User, key):
+                update_source[getattr(User, key)] = value
+            else:
+                raise ValueError()
+        async with self._sessionmaker() as session:
+            await session.execute(
+                update(User).where(User.id == user_id).values(update_source)
+                .execution_options(synchronize_session=False)
+            )
+            await session.commit()
@@ -5,22 +5,47 @@ This module provides functionality for user authentication, including
 registering users, validating logins, creating and destroying sessions,
 generating password reset tokens, and updating user passwords.
 
+Sessions are stored in the `users.session_id` column by default. Setting
+`SESSION_MODE=stateless` makes the `session_id` cookie carry a signed
+token instead (see `session_token`), which is verified without touching
+the database; logging out bumps the user's session version to revoke it.
+
+Setting `NEGATIVE_CACHE_ENABLED=1` keeps a negative cache (see
+`negative_cache`) of the known emails and session IDs, so that lookups of
+unknown ones are rejected without a query. It only sees the users and
+sessions created by its own process.
+
 Classes and Functions:
     - _hash_password: Hashes a password using bcrypt.
     - _generate_uuid: Generates a UUID.
+    - _check_password: Checks a password against a bcrypt hash.
     - Auth: Auth class for interacting with the authentication database.
 
 """
 
+import os
+import threading
+import time
 import bcrypt
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from uuid import uuid4
-from typing import Union
+from typing import Iterable, List, Tuple, Union
 from sqlalchemy.orm.exc import NoResultFound
 
 from db import DB
+from hasher import PasswordHasher
+from negative_cache import NegativeCache, NEGATIVE_CACHE_CAPACITY
+from session_token import SessionTokenSigner
 from user import User
 
 
+SESSION_MODE = os.getenv("SESSION_MODE", "db")
+SESSION_VERSION_TTL = float(os.getenv("SESSION_VERSION_TTL", "30"))
+NEGATIVE_CACHE_ENABLED = os.getenv("NEGATIVE_CACHE_ENABLED", "") == "1"
+IMPORT_CHUNK_SIZE = 500
+
+
 def _hash_password(password: str) -> bytes:
     """Hashes a password using bcrypt.
     Args:
@@ -31,6 +56,17 @@ def _hash_password(password: str) -> bytes:
     return bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
 
 
+def _check_password(password: str, hashed_password: bytes) -> bool:
+    """Checks a password against a bcrypt hash.
+    Args:
+        password (str): The plaintext password.
+        hashed_password (bytes): The stored bcrypt hash.
+    Returns:
+        bool: True if the password matches the hash, False otherwise.
+    """
+    return bcrypt.checkpw(password.encode("utf-8"), hashed_password)
+
+
 def _generate_uuid() -> str:
     """Generates a UUID.
     Returns:
@@ -43,8 +79,16 @@ class Auth:
     """Auth class to interact with the authentication database.
     Attributes:
         _db (DB): An instance of the database interface.
+        _hasher (PasswordHasher): The bounded executor running bcrypt.
+        _signer (SessionTokenSigner): The session token signer, in
+            stateless mode only.
+        _session_versions (dict): Cached session version and fetch time
+            of each user, in stateless mode only.
+        _negative_caches (dict): The negative cache of each looked up
+            column, or None when the negative cache is disabled.
     Methods:
         - register_user: Adds a new user to the database.
+        - register_users: Adds many users to the database in bulk.
         - valid_login: Checks if a user's login details are valid.
         - create_session: Creates a new session for a user.
         - get_user_from_session_id: Retrieves a user based on given session ID
@@ -54,9 +98,119 @@ class Auth:
 
     """
 
-    def __init__(self):
-        """Initializes a new Auth instance."""
-        self._db = DB()
+    def __init__(self, hasher: PasswordHasher = None,
+                 session_mode: str = SESSION_MODE, db: DB = None,
+                 negative_cache: bool = NEGATIVE_CACHE_ENABLED):
+        """Initializes a new Auth instance.
+        Args:
+            hasher (PasswordHasher): The executor running bcrypt calls.
+            session_mode (str): `db` to store session ids in the database,
+                `stateless` to issue signed session tokens.
+            db (DB): The database interface, a fresh `DB()` by default.
+            negative_cache (bool): Whether to reject unknown emails and
+                session IDs without querying the database.
+        """
+        self._db = db if db is not None else DB()
+        self._hasher = hasher if hasher is not None else PasswordHasher()
+        self._signer = None
+        self._session_versions = {}
+        self._negative_caches = {} if negative_cache else None
+        self._negative_lock = threading.Lock()
+        if session_mode == "stateless":
+            self._signer = SessionTokenSigner()
+
+    def _session_version(self, user_id: int) -> Union[int, None]:
+        """Returns a user's session version, cached for a short while.
+        Args:
+            user_id (int): The ID of the user.
+        Returns:
+            Union[int, None]: The version, or None if the user is unknown.
+        """
+        cached = self._session_versions.get(user_id)
+        now = time.monotonic()
+        if cached is not None and now - cached[1] < SESSION_VERSION_TTL:
+            return cached[0]
+        try:
+            user = self._db.find_user_by(id=user_id)
+        except NoResultFound:
+            self._session_versions.pop(user_id, None)
+            return None
+        version = user.session_version or 0
+        self._session_versions[user_id] = (version, now)
+        return version
+
+    def _negative_cache(self, column: str) -> Union[NegativeCache, None]:
+        """Returns the negative cache of a column, filling it from the
+        database on first use and whenever it gets too full.
+        Args:
+            column (str): `email` or `session_id`.
+        Returns:
+            Union[NegativeCache, None]: The cache, or None if disabled.
+        """
+        if self._negative_caches is None:
+            return None
+        cache = self._negative_caches.get(column)
+        if cache is not None and not cache.saturated:
+            return cache
+        with self._negative_lock:
+            cache = self._negative_caches.get(column)
+            if cache is None or cache.saturated:
+                values = list(self._db.column_values(column))
+                cache = NegativeCache(
+                    max(NEGATIVE_CACHE_CAPACITY, 2 * len(values)))
+                for value in values:
+                    cache.add(value)
+                self._negative_caches[column] = cache
+        return cache
+
+    def warm_up(self) -> None:
+        """Compiles the user lookups and fills the negative caches, if
+        enabled, then releases the database connection it used. Meant to
+        run before worker processes are forked.
+        """
+        for column in ("email", "session_id"):
+            self._negative_cache(column)
+            try:
+                self._db.find_user_by(**{column: ""})
+            except NoResultFound:
+                pass
+        self._db.remove_session()
+
+    def after_fork(self) -> None:
+        """Drops the database connections inherited from the parent
+        process in a forked worker.
+        """
+        self._db.after_fork()
+
+    def _remember(self, column: str, value: str) -> None:
+        """Records a value just written to a column.
+        Args:
+            column (str): `email` or `session_id`.
+            value (str): The new value.
+        """
+        if self._negative_caches is not None \
+                and column in self._negative_caches:
+            self._negative_caches[column].add(value)
+
+    def _find_user(self, column: str, value: str) -> Union[User, None]:
+        """Finds a user by email or session ID, skipping the query when
+        the negative cache knows that no user has this value.
+        Args:
+            column (str): `email` or `session_id`.
+            value (str): The value to look up.
+        Returns:
+            Union[User, None]: The user if found, None otherwise.
+        """
+        cache = self._negative_cache(column)
+        if cache is not None and not cache.might_contain(value):
+            return None
+        generation = cache.generation if cache is not None else None
+        try:
+            return self._db.find_user_by(**{column: value})
+        except NoResultFound:
+            if cache is not None:
+                cache.record_miss(value, generation)
+            return None
 
     def register_user(self, email: str, password: str) -> User:
         """Adds a new user to the database.
@@ -67,13 +221,88 @@ class Auth:
             User: The newly registered user.
         Raises:
             ValueError: If the user already exists.
+            HashQueueFull: If the password hashing queue is saturated.
         """
-        try:
-            self._db.find_user_by(email=email)
-        except NoResultFound:
-            return self._db.add_user(email, _hash_password(password))
+        if self._find_user("email", email) is None:
+            hashed_password = self._hasher.run(_hash_password, password)
+            user = self._db.add_user(email, hashed_password)
+            self._remember("email", email)
+            return user
         raise ValueError("User {} already exists".format(email))
 
+    def register_users(
+            self, credentials: Iterable[Tuple[str, str]],
+            chunk_size: int = IMPORT_CHUNK_SIZE, workers: int = None,
+            ) -> Tuple[int, List[Tuple[int, str, str]]]:
+        """Adds many users to the database in bulk.
+        The input is consumed lazily, `chunk_size` rows at a time. For each
+        chunk, taken emails are found with a single query, passwords are
+        hashed in parallel and the new users are inserted in one
+        transaction. A row that cannot be imported is reported and skipped
+        without aborting the rest of the batch.
+        Args:
+            credentials (Iterable[Tuple[str, str]]): The (email, password)
+                pairs to import.
+            chunk_size (int): The number of rows per transaction.
+            workers (int): The number of passwords hashed concurrently,
+                one per CPU by default.
+        Returns:
+            Tuple[int, List[Tuple[int, str, str]]]: The number of users
+            created and the (row number, email, reason) of each failed row.
+        """
+        created, failures, seen = 0, [], set()
+        rows = enumerate(credentials, start=1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                pending = []
+                for row, (email, password) in chunk:
+                    if not email or not password:
+                        failures.append((row, email, "email or password "
+                                         "missing"))
+                    elif type(email) is not str or type(password) is not str:
+                        failures.append((row, email, "email or password "
+                                         "is not a string"))
+                    elif email in seen:
+                        failures.append((row, email, "duplicate email"))
+                    else:
+                        seen.add(email)
+                        pending.append((row, email, password))
+                taken = self._db.find_existing_emails(
+                    email for _, email, _ in pending)
+                for row, email, _ in pending:
+                    if email in taken:
+                        failures.append((row, email, "email already "
+                                         "registered"))
+                futures = [
+                    (row, email, executor.submit(_hash_password, password))
+                    for row, email, password in pending if email not in taken
+                ]
+                hashed, users = [], []
+                for row, email, future in futures:
+                    try:
+                        users.append({"email": email,
+                                      "hashed_password": future.result()})
+                        hashed.append((row, email))
+                    except Exception as err:
+                        failures.append((row, email, str(err)))
+                try:
+                    self._db.add_users(users)
+                    created += len(users)
+                    for user in users:
+                        self._remember("email", user["email"])
+                except Exception:
+                    for (row, email), user in zip(hashed, users):
+                        if self._db.add_user(**user) is None:
+                            failures.append((row, email, "insert failed"))
+                        else:
+                            created += 1
+                            self._remember("email", email)
+        failures.sort()
+        return created, failures
+
     def valid_login(self, email: str, password: str) -> bool:
         """Checks if a user's login details are valid.
         Args:
@@ -81,17 +310,16 @@ class Auth:
             password (str): The user's plaintext password.
         Returns:
             bool: True if the login details are valid, False otherwise.
+        Raises:
+            HashQueueFull: If the password hashing queue is saturated.
         """
-        user = None
-        try:
-            user = self._db.find_user_by(email=email)
-            if user is not None:
-                return bcrypt.checkpw(
-                    password.encode("utf-8"),
-                    user.hashed_password,
-                )
-        except NoResultFound:
-            return False
+        user = self._find_user("email", email)
+        if user is not None:
+            return self._hasher.run(
+                _check_password,
+                password,
+                user.hashed_password,
+            )
         return False
 
     def create_session(self, email: str) -> str:
@@ -102,15 +330,16 @@ class Auth:
             str: The generated session ID.
 
         """
-        user = None
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            return None
+        user = self._find_user("email", email)
         if user is None:
             return None
+        if self._signer is not None:
+            version = user.session_version or 0
+            self._session_versions[user.id] = (version, time.monotonic())
+            return self._signer.sign(user.id, user.email, version)
         session_id = _generate_uuid()
         self._db.update_user(user.id, session_id=session_id)
+        self._remember("session_id", session_id)
         return session_id
 
     def get_user_from_session_id(self, session_id: str) -> Union[User, None]:
@@ -121,14 +350,16 @@ class Auth:
             Union[User, None]: The user if found, None otherwise.
 
         """
-        user = None
         if session_id is None:
             return None
-        try:
-            user = self._db.find_user_by(session_id=session_id)
-        except NoResultFound:
-            return None
-        return user
+        if self._signer is not None:
+            token = self._signer.verify(session_id)
+            if token is None:
+                return None
+            if token.version != self._session_version(token.user_id):
+                return None
+            return User(id=token.user_id, email=token.email)
+        return self._find_user("session_id", session_id)
 
     def destroy_session(self, user_id: int) -> None:
         """Destroys a session associated with a given user.
@@ -138,6 +369,14 @@ class Auth:
         """
         if user_id is None:
             return None
+        if self._signer is not None:
+            self._session_versions.pop(user_id, None)
+            version = self._session_version(user_id)
+            if version is None:
+                return None
+            self._db.update_user(user_id, session_version=version + 1)
+            self._session_versions[user_id] = (version + 1, time.monotonic())
+            return None
         self._db.update_user(user_id, session_id=None)
 
     def get_reset_password_token(self, email: str) -> str:
@@ -150,11 +389,7 @@ class Auth:
             ValueError: If the user does not exist.
 
         """
-        user = None
-        try:
-            user = self._db.find_user_by(email=email)
-        except NoResultFound:
-            user = None
+        user = self._find_user("email", email)
         if user is None:
             raise ValueError()
         reset_token = _generate_uuid()
@@ -168,6 +403,7 @@ class Auth:
             password (str): The new plaintext password.
         Raises:
             ValueError: If the user does not exist.
+            HashQueueFull: If the password hashing queue is saturated.
 
         """
         user = None
@@ -177,7 +413,7 @@ class Auth:
             user = None
         if user is None:
             raise ValueError()
-        new_password_hash = _hash_password(password)
+        new_password_hash = self._hasher.run(_hash_password, password)
         self._db.update_user(
             user.id,
             hashed_password=new_password_hash,
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Side-by-side load benchmark of the WSGI and ASGI apps.
+
+This script starts `app.py` (Flask's threaded server) and `asgi_app.py`
+(uvicorn) one after the other on a local port, in a scratch directory so
+that neither touches the working copy's `a.db`. It then drives each one
+with many concurrent keep-alive clients and reports requests per second
+and latency percentiles for the chosen scenario.
+
+Requirements:
+    - uvicorn must be installed to serve the ASGI app:
+      `pip install uvicorn aiosqlite`
+
+Usage:
+    ./bench_asgi.py --concurrency 128 --duration 10 --scenario profile
+
+Scenarios:
+    - profile: GET /profile with a valid session cookie (DB read).
+    - login: POST /sessions with valid credentials (bcrypt + DB write).
+
+Both apps get the same login rate limits, off by default: every client
+logs in as one user from 127.0.0.1. Set them with `--login-rate-limit-ip`
+and `--login-rate-limit-email` to measure the limiter.
+
+"""
+
+import argparse
+import http.client
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+from urllib.parse import urlencode
+
+
+EMAIL = "bench@holberton.io"
+PASSWD = "b4l0u"
+HERE = os.path.dirname(os.path.abspath(__file__))
+SERVERS = {
+    "wsgi": [
+        sys.executable, "-c",
+        "import sys; from app import app; "
+        "app.run(host='127.0.0.1', port=int(sys.argv[1]), threaded=True)",
+    ],
+    "asgi": [
+        sys.executable, "-m", "uvicorn", "asgi_app:app",
+        "--host", "127.0.0.1", "--log-level", "warning", "--port",
+    ],
+}
+
+
+def start_server(
+        kind: str, port: int, workdir: str, limits: dict,
+        ) -> subprocess.Popen:
+    """Starts a server and waits until it accepts connections."""
+    env = dict(os.environ, PYTHONPATH=HERE, **limits)
+    proc = subprocess.Popen(
+        SERVERS[kind] + [str(port)], cwd=workdir, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/")
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("{} server did not start".format(kind))
+
+
+def request(conn: http.client.HTTPConnection, method: str, path: str,
+            form: dict = None, cookie: str = None) -> http.client.HTTPResponse:
+    """Sends one request on a keep-alive connection."""
+    headers = {}
+    body = None
+    if form is not None:
+        body = urlencode(form)
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    if cookie is not None:
+        headers["Cookie"] = "session_id={}".format(cookie)
+    conn.request(method, path, body=body, headers=headers)
+    res = conn.getresponse()
+    res.read()
+    return res
+
+
+def prepare(port: int) -> str:
+    """Registers the benchmark user and returns a session id."""
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    form = {"email": EMAIL, "password": PASSWD}
+    request(conn, "POST", "/users", form)
+    res = request(conn, "POST", "/sessions", form)
+    cookie = res.getheader("Set-Cookie", "")
+    conn.close()
+    return cookie.split(";")[0].partition("=")[2]
+
+
+def run_load(port: int, scenario: str, session_id: str,
+             concurrency: int, duration: float) -> dict:
+    """Drives the server with concurrent clients for `duration` seconds."""
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                if scenario == "login":
+                    res = request(conn, "POST", "/sessions",
+                                  {"email": EMAIL, "password": PASSWD})
+                else:
+                    res = request(conn, "GET", "/profile", cookie=session_id)
+                ok = res.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port,
+                                                  timeout=30)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                failed += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    began = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - began
+    latencies.sort()
+
+    def pct(p):
+        if not latencies:
+            return float("nan")
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": pct(0.50) * 1000,
+        "p99_ms": pct(0.99) * 1000,
+    }
+
+
+def main() -> None:
+    """Runs the benchmark against both apps and prints a table."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--scenario", choices=("profile", "login"),
+                        default="profile")
+    parser.add_argument("--port", type=int, default=5077)
+    parser.add_argument("--servers", nargs="+", choices=tuple(SERVERS),
+                        default=list(SERVERS))
+    parser.add_argument("--login-rate-limit-ip", type=int, default=0)
+    parser.add_argument("--login-rate-limit-email", type=int, default=0)
+    args = parser.parse_args()
+    limits = {
+        "LOGIN_RATE_LIMIT_IP": str(args.login_rate_limit_ip),
+        "LOGIN_RATE_LIMIT_EMAIL": str(args.login_rate_limit_email),
+    }
+    print("scenario={} concurrency={} duration={}s".format(
+        args.scenario, args.concurrency, args.duration))
+    print("{:<6}{:>10}{:>8}{:>10}{:>10}{:>10}".format(
+        "app", "requests", "errors", "req/s", "p50 ms", "p99 ms"))
+    for kind in args.servers:
+        with tempfile.TemporaryDirectory() as workdir:
+            proc = start_server(kind, args.port, workdir, limits)
+            try:
+                session_id = prepare(args.port)
+                result = run_load(args.port, args.scenario, session_id,
+                                  args.concurrency, args.duration)
+            finally:
+                proc.terminate()
+                proc.wait()
+        print("{:<6}{:>10}{:>8}{:>10.1f}{:>10.2f}{:>10.2f}".format(
+            kind, result["requests"], result["errors"], result["rps"],
+            result["p50_ms"], result["p99_ms"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 """DB module
 """
-from sqlalchemy import create_engine, tuple_
+from typing import Iterable, Iterator, List, Set
+from sqlalchemy import create_engine, insert, select, tuple_
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import scoped_session, sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
 from sqlalchemy.orm.session import Session
 
@@ -15,22 +16,38 @@ class DB:
     """DB class.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, reset: bool = True) -> None:
         """Initialize a new DB instance.
         """
         self._engine = create_engine("sqlite:///a.db", echo=False)
-        Base.metadata.drop_all(self._engine)
+        if reset:
+            Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
         self.__session = None
 
     @property
     def _session(self) -> Session:
-        """Memoized session object.
+        """Memoized session object, one per thread so that a threaded
+        server never shares a session between concurrent requests.
         """
         if self.__session is None:
             DBSession = sessionmaker(bind=self._engine)
-            self.__session = DBSession()
-        return self.__session
+            self.__session = scoped_session(DBSession)
+        return self.__session()
+
+    def remove_session(self) -> None:
+        """Close the calling thread's session and release its connection.
+        """
+        if self.__session is not None:
+            self.__session.remove()
+
+    def after_fork(self) -> None:
+        """Drop the sessions and pooled connections inherited from the
+        parent process, without closing them, so that a forked worker
+        opens connections of its own.
+        """
+        self.__session = None
+        self._engine.dispose(close=False)
 
     def add_user(self, email: str, hashed_password: str) -> User:
         """Add a new user to the database.
@@ -44,6 +61,39 @@ class DB:
             new_user = None
         return new_user
 
+    def add_users(self, users: List[dict]) -> None:
+        """Add many users to the database in a single transaction.
+        Each item holds the `email` and `hashed_password` of a new user.
+        The whole batch is rolled back if any insert fails.
+        """
+        if not users:
+            return
+        try:
+            self._session.execute(insert(User), users)
+            self._session.commit()
+        except Exception:
+            self._session.rollback()
+            raise
+
+    def find_existing_emails(self, emails: Iterable[str]) -> Set[str]:
+        """Return the subset of the given emails that are already taken.
+        """
+        emails = list(emails)
+        if not emails:
+            return set()
+        query = select(User.email).where(User.email.in_(emails))
+        return set(self._session.execute(query).scalars())
+
+    def column_values(self, column: str) -> Iterator[str]:
+        """Yield the non-null values of a users column.
+        """
+        field = getattr(User, column, None)
+        if field is None:
+            raise InvalidRequestError()
+        query = select(field).where(field.isnot(None))
+        for batch in self._session.execute(query).scalars().partitions(1000):
+            yield from batch
+
     def find_user_by(self, **kwargs) -> User:
         """Find a user in the database based on the provided query arguments.
         """
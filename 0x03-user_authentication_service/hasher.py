@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""A module for running password hashing off the request thread.
+
+bcrypt is deliberately slow, so a burst of logins or registrations can
+occupy every worker thread of the app while cheap routes such as
+`/profile` wait behind them. This module provides a bounded executor
+with its own concurrency limit and admission control: once the number
+of running and queued hashes reaches the configured capacity, new
+submissions are rejected instead of piling up.
+
+Classes and Functions:
+    - HashQueueFull: Raised when the hashing queue is saturated.
+    - PasswordHasher: Bounded executor for password hashing calls.
+
+"""
+
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "32"))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+
+
+class HashQueueFull(Exception):
+    """Raised when the password hashing queue is saturated.
+    Attributes:
+        retry_after (int): Seconds the client should wait before retrying.
+    """
+
+    def __init__(self, retry_after: int = HASH_RETRY_AFTER):
+        """Initializes a new HashQueueFull instance."""
+        super().__init__("password hashing queue is full")
+        self.retry_after = retry_after
+
+
+class PasswordHasher:
+    """Bounded executor for password hashing calls.
+    Attributes:
+        workers (int): The number of hashes computed concurrently.
+        queue_size (int): The number of hashes allowed to wait for a worker.
+    Methods:
+        - submit: Schedules a hashing call and returns its future.
+        - run: Runs a hashing call and waits for its result.
+        - shutdown: Stops the underlying worker threads.
+
+    """
+
+    def __init__(
+            self, workers: int = HASH_WORKERS,
+            queue_size: int = HASH_QUEUE_SIZE,
+            ) -> None:
+        """Initializes a new PasswordHasher instance.
+        Args:
+            workers (int): The number of hashes computed concurrently.
+            queue_size (int): The number of hashes allowed to wait.
+        """
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="password-hasher",
+        )
+        self._slots = threading.BoundedSemaphore(
+            self.workers + self.queue_size,
+        )
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Schedules a hashing call on the executor.
+        Args:
+            fn (Callable): The hashing function, e.g. `bcrypt.checkpw`.
+            *args: The arguments passed to `fn`.
+        Returns:
+            Future: The future holding the call's result.
+        Raises:
+            HashQueueFull: If the executor is already at capacity.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise HashQueueFull()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Runs a hashing call on the executor and waits for its result.
+        Args:
+            fn (Callable): The hashing function, e.g. `bcrypt.hashpw`.
+            *args: The arguments passed to `fn`.
+        Returns:
+            Any: The value returned by `fn`.
+        Raises:
+            HashQueueFull: If the executor is already at capacity.
+        """
+        return self.submit(fn, *args).result()
+
+    def shutdown(self) -> None:
+        """Stops the underlying worker threads."""
+        self._executor.shutdown(wait=True)
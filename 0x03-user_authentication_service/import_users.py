@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""Bulk user import for the authentication service.
+
+This script streams (email, password) rows from a CSV or JSONL file into
+the `users` table through `Auth.register_users`: passwords are hashed in
+parallel and the rows are inserted in chunked transactions. Rows that
+cannot be imported (missing fields, duplicate or already registered
+emails) are reported without aborting the import.
+
+Input formats:
+    - CSV with a header row containing `email` and `password` columns.
+    - JSONL with one `{"email": ..., "password": ...}` object per line.
+
+Usage:
+    ./import_users.py users.csv
+    ./import_users.py users.jsonl --chunk-size 1000 --workers 8
+
+"""
+
+import argparse
+import csv
+import json
+import sys
+from typing import Iterator, Tuple
+
+from auth import IMPORT_CHUNK_SIZE, Auth
+from db import DB
+
+
+def read_csv(path: str) -> Iterator[Tuple[str, str]]:
+    """Yields the (email, password) pairs of a CSV file."""
+    with open(path, newline="") as f:
+        for record in csv.DictReader(f):
+            yield record.get("email"), record.get("password")
+
+
+def read_jsonl(path: str) -> Iterator[Tuple[str, str]]:
+    """Yields the (email, password) pairs of a JSONL file."""
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                record = None
+            if not isinstance(record, dict):
+                yield None, None
+                continue
+            yield record.get("email"), record.get("password")
+
+
+def main() -> int:
+    """Imports the users of the given file.
+    Returns:
+        int: 0 if every row was imported, 1 otherwise.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="CSV or JSONL file of users")
+    parser.add_argument("--format", choices=("csv", "jsonl"),
+                        help="input format, guessed from the extension")
+    parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="passwords hashed concurrently")
+    args = parser.parse_args()
+    fmt = args.format
+    if fmt is None:
+        fmt = "jsonl" if args.path.endswith((".jsonl", ".ndjson")) else "csv"
+    rows = read_jsonl(args.path) if fmt == "jsonl" else read_csv(args.path)
+    auth = Auth(db=DB(reset=False))
+    created, failures = auth.register_users(
+        rows, chunk_size=args.chunk_size, workers=args.workers)
+    for row, email, reason in failures:
+        print("row {} ({}): {}".format(row, email, reason), file=sys.stderr)
+    print("{} users created, {} rows failed".format(created, len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
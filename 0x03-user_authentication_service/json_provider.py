@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""A module for a pluggable JSON provider.
+
+`jsonify` is served by orjson when it is installed and by the standard
+library otherwise; the `JSON_ENCODER` environment variable (`orjson` or
+`json`) forces one. Keys are sorted, as Flask's own provider does,
+unless the app sets `app.json.sort_keys` to False. Flask versions older
+than 2.2 have no JSON provider API and keep their default encoder.
+
+Classes and Functions:
+    - dumps: Serializes an object to JSON bytes.
+    - init_app: Installs the provider on a Flask app.
+
+"""
+
+import json
+import os
+from typing import Any
+
+from flask import Flask
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from flask.json.provider import DefaultJSONProvider
+except ImportError:
+    DefaultJSONProvider = None
+
+
+JSON_ENCODER = os.getenv(
+    "JSON_ENCODER", "orjson" if orjson is not None else "json")
+
+
+def dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serializes an object to JSON bytes.
+    Args:
+        obj (Any): The object to serialize.
+        sort_keys (bool): Whether to sort the keys of the JSON objects.
+    Returns:
+        bytes: The JSON document.
+    """
+    if JSON_ENCODER == "orjson" and orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_SORT_KEYS if sort_keys else None)
+    return json.dumps(
+        obj, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+if DefaultJSONProvider is not None:
+    class FastJSONProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by `dumps`.
+        """
+
+        def dumps(self, obj: Any, **kwargs: Any) -> str:
+            """Serializes data as JSON text."""
+            return dumps(obj, self.sort_keys).decode("utf-8")
+
+        def response(self, *args: Any, **kwargs: Any):
+            """Serializes the jsonify arguments into a response."""
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(
+                dumps(obj, self.sort_keys) + b"\n", mimetype=self.mimetype)
+
+
+def init_app(app: Flask) -> None:
+    """Installs the provider on a Flask app.
+    Args:
+        app (Flask): The app serving the JSON responses.
+    """
+    if DefaultJSONProvider is not None:
+        app.json = FastJSONProvider(app)
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""Load-testing harness built from the E2E flow in `main.py`.
+
+This script runs the registration -> login -> profile -> reset -> logout
+flow of `main.run_flow` from many concurrent virtual users, each one on
+its own thread with its own email addresses. Every HTTP call made by the
+flow is timed and grouped by endpoint, and the run is summarized as
+per-endpoint throughput and latency percentiles.
+
+By default the app is started in-process on a free local port, inside a
+scratch directory so that the working copy's `a.db` is left alone; pass
+`--url` to target a server that is already running instead (e.g. the
+ASGI app). Nothing leaves the machine.
+
+Usage:
+    ./load_test.py --users 16 --iterations 4 --output run.json
+    ./load_test.py --users 16 --iterations 4 --compare run.json
+
+With `--compare`, the run is checked against a previous JSON report and
+the script exits with status 1 if any endpoint's p95 latency grew, or
+its throughput dropped, by more than `--threshold` (20% by default).
+
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import requests
+
+import main
+
+
+class TimedClient:
+    """Drop-in replacement for the `requests` module used by `main.py`.
+    Every call is timed and recorded under its "METHOD /path" endpoint.
+    Each thread gets its own keep-alive session, whose cookie jar is
+    cleared before every call since `main.py` passes cookies explicitly.
+    """
+
+    def __init__(self) -> None:
+        """Initializes a new TimedClient instance."""
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    def _session(self) -> requests.Session:
+        """Returns the calling thread's session."""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Sends a timed request."""
+        endpoint = "{} {}".format(method.upper(), urlsplit(url).path)
+        session = self._session()
+        session.cookies.clear()
+        start = time.perf_counter()
+        try:
+            res = session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self.errors[endpoint] += 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[endpoint].append(elapsed)
+            if res.status_code >= 500 or res.status_code == 429:
+                self.errors[endpoint] += 1
+        return res
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """Sends a timed GET request."""
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        """Sends a timed POST request."""
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> requests.Response:
+        """Sends a timed PUT request."""
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        """Sends a timed DELETE request."""
+        return self.request("DELETE", url, **kwargs)
+
+
+def start_app() -> str:
+    """Starts `app.py` in-process on a free local port.
+    Returns:
+        str: The base URL of the server.
+    """
+    from werkzeug.serving import make_server
+
+    os.chdir(tempfile.mkdtemp(prefix="load_test_"))
+    # Every virtual user logs in from 127.0.0.1: the login rate limits
+    # would reject most of them.
+    os.environ.setdefault("LOGIN_RATE_LIMIT_IP", "0")
+    os.environ.setdefault("LOGIN_RATE_LIMIT_EMAIL", "0")
+    from app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return "http://127.0.0.1:{}".format(server.server_port)
+
+
+def percentile(values: List[float], p: float) -> float:
+    """Returns the p-th percentile of sorted values, in milliseconds."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))
+    return values[index] * 1000
+
+
+def run(users: int, iterations: int, client: TimedClient) -> dict:
+    """Runs the E2E flow from concurrent virtual users.
+    Returns:
+        dict: The report of the run.
+    """
+    flow_errors = []
+    lock = threading.Lock()
+
+    def virtual_user(vu: int) -> None:
+        for i in range(iterations):
+            email = "vu{}-{}-{}@load.test".format(vu, i, time.time_ns())
+            try:
+                main.run_flow(email, main.PASSWD, main.NEW_PASSWD)
+            except (AssertionError, requests.RequestException) as err:
+                with lock:
+                    flow_errors.append(repr(err))
+
+    threads = [threading.Thread(target=virtual_user, args=(vu,))
+               for vu in range(users)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    duration = time.perf_counter() - began
+
+    endpoints = {}
+    for endpoint, values in sorted(client.latencies.items()):
+        values.sort()
+        endpoints[endpoint] = {
+            "count": len(values),
+            "errors": client.errors.get(endpoint, 0),
+            "rps": len(values) / duration,
+            "mean_ms": sum(values) / len(values) * 1000,
+            "p50_ms": percentile(values, 50),
+            "p90_ms": percentile(values, 90),
+            "p95_ms": percentile(values, 95),
+            "p99_ms": percentile(values, 99),
+            "max_ms": values[-1] * 1000,
+        }
+    return {
+        "config": {"users": users, "iterations": iterations},
+        "duration_s": duration,
+        "flows": users * iterations,
+        "flow_errors": len(flow_errors),
+        "endpoints": endpoints,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """Lists the endpoints that regressed against a baseline report."""
+    regressions = []
+    for endpoint, cur in report["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(endpoint)
+        if old is None:
+            continue
+        if cur["p95_ms"] > old["p95_ms"] * (1 + threshold):
+            regressions.append("{}: p95 {:.2f} ms -> {:.2f} ms".format(
+                endpoint, old["p95_ms"], cur["p95_ms"]))
+        if cur["rps"] < old["rps"] * (1 - threshold):
+            regressions.append("{}: {:.1f} req/s -> {:.1f} req/s".format(
+                endpoint, old["rps"], cur["rps"]))
+    return regressions
+
+
+def main_cli() -> int:
+    """Runs the harness from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8,
+                        help="concurrent virtual users")
+    parser.add_argument("--iterations", type=int, default=2,
+                        help="flows run by each virtual user")
+    parser.add_argument("--url", help="target an already running server")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="baseline JSON report")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    if args.output:
+        args.output = os.path.abspath(args.output)
+
+    client = TimedClient()
+    main.requests = client
+    main.BASE_URL = args.url.rstrip("/") if args.url else start_app()
+    report = run(args.users, args.iterations, client)
+
+    print("{} flows in {:.2f}s, {} failed".format(
+        report["flows"], report["duration_s"], report["flow_errors"]))
+    print("{:<24}{:>7}{:>7}{:>9}{:>9}{:>9}{:>9}".format(
+        "endpoint", "count", "errors", "req/s", "p50 ms", "p95 ms", "p99 ms"))
+    for endpoint, stats in report["endpoints"].items():
+        print("{:<24}{:>7}{:>7}{:>9.1f}{:>9.2f}{:>9.2f}{:>9.2f}".format(
+            endpoint, stats["count"], stats["errors"], stats["rps"],
+            stats["p50_ms"], stats["p95_ms"], stats["p99_ms"]))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if baseline is not None:
+        regressions = compare(report, baseline, args.threshold)
+        for line in regressions:
+            print("REGRESSION {}".format(line), file=sys.stderr)
+        if regressions:
+            return 1
+    return 1 if report["flow_errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
@@ -191,13 +191,25 @@ def update_password(email: str, reset_token: str, new_password: str) -> None:
     assert res.json() == {"email": email, "message": "Password updated"}
 
 
-if __name__ == "__main__":
-    register_user(EMAIL, PASSWD)
-    log_in_wrong_password(EMAIL, NEW_PASSWD)
+def run_flow(email: str, password: str, new_password: str) -> None:
+    """Run the whole E2E flow for one user.
+
+    Args:
+        email (str): Email address of the user to register.
+        password (str): Initial password of the user.
+        new_password (str): Password set through the reset flow.
+
+    """
+    register_user(email, password)
+    log_in_wrong_password(email, new_password)
     profile_unlogged()
-    session_id = log_in(EMAIL, PASSWD)
+    session_id = log_in(email, password)
     profile_logged(session_id)
     log_out(session_id)
-    reset_token = reset_password_token(EMAIL)
-    update_password(EMAIL, reset_token, NEW_PASSWD)
-    log_in(EMAIL, NEW_PASSWD)
+    reset_token = reset_password_token(email)
+    update_password(email, reset_token, new_password)
+    log_in(email, new_password)
+
+
+if __name__ == "__main__":
+    run_flow(EMAIL, PASSWD, NEW_PASSWD)
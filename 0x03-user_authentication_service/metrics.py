@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""A module for request and operation metrics.
+
+Metrics are collected only when the `METRICS_ENABLED` environment
+variable is set to a true value. When it is not, `init_app` registers no
+hooks and `instrument` leaves the target untouched, so the disabled path
+costs nothing per request.
+
+Request latencies by route help timing attacks, so the metrics are only
+served to requests carrying an `Authorization: Bearer <METRICS_TOKEN>`
+header; without `METRICS_TOKEN`, they are served to nobody.
+"""
+import hmac
+import threading
+from functools import wraps
+from os import getenv
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+
+from flask import Flask, g, request
+
+
+METRICS_ENABLED = getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes')
+METRICS_TOKEN = getenv('METRICS_TOKEN', '')
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+           0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """Latency histogram with Prometheus-style cumulative buckets.
+    """
+
+    def __init__(self, name: str, doc: str, label_names: Tuple[str, ...]):
+        """Initializes a new Histogram instance.
+        """
+        self.name = name
+        self.doc = doc
+        self.label_names = label_names
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float) -> None:
+        """Records one observation for the given label values.
+        """
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(BUCKETS), 0.0, 0]
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    series[0][i] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        """Returns the histogram in the Prometheus text format.
+        """
+        lines = [
+            '# HELP {} {}'.format(self.name, self.doc),
+            '# TYPE {} histogram'.format(self.name),
+        ]
+        with self._lock:
+            series = sorted(
+                (k, (list(v[0]), v[1], v[2])) for k, v in self._series.items()
+            )
+        for labels, (buckets, total, count) in series:
+            pairs = ['{}="{}"'.format(k, _escape(v))
+                     for k, v in zip(self.label_names, labels)]
+            cumulative = 0
+            for bound, hits in zip(BUCKETS, buckets):
+                cumulative += hits
+                lines.append('{}_bucket{{{}}} {}'.format(
+                    self.name, ','.join(pairs + ['le="{}"'.format(bound)]),
+                    cumulative))
+            lines.append('{}_bucket{{{}}} {}'.format(
+                self.name, ','.join(pairs + ['le="+Inf"']), count))
+            lines.append('{}_sum{{{}}} {}'.format(
+                self.name, ','.join(pairs), total))
+            lines.append('{}_count{{{}}} {}'.format(
+                self.name, ','.join(pairs), count))
+        return lines
+
+
+def _escape(value: str) -> str:
+    """Escapes a label value for the Prometheus text format.
+    """
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+        .replace('\n', '\\n')
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling a request, auth hooks included.',
+    ('method', 'route', 'status'),
+)
+OPERATION_LATENCY = Histogram(
+    'app_operation_duration_seconds',
+    'Time spent in instrumented operations.',
+    ('operation',),
+)
+
+
+def render() -> str:
+    """Returns every metric in the Prometheus text format.
+    """
+    lines = REQUEST_LATENCY.render() + OPERATION_LATENCY.render()
+    return '\n'.join(lines) + '\n'
+
+
+def is_authorized(header: str) -> bool:
+    """Checks an Authorization header against METRICS_TOKEN in constant
+    time.
+    """
+    if not METRICS_TOKEN or header is None:
+        return False
+    scheme, _, token = header.partition(' ')
+    if scheme.lower() != 'bearer':
+        return False
+    return hmac.compare_digest(token.strip().encode(), METRICS_TOKEN.encode())
+
+
+def timed(operation: str, fn: Callable) -> Callable:
+    """Wraps a function so that its calls are timed as `operation`.
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        start = perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            OPERATION_LATENCY.observe((operation,), perf_counter() - start)
+    return wrapper
+
+
+def instrument(owner: object, name: str, operation: str) -> None:
+    """Replaces `owner.name` with a timed version when metrics are enabled.
+    Class methods and static methods keep their kind; any other callable
+    attribute (plain function or bound method of an instance) is wrapped
+    as is.
+    """
+    if not METRICS_ENABLED:
+        return
+    raw = vars(owner).get(name) if hasattr(owner, '__dict__') else None
+    if isinstance(raw, classmethod):
+        setattr(owner, name, classmethod(timed(operation, raw.__func__)))
+    elif isinstance(raw, staticmethod):
+        setattr(owner, name, staticmethod(timed(operation, raw.__func__)))
+    else:
+        setattr(owner, name, timed(operation, getattr(owner, name)))
+
+
+def init_app(app: Flask) -> None:
+    """Registers the request timing hooks when metrics are enabled.
+    """
+    if not METRICS_ENABLED:
+        return
+
+    def start_timer():
+        """Stores the request start time.
+        """
+        g.metrics_start = perf_counter()
+
+    def stop_timer(response):
+        """Records the request latency by route and status.
+        """
+        start = g.pop('metrics_start', None)
+        if start is not None:
+            rule = request.url_rule
+            route = rule.rule if rule is not None else '<unmatched>'
+            REQUEST_LATENCY.observe(
+                (request.method, route, str(response.status_code)),
+                perf_counter() - start,
+            )
+        return response
+
+    app.before_request_funcs.setdefault(None, []).insert(0, start_timer)
+    app.after_request(stop_timer)
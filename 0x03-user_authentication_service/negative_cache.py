@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""A module for a negative lookup cache.
+
+Answers "does any object have this value?" without scanning the store,
+so that lookups of unknown emails or session ids can be rejected early.
+A Bloom filter of the known values gives definite "no" answers; the
+values it wrongly reports as present are then remembered for a short
+while in a bounded miss cache, so that retrying them stays cheap too.
+Values are only ever added: the owner rebuilds the cache when objects
+are removed or the filter gets too full.
+"""
+import hashlib
+import math
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Hashable
+
+
+NEGATIVE_CACHE_CAPACITY = int(getenv('NEGATIVE_CACHE_CAPACITY', '100000'))
+NEGATIVE_CACHE_ERROR_RATE = float(getenv('NEGATIVE_CACHE_ERROR_RATE',
+                                         '0.01'))
+NEGATIVE_CACHE_TTL = float(getenv('NEGATIVE_CACHE_TTL', '30'))
+NEGATIVE_CACHE_MAX_MISSES = int(getenv('NEGATIVE_CACHE_MAX_MISSES', '10000'))
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings.
+    """
+
+    def __init__(self, capacity: int = NEGATIVE_CACHE_CAPACITY,
+                 error_rate: float = NEGATIVE_CACHE_ERROR_RATE) -> None:
+        """Initializes a filter sized for `capacity` values at the given
+        false positive rate.
+        """
+        self.capacity = max(capacity, 1)
+        size = -self.capacity * math.log(error_rate) / math.log(2) ** 2
+        self.size = max(int(math.ceil(size)), 8)
+        self.hashes = max(int(round(self.size / self.capacity
+                                    * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value: str):
+        """Yields the bit positions of a value (double hashing).
+        """
+        digest = hashlib.blake2b(value.encode('utf-8', 'surrogatepass'),
+                                 digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hashes):
+            yield (first + i * second) % self.size
+
+    def add(self, value: str) -> None:
+        """Adds a value to the filter.
+        """
+        for position in self._positions(value):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value: str) -> bool:
+        """Returns False if the value was never added.
+        """
+        bits = self._bits
+        for position in self._positions(value):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class NegativeCache:
+    """Bloom filter of known values plus a short-lived miss cache.
+    """
+
+    def __init__(self, capacity: int = NEGATIVE_CACHE_CAPACITY,
+                 ttl: float = NEGATIVE_CACHE_TTL,
+                 max_misses: int = NEGATIVE_CACHE_MAX_MISSES) -> None:
+        """Initializes a new NegativeCache instance.
+        """
+        self.ttl = ttl
+        self.max_misses = max_misses
+        self.generation = 0
+        self._filter = BloomFilter(capacity)
+        self._misses: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def saturated(self) -> bool:
+        """Whether the filter holds more values than it was sized for.
+        """
+        return self._filter.count > self._filter.capacity
+
+    def add(self, value: Hashable) -> None:
+        """Records that an object now has this value.
+        """
+        if not isinstance(value, str):
+            return
+        with self._lock:
+            self._filter.add(value)
+            self._misses.pop(value, None)
+            self.generation += 1
+
+    def might_contain(self, value: Hashable) -> bool:
+        """Returns False if no object can have this value.
+        """
+        if not isinstance(value, str):
+            return True
+        if value not in self._filter:
+            return False
+        expires_at = self._misses.get(value)
+        if expires_at is None:
+            return True
+        if expires_at > time.monotonic():
+            return False
+        with self._lock:
+            self._misses.pop(value, None)
+        return True
+
+    def record_miss(self, value: Hashable, generation: int) -> None:
+        """Remembers that a lookup of this value found nothing.
+        `generation` is the one read before the lookup started: the miss
+        is dropped if a value was added in between.
+        """
+        if not isinstance(value, str) or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation != self.generation:
+                return
+            self._misses[value] = time.monotonic() + self.ttl
+            self._misses.move_to_end(value)
+            while len(self._misses) > self.max_misses:
+                self._misses.popitem(last=False)
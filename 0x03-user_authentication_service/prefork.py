@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""A module for serving the app with pre-forked worker processes.
+
+The parent process imports `app`, which creates the database, runs
+`app.warm_up` to fill the caches the workers would otherwise each build
+on their first requests, freezes the garbage collector and forks
+`SERVER_WORKERS` workers sharing its listening socket. The workers share
+the parent's memory pages copy-on-write until they write to them, and
+`app.post_fork` gives each of them its own database connections.
+
+Each worker serves requests on a pool of `SERVER_THREADS` threads and
+closes the connection after each response, so that an idle client never
+holds a thread. After `SERVER_MAX_REQUESTS` requests, plus a random
+jitter of up to `SERVER_MAX_REQUESTS_JITTER` so that workers do not all
+restart together, a worker stops accepting connections, finishes the
+requests in progress and exits, and the parent forks a fresh one.
+SIGHUP recycles every worker that way. SIGTERM and SIGINT stop the
+server, killing the workers still busy after `SERVER_GRACEFUL_TIMEOUT`
+seconds.
+
+Classes and Functions:
+    - PooledWSGIServer: WSGI server handling connections on a thread pool.
+    - serve: Serves a WSGI app with pre-forked workers.
+
+Usage:
+    SERVER_WORKERS=4 SERVER_THREADS=8 ./prefork.py --port 5000
+
+"""
+
+import argparse
+import gc
+import os
+import random
+import signal
+import socket
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", str(os.cpu_count() or 1)))
+SERVER_THREADS = int(os.getenv("SERVER_THREADS", "8"))
+SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))
+SERVER_MAX_REQUESTS_JITTER = int(os.getenv("SERVER_MAX_REQUESTS_JITTER", "0"))
+SERVER_GRACEFUL_TIMEOUT = float(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Request handler closing the connection after each response."""
+    protocol_version = "HTTP/1.0"
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server handling connections on a fixed pool of threads.
+    Attributes:
+        max_requests (int): The number of connections to accept before
+            stopping, or 0 to never stop.
+        handled (int): The number of connections accepted.
+    Methods:
+        - stop: Stops accepting connections.
+        - serve: Serves until stopped.
+
+    """
+    multithread = True
+    multiprocess = True
+
+    def __init__(
+            self, host: str, port: int, app, threads: int,
+            max_requests: int = 0, fd: int = None,
+            ) -> None:
+        """Initializes a new PooledWSGIServer instance.
+        Args:
+            host (str): The address to serve on.
+            port (int): The port to serve on.
+            app: The WSGI app to serve.
+            threads (int): The number of requests served concurrently.
+            max_requests (int): The number of connections to accept
+                before stopping, or 0 to never stop.
+            fd (int): An already bound socket to serve on.
+        """
+        super().__init__(host, port, app, RequestHandler, fd=fd)
+        self.max_requests = max_requests
+        self.handled = 0
+        self._pool = ThreadPoolExecutor(
+            max(1, threads), thread_name_prefix="request",
+        )
+        self._stopping = threading.Event()
+
+    def process_request(self, request, client_address) -> None:
+        """Hands a connection to the pool."""
+        self._pool.submit(self._process, request, client_address)
+        self.handled += 1
+        if self.max_requests and self.handled >= self.max_requests:
+            self.stop()
+
+    def _process(self, request, client_address) -> None:
+        """Serves a connection on a thread of the pool."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def stop(self) -> None:
+        """Stops accepting connections.
+        Safe to call from any thread and from a signal handler.
+        """
+        if not self._stopping.is_set():
+            self._stopping.set()
+            threading.Thread(target=self.shutdown, daemon=True).start()
+
+    def serve(self) -> None:
+        """Serves until stopped, then waits for the requests in progress."""
+        self.serve_forever()
+        self._pool.shutdown(wait=True)
+
+
+def _worker(
+        app, sock: socket.socket, host: str, threads: int,
+        max_requests: int, post_fork: Callable[[], None],
+        ) -> None:
+    """Runs a worker process; never returns."""
+    status = 1
+    try:
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        if post_fork is not None:
+            post_fork()
+        port = sock.getsockname()[1]
+        server = PooledWSGIServer(
+            host, port, app, threads, max_requests, fd=sock.fileno(),
+        )
+        sock.close()
+        # Another worker may accept a connection this one was woken up
+        # for: accept() must then fail instead of blocking shutdown().
+        server.socket.setblocking(False)
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: server.stop())
+        server.serve()
+        status = 0
+    except Exception:
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(status)
+
+
+def serve(
+        app, host: str = "0.0.0.0", port: int = 5000,
+        workers: int = SERVER_WORKERS, threads: int = SERVER_THREADS,
+        max_requests: int = SERVER_MAX_REQUESTS,
+        max_requests_jitter: int = SERVER_MAX_REQUESTS_JITTER,
+        graceful_timeout: float = SERVER_GRACEFUL_TIMEOUT,
+        warm_up: Callable[[], None] = None,
+        post_fork: Callable[[], None] = None,
+        ) -> None:
+    """Serves a WSGI app with pre-forked workers until SIGTERM or SIGINT.
+    Args:
+        app: The WSGI app to serve.
+        host (str): The address to serve on.
+        port (int): The port to serve on.
+        workers (int): The number of worker processes.
+        threads (int): The number of requests each worker serves
+            concurrently.
+        max_requests (int): The number of connections a worker accepts
+            before it is replaced, or 0 to never replace it.
+        max_requests_jitter (int): The maximum random number of
+            connections added to `max_requests` for each worker.
+        graceful_timeout (float): The seconds the workers are given to
+            finish their requests when the server stops.
+        warm_up (Callable): Run in the parent before forking the workers.
+        post_fork (Callable): Run in each worker before it serves.
+    """
+    sock = socket.create_server((host, int(port)), backlog=2048)
+    sock.set_inheritable(True)
+    if warm_up is not None:
+        warm_up()
+    gc.collect()
+    gc.freeze()
+
+    children: Dict[int, float] = {}
+    stopping = []
+
+    def spawn() -> None:
+        limit = max_requests
+        if limit and max_requests_jitter:
+            limit += random.randint(0, max_requests_jitter)
+        pid = os.fork()
+        if pid == 0:
+            _worker(app, sock, host, threads, limit, post_fork)
+        children[pid] = time.monotonic()
+
+    def signal_workers(signum: int) -> None:
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    def stop(*_) -> None:
+        if not stopping:
+            stopping.append(True)
+            signal_workers(signal.SIGTERM)
+            signal.alarm(max(1, int(graceful_timeout)))
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGHUP, lambda *_: signal_workers(signal.SIGTERM))
+    signal.signal(signal.SIGALRM, lambda *_: signal_workers(signal.SIGKILL))
+    print(" * Serving on http://{}:{} with {} workers of {} threads".format(
+        host, sock.getsockname()[1], workers, threads), file=sys.stderr)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+        started_at = children.pop(pid, None)
+        if started_at is None or stopping:
+            continue
+        if status != 0 and time.monotonic() - started_at < 1:
+            # Do not fork in a tight loop if workers die on startup.
+            time.sleep(1)
+        spawn()
+    signal.alarm(0)
+    sock.close()
+
+
+def main() -> None:
+    """Serves `app` on the given address."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5000)
+    args = parser.parse_args()
+
+    import rate_limit
+    from app import app, post_fork, warm_up
+
+    if SERVER_WORKERS > 1 and rate_limit.RATE_LIMIT_BACKEND != "redis" and (
+            rate_limit.LOGIN_RATE_LIMIT_IP > 0 or
+            rate_limit.LOGIN_RATE_LIMIT_EMAIL > 0):
+        print(" * Warning: each worker counts login attempts on its own, "
+              "so the login rate limits are multiplied by the number of "
+              "workers; use RATE_LIMIT_BACKEND=redis", file=sys.stderr)
+    serve(app, args.host, args.port, warm_up=warm_up, post_fork=post_fork)
+
+
+if __name__ == "__main__":
+    main()
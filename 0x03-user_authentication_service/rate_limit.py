@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""A module for login rate limiting.
+
+Login attempts are counted per client IP and per email with a sliding
+window counter: each key only keeps the number of hits in the current
+and the previous fixed window, and the previous one is weighted by how
+much of it still overlaps the sliding window. Checking a key is O(1).
+An attempt is only counted if it is allowed by every limit, so that
+rejected attempts do not use up the budget of the other keys. Both
+limits are off unless set: behind a proxy every client shares one IP.
+
+Two backends are provided. `MemoryBackend` keeps the counters of one
+process, bounded to `RATE_LIMIT_MAX_KEYS` keys and swept by a background
+thread. `RedisBackend` shares them between worker processes; it needs
+the `redis` package, which is only imported when that backend is used,
+and checks and counts each attempt in one optimistic transaction.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+from os import getenv
+from typing import Sequence, Tuple
+
+
+LOGIN_RATE_LIMIT_IP = int(getenv('LOGIN_RATE_LIMIT_IP', '0'))
+LOGIN_RATE_LIMIT_EMAIL = int(getenv('LOGIN_RATE_LIMIT_EMAIL', '0'))
+LOGIN_RATE_WINDOW = float(getenv('LOGIN_RATE_WINDOW', '60'))
+RATE_LIMIT_BACKEND = getenv('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_REDIS_URL = getenv('RATE_LIMIT_REDIS_URL',
+                              'redis://localhost:6379/0')
+RATE_LIMIT_MAX_KEYS = int(getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+
+
+def sliding_window(previous: int, current: int, limit: int,
+                   window: float, now: float) -> float:
+    """Returns 0 if one more hit is allowed, otherwise the number of
+    seconds until it will be.
+    """
+    elapsed = now % window
+    weight = 1 - elapsed / window
+    if previous * weight + current < limit:
+        return 0
+    if current >= limit or previous == 0:
+        return window - elapsed
+    # The estimate drops below the limit once the previous window's
+    # weight falls under (limit - current) / previous.
+    free_at = (1 - (limit - current) / previous) * window
+    return max(free_at - elapsed, 0.001)
+
+
+class MemoryBackend:
+    """In-process sliding window counters with bounded memory.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS) -> None:
+        """Initializes a new MemoryBackend instance.
+        """
+        self.max_keys = max_keys
+        self._counters: 'OrderedDict[str, list]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._sweeper = None
+        self._window = None
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        """Counts a hit on `key` unless it is over the limit.
+        Returns 0 if the hit is allowed, otherwise the retry delay.
+        """
+        return self.hit_all(((key, limit),), window)
+
+    def hit_all(self, limits: Sequence[Tuple[str, int]],
+                window: float) -> float:
+        """Counts a hit on every key of the (key, limit) pairs, unless one
+        of them is over its limit, in which case none is counted.
+        Returns 0 if the hit is allowed, otherwise the retry delay.
+        """
+        now = time.time()
+        index = int(now // window)
+        retry_after = 0
+        with self._lock:
+            counters = []
+            for key, limit in limits:
+                counter = self._counters.get(key)
+                if counter is None or counter[0] < index - 1:
+                    counter = [index, 0, 0]
+                elif counter[0] == index - 1:
+                    counter = [index, 0, counter[1]]
+                retry_after = max(retry_after, sliding_window(
+                    counter[2], counter[1], limit, window, now))
+                counters.append((key, counter))
+            for key, counter in counters:
+                if retry_after == 0:
+                    counter[1] += 1
+                self._counters[key] = counter
+                self._counters.move_to_end(key)
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        self._start_sweeper(window)
+        return retry_after
+
+    def _start_sweeper(self, window: float) -> None:
+        """Starts the background thread dropping expired counters.
+        """
+        if self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._window = window
+            self._sweeper = threading.Thread(
+                target=self._sweep, name='rate-limit-sweeper', daemon=True)
+            self._sweeper.start()
+
+    def _sweep(self) -> None:
+        """Drops, once per window, the counters idle for two windows.
+        Keys are kept in least recently hit order, so the sweep stops at
+        the first live counter.
+        """
+        while True:
+            time.sleep(self._window)
+            oldest = int(time.time() // self._window) - 1
+            with self._lock:
+                while self._counters:
+                    key, counter = next(iter(self._counters.items()))
+                    if counter[0] >= oldest:
+                        break
+                    del self._counters[key]
+
+    def __len__(self) -> int:
+        """Returns the number of tracked keys.
+        """
+        return len(self._counters)
+
+
+class RedisBackend:
+    """Sliding window counters shared through Redis.
+    """
+
+    def __init__(self, url: str = RATE_LIMIT_REDIS_URL,
+                 prefix: str = 'rate_limit:') -> None:
+        """Initializes a new RedisBackend instance.
+        """
+        import redis
+
+        self._redis = redis.Redis.from_url(url)
+        self._watch_error = redis.WatchError
+        self._prefix = prefix
+
+    def hit(self, key: str, limit: int, window: float) -> float:
+        """Counts a hit on `key` unless it is over the limit.
+        Returns 0 if the hit is allowed, otherwise the retry delay.
+        """
+        return self.hit_all(((key, limit),), window)
+
+    def hit_all(self, limits: Sequence[Tuple[str, int]],
+                window: float) -> float:
+        """Counts a hit on every key of the (key, limit) pairs, unless one
+        of them is over its limit, in which case none is counted.
+        Returns 0 if the hit is allowed, otherwise the retry delay.
+        The keys are read and counted in one MULTI/EXEC transaction, so
+        concurrent workers never count more hits than the limits allow.
+        """
+        while True:
+            now = time.time()
+            index = int(now // window)
+            keys = []
+            for key, _ in limits:
+                keys.append('{}{}:{}'.format(self._prefix, key, index - 1))
+                keys.append('{}{}:{}'.format(self._prefix, key, index))
+            with self._redis.pipeline() as pipe:
+                try:
+                    # EXEC fails if another process counted a hit on one
+                    # of the keys since they were read: read them again.
+                    pipe.watch(*keys)
+                    values = pipe.mget(keys)
+                    retry_after = 0
+                    for i, (_, limit) in enumerate(limits):
+                        retry_after = max(retry_after, sliding_window(
+                            int(values[2 * i] or 0),
+                            int(values[2 * i + 1] or 0),
+                            limit, window, now))
+                    if retry_after > 0:
+                        return retry_after
+                    pipe.multi()
+                    for current_key in keys[1::2]:
+                        pipe.incr(current_key)
+                        pipe.expire(current_key, int(math.ceil(window * 2)))
+                    pipe.execute()
+                    return 0
+                except self._watch_error:
+                    continue
+
+
+class LoginRateLimiter:
+    """Throttles login attempts per client IP and per email.
+    """
+
+    def __init__(self, backend=None, ip_limit: int = LOGIN_RATE_LIMIT_IP,
+                 email_limit: int = LOGIN_RATE_LIMIT_EMAIL,
+                 window: float = LOGIN_RATE_WINDOW) -> None:
+        """Initializes a new LoginRateLimiter instance.
+        """
+        if backend is None:
+            backend = RedisBackend() if RATE_LIMIT_BACKEND == 'redis' \
+                else MemoryBackend()
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.window = window
+
+    def check(self, ip: str, email: str) -> Tuple[bool, int]:
+        """Counts a login attempt.
+        Returns whether it is allowed and, if not, the number of seconds
+        the client should wait, for a `Retry-After` header.
+        """
+        checks = (('ip:{}'.format(ip), self.ip_limit),
+                  ('email:{}'.format((email or '').lower()), self.email_limit))
+        limits = [(key, limit) for key, limit in checks if limit > 0]
+        if not limits:
+            return True, 0
+        retry_after = self.backend.hit_all(limits, self.window)
+        if retry_after > 0:
+            return False, max(1, int(math.ceil(retry_after)))
+        return True, 0
+
+
+login_limiter = LoginRateLimiter()
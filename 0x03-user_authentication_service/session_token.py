@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""A module for signed, stateless session tokens.
+
+A token carries everything needed to authenticate a request without a
+database round trip: the user's id and email, when it was issued, when
+it expires and the user's session version at the time it was issued.
+The payload is signed with HMAC-SHA256, so it cannot be altered without
+the server's secret. Revocation is handled by the caller, which bumps
+the user's session version and rejects tokens carrying an older one.
+
+Classes and Functions:
+    - SessionToken: The claims carried by a token.
+    - SessionTokenSigner: Signs and verifies session tokens.
+
+"""
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import NamedTuple, Union
+
+
+SESSION_TTL = int(os.getenv("SESSION_TTL", "86400"))
+
+
+class SessionToken(NamedTuple):
+    """The claims carried by a session token.
+    """
+    user_id: int
+    email: str
+    issued_at: int
+    expires_at: int
+    version: int
+
+
+def _b64encode(data: bytes) -> str:
+    """Encodes bytes as unpadded URL-safe base64."""
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    """Decodes unpadded URL-safe base64."""
+    padded = data.encode("ascii") + b"=" * (-len(data) % 4)
+    return base64.urlsafe_b64decode(padded)
+
+
+class SessionTokenSigner:
+    """Signs and verifies session tokens.
+    Attributes:
+        ttl (int): The lifetime of a token in seconds.
+    Methods:
+        - sign: Creates a token for a user.
+        - verify: Returns the claims of a valid, unexpired token.
+
+    """
+
+    def __init__(self, secret: Union[str, bytes] = None,
+                 ttl: int = SESSION_TTL) -> None:
+        """Initializes a new SessionTokenSigner instance.
+        Args:
+            secret (str | bytes): The signing key. Defaults to the
+                `SESSION_SECRET` environment variable, or to a random key
+                (tokens then stop being valid when the process restarts).
+            ttl (int): The lifetime of a token in seconds.
+        """
+        if secret is None:
+            secret = os.getenv("SESSION_SECRET") or os.urandom(32)
+        if isinstance(secret, str):
+            secret = secret.encode("utf-8")
+        self._secret = secret
+        self.ttl = ttl
+
+    def _signature(self, payload: str) -> str:
+        """Computes the signature of an encoded payload."""
+        digest = hmac.new(self._secret, payload.encode("ascii"),
+                          hashlib.sha256).digest()
+        return _b64encode(digest)
+
+    def sign(self, user_id: int, email: str, version: int) -> str:
+        """Creates a token for a user.
+        Args:
+            user_id (int): The user's id.
+            email (str): The user's email.
+            version (int): The user's current session version.
+        Returns:
+            str: The signed token.
+        """
+        now = int(time.time())
+        claims = [user_id, email, now, now + self.ttl, version]
+        payload = _b64encode(
+            json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+        return "{}.{}".format(payload, self._signature(payload))
+
+    def verify(self, token: str) -> Union[SessionToken, None]:
+        """Returns the claims of a valid, unexpired token.
+        Args:
+            token (str): The token to check.
+        Returns:
+            Union[SessionToken, None]: The claims, or None if the token is
+            malformed, tampered with or expired.
+        """
+        if not isinstance(token, str):
+            return None
+        payload, _, signature = token.partition(".")
+        try:
+            if not hmac.compare_digest(signature, self._signature(payload)):
+                return None
+            claims = SessionToken(*json.loads(_b64decode(payload)))
+        except (binascii.Error, UnicodeError, TypeError, ValueError):
+            return None
+        if claims.expires_at < time.time():
+            return None
+        return claims
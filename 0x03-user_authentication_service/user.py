@@ -21,3 +21,4 @@ class User(Base):
     hashed_password = Column(String(250), nullable=False)
     session_id = Column(String(250), nullable=True)
     reset_token = Column(String(250), nullable=True)
+    session_version = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Parity corpus for `BasicAuth.extract_credentials`.
+
+The single-pass parser must return the credentials of the historical
+method chain for every header below, or None where the chain returns
+(None, None) or raises. bench_auth.py checks it before timing the
+parser; run this script to check it against either project:
+
+    ./basic_auth_corpus.py              # 0x02-Session_authentication
+    ./basic_auth_corpus.py basic_auth   # 0x01-Basic_authentication
+"""
+import base64
+import os
+import sys
+from typing import List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from harness import PROJECTS, ROOT, use_project  # noqa: E402
+
+PROJECTS.setdefault(
+    'basic_auth', os.path.join(ROOT, '0x01-Basic_authentication'))
+
+
+def _basic(raw: bytes) -> str:
+    """Builds a Basic header from raw credential bytes.
+    """
+    return 'Basic ' + base64.b64encode(raw).decode()
+
+
+CREDENTIALS = [
+    b'bob@dylan.com:H0lberton School!',
+    b'bob@dylan.com:pass:with:colons',
+    b'bob@dylan.com:',
+    b':password',
+    b':',
+    b'',
+    b'no-colon',
+    b'  bob@dylan.com:pwd  ',
+    b'bob@dylan.com:pwd\n',
+    b'bob@dylan.com:pw\nd',
+    b'bob\n@dylan.com:pwd',
+    b'bob@dylan.com:pw\rd',
+    b'bob@dylan.com:pw\x00d',
+    b'\xc3\xa9l\xc3\xa8ve@\xc3\xa9cole.fr:mot de passe',
+    b'bob@dylan.com:\xff\xfe',
+    b'bob@dylan.com:\xe2\x80\xa8sep',
+    b'bob@dylan.com:pwd\xc2\xa0',
+    b'\x1cbob@dylan.com:pwd\x1f',
+    b'a:b',
+    b'a' * 300 + b':' + b'b' * 300,
+]
+
+HEADERS: List[object] = [_basic(raw) for raw in CREDENTIALS] + [
+    None,
+    89,
+    b'Basic Ym9iOnB3ZA==',
+    '',
+    'Basic',
+    'Basic ',
+    'Basic  Ym9iOnB3ZA==',
+    'basic Ym9iOnB3ZA==',
+    'BASIC Ym9iOnB3ZA==',
+    'Bearer Ym9iOnB3ZA==',
+    'Basic\tYm9iOnB3ZA==',
+    '  Basic Ym9iOnB3ZA==  ',
+    '\nBasic Ym9iOnB3ZA==\n',
+    'Basic Ym9iOnB3ZA',
+    'Basic Ym9iOnB3ZA=',
+    'Basic Ym9iOnB3ZA===',
+    'Basic Ym9iOnB3ZA==Ym9i',
+    'Basic =Ym9iOnB3ZA=',
+    'Basic Ym9i OnB3ZA==',
+    'Basic Ym9i\nOnB3ZA==',
+    'Basic Ym9iOnB3ZA==\n',
+    'Basic Ym9iOnB3ZA==\x85',
+    'Basic Ym9iOnB3ZA==\u00a0',
+    'Basic Ym9iOnB3ZA==\u2028',
+    'Basic Ym9iOnB3ZA-_',
+    'Basic Ym9iOnB3ZA==é',
+    'Basic YQ',
+    'Basic Y',
+    'Basic ====',
+    'Basic YWJj',
+    'Basic YTpi',
+    'Basic\u3000YTpi',
+    'Basic YTpi' + ' ' * 8,
+]
+
+
+def chain(auth, header: object) -> Optional[Tuple[str, str]]:
+    """Parses a header with the historical method chain.
+    """
+    try:
+        token = auth.extract_base64_authorization_header(header)
+        decoded = auth.decode_base64_authorization_header(token)
+        credentials = auth.extract_user_credentials(decoded)
+    except ValueError:
+        return None
+    return None if credentials == (None, None) else credentials
+
+
+def mismatches(auth) -> List[Tuple[object, object, object]]:
+    """Returns the (header, expected, actual) of every header on which
+    `auth.extract_credentials` disagrees with the method chain.
+    """
+    result = []
+    for header in HEADERS:
+        expected = chain(auth, header)
+        actual = auth.extract_credentials(header)
+        if actual != expected:
+            result.append((header, expected, actual))
+    return result
+
+
+def main() -> int:
+    """Checks the parser of one project against the corpus.
+    """
+    use_project(sys.argv[1] if len(sys.argv) > 1 else 'session_auth')
+    from api.v1.auth.basic_auth import BasicAuth
+
+    failures = mismatches(BasicAuth())
+    for header, expected, actual in failures:
+        print('MISMATCH {!r}: expected {!r}, got {!r}'.format(
+            header, expected, actual), file=sys.stderr)
+    print('{} headers, {} mismatches'.format(len(HEADERS), len(failures)))
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x02 authentication classes.
+"""
+import base64
+import os
+
+from basic_auth_corpus import mismatches
+from fixtures import make_sessions, make_users
+from harness import benchmark, use_project
+
+
+SIZES = (100, 1000, 10000)
+EXCLUDED_PATHS = [
+    '/api/v1/status/',
+    '/api/v1/unauthorized/',
+    '/api/v1/forbidden/',
+    '/api/v1/auth_session/login/',
+    '/api/v1/stat*',
+]
+
+
+@benchmark('BasicAuth header parsing')
+def bench_basic_auth_header():
+    """Parses a Basic Authorization header down to its credentials.
+    """
+    use_project('session_auth')
+    from api.v1.auth.basic_auth import BasicAuth
+
+    auth = BasicAuth()
+    token = base64.b64encode(b'bob@dylan.com:H0lberton School!').decode()
+    header = 'Basic {}'.format(token)
+
+    def parse():
+        b64 = auth.extract_base64_authorization_header(header)
+        decoded = auth.decode_base64_authorization_header(b64)
+        return auth.extract_user_credentials(decoded)
+    return parse
+
+
+@benchmark('BasicAuth.extract_credentials')
+def bench_basic_auth_extract_credentials():
+    """Parses the same header in one pass, once the parser was checked
+    against the parity corpus.
+    """
+    use_project('session_auth')
+    from api.v1.auth.basic_auth import BasicAuth
+
+    auth = BasicAuth()
+    failures = mismatches(auth)
+    if failures:
+        raise AssertionError(
+            'extract_credentials disagrees with the method chain on '
+            '{} headers, see basic_auth_corpus.py'.format(len(failures)))
+    token = base64.b64encode(b'bob@dylan.com:H0lberton School!').decode()
+    header = 'Basic {}'.format(token)
+    return lambda: auth.extract_credentials(header)
+
+
+@benchmark('Auth.require_auth')
+def bench_require_auth():
+    """Checks a path that matches none of the excluded paths.
+    """
+    use_project('session_auth')
+    from api.v1.auth.auth import Auth
+
+    auth = Auth()
+    return lambda: auth.require_auth('/api/v1/users', EXCLUDED_PATHS)
+
+
+@benchmark('SessionExpAuth.user_id_for_session_id', SIZES)
+def bench_session_exp_auth(size):
+    """Resolves a session id among `size` live sessions.
+    """
+    use_project('session_auth')
+    os.environ['SESSION_DURATION'] = '3600'
+    from api.v1.auth.session_exp_auth import SessionExpAuth
+
+    auth = SessionExpAuth()
+    session_ids = make_sessions(auth, make_users(size))
+    session_id = session_ids[size // 2]
+    return lambda: auth.user_id_for_session_id(session_id)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x02 JSON encoders (models.json_codec).
+"""
+import os
+
+from fixtures import make_users
+from harness import benchmark, use_project
+
+
+def encoders():
+    """Returns the encoders available in this environment.
+    """
+    use_project('session_auth')
+    from models import json_codec
+
+    return json_codec.BACKENDS
+
+
+def make_client():
+    """Returns a test client of the 0x02 app without authentication.
+    """
+    use_project('session_auth')
+    os.environ['AUTH_TYPE'] = 'none'
+    os.environ['MODELS_LOAD'] = 'eager'
+    from api.v1.app import app
+
+    return app.test_client()
+
+
+def with_encoder(encoder, fn):
+    """Wraps `fn` so that it runs with the given encoder, leaving the
+    default encoder in place for the other benchmarks.
+    """
+    from models import json_codec
+
+    def run():
+        previous = json_codec.BACKEND
+        json_codec.use(encoder)
+        try:
+            return fn()
+        finally:
+            json_codec.use(previous)
+    return run
+
+
+for encoder in encoders():
+    @benchmark('GET /api/v1/users ({})'.format(encoder), (100000,))
+    def bench_view_all_users(size, encoder=encoder):
+        """Serializes the whole user list through jsonify.
+        """
+        client = make_client()
+        make_users(size)
+        return with_encoder(encoder, lambda: client.get('/api/v1/users'))
+
+    @benchmark('Base.save_to_file ({})'.format(encoder), (10000,))
+    def bench_save_to_file(size, encoder=encoder):
+        """Writes the file store of `size` users.
+        """
+        from models.user import User
+
+        make_users(size)
+        return with_encoder(encoder, User.save_to_file)
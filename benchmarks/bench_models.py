@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x02 `models.base` file store.
+"""
+from fixtures import make_users
+from harness import benchmark, use_project
+
+
+SIZES = (100, 1000, 10000)
+
+
+@benchmark('Base.search', SIZES)
+def bench_search(size):
+    """Searches a user by email among `size` users.
+    """
+    use_project('session_auth')
+    from models.user import User
+
+    email = make_users(size)[size // 2].email
+    return lambda: User.search({'email': email})
+
+
+@benchmark('Base.query', SIZES)
+def bench_query(size):
+    """Lists the first 50 users by email among the users created after
+    the median creation time.
+    """
+    use_project('session_auth')
+    from models.user import User
+
+    dataset = make_users(size)
+    since = sorted(user.created_at for user in dataset)[size // 2]
+
+    def query():
+        return list(User.query({'created_at__gt': since},
+                               order_by='email', limit=50))
+    query()  # builds the sorted indexes
+    return query
+
+
+@benchmark('Base.get', SIZES)
+def bench_get(size):
+    """Gets a user by id among `size` users.
+    """
+    use_project('session_auth')
+    from models.user import User
+
+    user_id = make_users(size)[size // 2].id
+    return lambda: User.get(user_id)
+
+
+@benchmark('Base.save', SIZES)
+def bench_save(size):
+    """Saves one user, which rewrites the file of `size` users.
+    """
+    user = make_users(size)[size // 2]
+    return user.save
+
+
+@benchmark('Base.load_from_file', SIZES)
+def bench_load_from_file(size):
+    """Loads a file of `size` users.
+    """
+    use_project('session_auth')
+    from models.user import User
+
+    make_users(size)
+    User.save_to_file()
+    return User.load_from_file
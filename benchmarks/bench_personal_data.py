@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x00 log redaction API.
+"""
+import logging
+
+from harness import benchmark, use_project
+
+
+MESSAGE = ("name=Bob Dylan;email=bob@dylan.com;phone=555-0100;"
+           "ssn=000-123-0000;password=bcrypt-hash;ip=192.168.0.1;"
+           "last_login=2019-11-14 06:16:19;user_agent=Mozilla/5.0;")
+
+
+@benchmark('filter_datum')
+def bench_filter_datum():
+    """Redacts the five PII fields of a log line.
+    """
+    use_project('personal_data')
+    from filtered_logger import PII_FIELDS, filter_datum
+
+    fields = list(PII_FIELDS)
+    return lambda: filter_datum(fields, '***', MESSAGE, ';')
+
+
+@benchmark('RedactingFormatter.format')
+def bench_redacting_formatter():
+    """Formats and redacts one log record.
+    """
+    use_project('personal_data')
+    from filtered_logger import PII_FIELDS, RedactingFormatter
+
+    formatter = RedactingFormatter(list(PII_FIELDS))
+    record = logging.LogRecord('user_data', logging.INFO, None, None,
+                               MESSAGE, None, None)
+    return lambda: formatter.format(record)
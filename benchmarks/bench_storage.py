@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x02 storage backends (models.storage).
+"""
+from fixtures import make_users
+from harness import benchmark, use_project
+
+
+SIZES = (1000000,)
+BACKENDS = ('json', 'sqlite')
+_users = {}
+_databases = {}
+
+
+def users(size: int) -> list:
+    """Returns `size` synthetic users, built once per size.
+    """
+    if size not in _users:
+        _users[size] = make_users(size)
+    return _users[size]
+
+
+def make_backend(backend: str, size: int):
+    """Returns a storage backend holding the `size` users.
+    The SQLite database is built once per size; the JSON backend gets
+    the users back in `DATA`, which other benchmarks overwrite.
+    """
+    use_project('session_auth')
+    from models import storage
+    from models.user import User
+
+    dataset = users(size)
+    if backend == 'json':
+        storage.DATA['User'] = {user.id: user for user in dataset}
+        return storage.JSONStorage()
+    if size not in _databases:
+        database = storage.SQLiteStorage('.db_bench_{}.sqlite3'.format(size))
+        database.save_many(User, dataset)
+        _databases[size] = database
+    return _databases[size]
+
+
+def with_backend(backend, fn):
+    """Wraps `fn` so that it runs with the given backend, leaving the
+    default backend in place for the other benchmarks.
+    """
+    from models import storage
+
+    def run():
+        previous = storage.BACKEND
+        storage.BACKEND = backend
+        try:
+            return fn()
+        finally:
+            storage.BACKEND = previous
+    return run
+
+
+for name in BACKENDS:
+    @benchmark('Base.search ({})'.format(name), SIZES)
+    def bench_search(size, name=name):
+        """Searches a user by email among `size` users.
+        """
+        from models.user import User
+
+        backend = make_backend(name, size)
+        email = users(size)[size // 2].email
+        search = with_backend(backend, lambda: User.search({'email': email}))
+        search()  # builds the SQLite index or the negative cache
+        return search
+
+    @benchmark('Base.get ({})'.format(name), SIZES)
+    def bench_get(size, name=name):
+        """Gets a user by id among `size` users.
+        """
+        from models.user import User
+
+        backend = make_backend(name, size)
+        user_id = users(size)[size // 2].id
+        return with_backend(backend, lambda: User.get(user_id))
+
+    @benchmark('Base.save ({})'.format(name), SIZES)
+    def bench_save(size, name=name):
+        """Saves one user among `size` users.
+        """
+        backend = make_backend(name, size)
+        return with_backend(backend, users(size)[size // 2].save)
+
+    @benchmark('Base.count ({})'.format(name), SIZES)
+    def bench_count(size, name=name):
+        """Counts `size` users.
+        """
+        from models.user import User
+
+        backend = make_backend(name, size)
+        return with_backend(backend, User.count)
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""Benchmarks of the 0x03 SQLAlchemy `DB` layer.
+"""
+from fixtures import make_emails
+from harness import benchmark, use_project
+
+
+SIZES = (100, 1000, 10000)
+
+
+def make_db(size):
+    """Returns a fresh `DB` holding `size` users.
+    Password hashes are fake so that building the dataset skips bcrypt.
+    """
+    use_project('user_auth_service')
+    from db import DB
+
+    db = DB()
+    db.add_users([{'email': email, 'hashed_password': b'x' * 60}
+                  for email in make_emails(size)])
+    return db
+
+
+@benchmark('DB.find_user_by', SIZES)
+def bench_find_user_by(size):
+    """Finds a user by email among `size` users.
+    """
+    email = make_emails(size)[size // 2]
+    db = make_db(size)
+    return lambda: db.find_user_by(email=email)
+
+
+@benchmark('DB.update_user', SIZES)
+def bench_update_user(size):
+    """Updates the session id of a user among `size` users.
+    """
+    db = make_db(size)
+    user_id = db.find_user_by(email=make_emails(size)[size // 2]).id
+    return lambda: db.update_user(user_id, session_id='session')
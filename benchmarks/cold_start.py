@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Cold start time of the 0x02 API.
+
+Starts the API (Flask's `app.run`) in a scratch directory holding
+--users users and as many sessions, for every AUTH_TYPE and MODELS_LOAD
+given, and reports, from the moment the process is spawned:
+
+- `import`: the time `import api.v1.app` took in the server process.
+- `status`: the time until `GET /api/v1/status` answers, that is until
+  the server accepts requests.
+- `ready`: the time until `GET /api/v1/users/<id>` answers, a route
+  that needs the stored users.
+
+Each value is the median of --repeat starts.
+
+    ./cold_start.py
+    ./cold_start.py --users 100000 --auth-types basic_auth --loads eager
+"""
+import argparse
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+from fixtures import make_users
+from harness import PROJECTS, use_project
+
+
+AUTH_TYPES = ('none', 'basic_auth', 'session_auth', 'session_exp_auth',
+              'session_db_auth')
+LOADS = ('eager', 'background', 'lazy')
+SERVER = '''
+import time
+start = time.perf_counter()
+from api.v1.app import app
+print(time.perf_counter() - start, flush=True)
+app.run(host="127.0.0.1", port={})
+'''
+
+
+def free_port() -> int:
+    """Returns a free local port.
+    """
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def answered(port: int, path: str) -> bool:
+    """Whether the server answered a GET request to `path`.
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    try:
+        conn.request('GET', path)
+        conn.getresponse().read()
+        return True
+    except OSError:
+        return False
+    finally:
+        conn.close()
+
+
+def prepare(users: int) -> str:
+    """Creates the scratch directory holding the users and sessions and
+    returns it.
+    """
+    directory = tempfile.mkdtemp(prefix='cold_start_')
+    cwd = os.getcwd()
+    os.chdir(directory)
+    try:
+        use_project('session_auth')
+        from models import storage
+        from models.user import User
+        from models.user_session import UserSession
+
+        sessions = [UserSession(user_id=user.id, session_id=user.id)
+                    for user in make_users(users)]
+        User.save_to_file()
+        storage.BACKEND.save_many(UserSession, sessions)
+    finally:
+        os.chdir(cwd)
+    return directory
+
+
+def start(directory: str, auth_type: str, load: str,
+          path: str) -> Dict[str, float]:
+    """Starts the API once and returns its timings.
+    """
+    port = free_port()
+    env = dict(os.environ, PYTHONPATH=PROJECTS['session_auth'],
+               AUTH_TYPE=auth_type, MODELS_LOAD=load)
+    started_at = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, '-c', SERVER.format(port)], cwd=directory, env=env,
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    try:
+        timings = {'import': float(process.stdout.readline())}
+        while not answered(port, '/api/v1/status'):
+            if process.poll() is not None:
+                raise RuntimeError('the server exited')
+            time.sleep(0.005)
+        timings['status'] = time.perf_counter() - started_at
+        answered(port, path)
+        timings['ready'] = time.perf_counter() - started_at
+        return timings
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> int:
+    """Measures every AUTH_TYPE with every MODELS_LOAD.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--auth-types', nargs='+', default=list(AUTH_TYPES))
+    parser.add_argument('--loads', nargs='+', default=list(LOADS),
+                        choices=LOADS)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    directory = prepare(args.users)
+    from models.user import User
+
+    path = '/api/v1/users/' + next(iter(User.all())).id
+    print('{} users and sessions'.format(args.users))
+    print('{:<18} {:<12} {:>9} {:>9} {:>9}'.format(
+        'AUTH_TYPE', 'MODELS_LOAD', 'import', 'status', 'ready'))
+    for auth_type in args.auth_types:
+        for load in args.loads:
+            runs: List[Dict[str, float]] = [
+                start(directory, auth_type, load, path)
+                for _ in range(args.repeat)]
+            print('{:<18} {:<12} {:>8.3f}s {:>8.3f}s {:>8.3f}s'.format(
+                auth_type, load,
+                *(statistics.median(run[key] for run in runs)
+                  for key in ('import', 'status', 'ready'))))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
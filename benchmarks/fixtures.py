@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Synthetic data fixtures shared by the benchmarks.
+"""
+import random
+import string
+from typing import List
+
+from harness import use_project
+
+
+DOMAINS = ('holberton.io', 'example.com', 'alx.africa', 'mail.test')
+
+
+def random_word(rng: random.Random, length: int = 8) -> str:
+    """Returns a random lowercase word.
+    """
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(length))
+
+
+def make_emails(size: int, seed: int = 0) -> List[str]:
+    """Returns `size` distinct synthetic email addresses.
+    """
+    rng = random.Random(seed)
+    return ['{}{}@{}'.format(random_word(rng), i, rng.choice(DOMAINS))
+            for i in range(size)]
+
+
+def make_users(size: int, seed: int = 0) -> list:
+    """Fills `models.base.DATA` with `size` synthetic users.
+    The users are stored without writing the JSON file, so building a
+    large dataset does not cost one file rewrite per user.
+    """
+    use_project('session_auth')
+    from models.base import DATA
+    from models.user import User
+
+    DATA['User'] = {}
+    rng = random.Random(seed)
+    users = []
+    for email in make_emails(size, seed):
+        user = User(email=email, first_name=random_word(rng),
+                    last_name=random_word(rng))
+        user.password = random_word(rng, 12)
+        DATA['User'][user.id] = user
+        users.append(user)
+    return users
+
+
+def make_sessions(auth, users: list) -> List[str]:
+    """Creates one session per user with the given session auth.
+    """
+    type(auth).user_id_by_session_id.clear()
+    return [auth.create_session(user.id) for user in users]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""Micro-benchmark registry and timing helpers.
+
+A benchmark is a setup function decorated with `@benchmark(name, sizes)`.
+For each size, the runner calls `setup(size)`, which builds its fixtures
+and returns the zero-argument callable to time. Setups that do not
+depend on a dataset size use the default `sizes=(None,)`.
+"""
+import os
+import sys
+import timeit
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECTS = {
+    'personal_data': os.path.join(ROOT, '0x00-personal_data'),
+    'session_auth': os.path.join(ROOT, '0x02-Session_authentication'),
+    'user_auth_service': os.path.join(
+        ROOT, '0x03-user_authentication_service'),
+}
+
+
+class Benchmark(NamedTuple):
+    """A registered benchmark.
+    """
+    name: str
+    setup: Callable[[Optional[int]], Callable[[], object]]
+    sizes: Tuple[Optional[int], ...]
+
+
+REGISTRY: List[Benchmark] = []
+
+
+def benchmark(name: str, sizes: Tuple[Optional[int], ...] = (None,)):
+    """Registers a benchmark setup function.
+    """
+    def decorator(setup):
+        REGISTRY.append(Benchmark(name, setup, tuple(sizes)))
+        return setup
+    return decorator
+
+
+def use_project(project: str) -> None:
+    """Makes the modules of one of the repo's projects importable.
+    """
+    path = PROJECTS[project]
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def measure(fn: Callable[[], object], repeat: int = 5) -> float:
+    """Returns the best time per call of `fn`, in seconds.
+    The number of calls per round is picked by `timeit.Timer.autorange`
+    so that a round lasts at least 0.2 seconds; the best of `repeat`
+    rounds is kept.
+    """
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    best = elapsed
+    for _ in range(repeat - 1):
+        best = min(best, timer.timeit(number))
+    return best / number
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Import time of the 0x00 personal data modules.
+
+Each module is imported --repeat times in a fresh interpreter run with
+`python -X importtime`. The median cumulative import time of the module
+is reported, along with the slowest modules it imported, so that a heavy
+dependency pulled in at import time shows up.
+
+    ./import_time.py
+    ./import_time.py --modules filtered_logger --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from harness import PROJECTS
+
+
+MODULES = ('filtered_logger', 'encrypt_password')
+
+
+def import_times(module: str) -> Tuple[int, Dict[str, int]]:
+    """Imports a module in a new interpreter and returns its cumulative
+    import time, in microseconds, and that of every module it imported.
+    The modules imported by the interpreter itself are left out.
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECTS['personal_data'])
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import ' + module],
+        env=env, capture_output=True, text=True, check=True)
+    imported = {}
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2].strip()
+        if not fields[2].startswith('  '):
+            # A top-level import: the modules before it were its own.
+            if name == module:
+                return int(fields[1]), imported
+            imported = {}
+        else:
+            imported[name] = int(fields[1])
+    raise RuntimeError('{} was not imported'.format(module))
+
+
+def measure(module: str, repeat: int) -> Tuple[float, List[Tuple[str, int]]]:
+    """Returns the median import time of a module, in microseconds, and
+    the median times of the modules it imported, slowest first.
+    """
+    runs = [import_times(module) for _ in range(repeat)]
+    names = set().union(*(run[1] for run in runs))
+    imported = [(name, statistics.median(run[1].get(name, 0)
+                                         for run in runs))
+                for name in names]
+    imported.sort(key=lambda item: -item[1])
+    return statistics.median(run[0] for run in runs), imported
+
+
+def main() -> int:
+    """Measures the import time of every module.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=list(MODULES))
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--top', type=int, default=3)
+    args = parser.parse_args()
+
+    for module in args.modules:
+        total, imported = measure(module, args.repeat)
+        print('{:<20} {:>8.1f} ms'.format(module, total / 1000))
+        for name, elapsed in imported[:args.top]:
+            print('  {:<30} {:>8.1f} ms'.format(name, elapsed / 1000))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
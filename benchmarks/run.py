@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Runs the micro-benchmark suite.
+
+Every `bench_*.py` module next to this script registers its benchmarks
+on import. Each benchmark runs once per dataset size and reports the
+best time per call. The suite runs in a scratch directory, so the
+`.db_*.json` and `a.db` files it creates never touch the working copy.
+
+Usage:
+    ./run.py                                # run everything
+    ./run.py -k Base.search                 # only matching benchmarks
+    ./run.py --save baseline.json           # record a baseline
+    ./run.py --compare baseline.json        # fail on regressions
+    ./run.py --compare baseline.json --threshold 0.1
+
+With `--compare`, the script exits with status 1 if any benchmark is
+more than `--threshold` (25% by default) slower than in the baseline.
+"""
+import argparse
+import glob
+import importlib
+import json
+import os
+import sys
+import tempfile
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from harness import REGISTRY, measure  # noqa: E402
+
+
+def load_benchmarks() -> None:
+    """Imports every benchmark module so that it registers itself.
+    """
+    for path in sorted(glob.glob(os.path.join(HERE, 'bench_*.py'))):
+        importlib.import_module(os.path.basename(path)[:-3])
+
+
+def format_time(seconds: float) -> str:
+    """Formats a duration with a readable unit.
+    """
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return '{:.2f} {}'.format(seconds / scale, unit)
+    return '{:.1f} ns'.format(seconds / 1e-9)
+
+
+def main() -> int:
+    """Runs the selected benchmarks and compares them to a baseline.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='only run benchmarks whose name contains this')
+    parser.add_argument('--save', help='write the results to this file')
+    parser.add_argument('--compare', help='baseline results file')
+    parser.add_argument('--threshold', type=float, default=0.25)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    save_path = os.path.abspath(args.save) if args.save else None
+
+    load_benchmarks()
+    os.chdir(tempfile.mkdtemp(prefix='benchmarks_'))
+    results, regressions = {}, []
+    print('{:<48}{:>14}{:>10}'.format('benchmark', 'time/call', 'vs base'))
+    for bench in REGISTRY:
+        if args.pattern not in bench.name:
+            continue
+        for size in bench.sizes:
+            key = bench.name if size is None else \
+                '{}[{}]'.format(bench.name, size)
+            fn = bench.setup() if size is None else bench.setup(size)
+            results[key] = measure(fn, args.repeat)
+            change = ''
+            if key in baseline:
+                ratio = results[key] / baseline[key] - 1
+                change = '{:+.1%}'.format(ratio)
+                if ratio > args.threshold:
+                    regressions.append(key)
+            print('{:<48}{:>14}{:>10}'.format(
+                key, format_time(results[key]), change))
+    if save_path:
+        with open(save_path, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    for key in regressions:
+        print('REGRESSION {}: {} -> {}'.format(
+            key, format_time(baseline[key]), format_time(results[key])),
+            file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""Throughput and memory of the development and pre-forking servers.
+
+For the 0x02 API and the 0x03 service, each server is started in its own
+scratch directory:
+
+- `dev`: Flask's `app.run`, one process with a thread per connection.
+- `prefork`: the pre-forking entrypoint (`api.v1.prefork` and
+  `prefork.py`) with `--workers` workers of `SERVER_THREADS` threads.
+
+Client processes then request each scenario over a new connection per
+request for a few seconds. The requests per second of every scenario are
+reported, then the memory of the server processes, read from
+/proc/<pid>/smaps_rollup: the proportional set size (PSS, shared pages
+split between the processes sharing them) and the private bytes of the
+parent and of each worker.
+
+The 0x02 API serves --users users from the SQLite storage, which imports
+them from their JSON file on start, without authentication
+(AUTH_TYPE=none): several workers cannot share the JSON storage. The
+0x03 service has one registered, logged in user.
+
+    ./server_bench.py
+    ./server_bench.py --projects session_auth --workers 2 8 --seconds 10
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+from fixtures import make_users
+from harness import PROJECTS, use_project
+
+
+PROJECT_NAMES = ('session_auth', 'user_auth_service')
+DEV_SERVER = 'from {} import app; app.run(host="127.0.0.1", port={})'
+
+
+def request(port: int, method: str, path: str, body: str = None,
+            headers: Dict[str, str] = None) -> http.client.HTTPResponse:
+    """Sends a request over a new connection and returns the read
+    response.
+    """
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    try:
+        conn.request(method, path, body, headers or {})
+        response = conn.getresponse()
+        response.read()
+        return response
+    finally:
+        conn.close()
+
+
+def wait_until_up(port: int, process: subprocess.Popen) -> None:
+    """Waits for a server to accept connections.
+    """
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('the server exited with status {}'.format(
+                process.returncode))
+        try:
+            request(port, 'GET', '/')
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError('the server did not start')
+
+
+def free_port() -> int:
+    """Returns a free local port.
+    """
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def prepare(project: str, users: int) -> Tuple[str, Dict[str, str]]:
+    """Creates the scratch directory of a server and returns it with the
+    environment to start it with.
+    """
+    directory = tempfile.mkdtemp(prefix='server_bench_')
+    env = dict(os.environ, PYTHONPATH=PROJECTS[project])
+    if project == 'session_auth':
+        env.update(AUTH_TYPE='none', MODELS_STORAGE='sqlite')
+        cwd = os.getcwd()
+        os.chdir(directory)
+        try:
+            use_project('session_auth')
+            from models.user import User
+
+            make_users(users)
+            User.save_to_file()
+        finally:
+            os.chdir(cwd)
+    return directory, env
+
+
+def start(project: str, server: str, workers: int, users: int,
+          ) -> Tuple[subprocess.Popen, int]:
+    """Starts a server and returns its process and port.
+    """
+    port = free_port()
+    directory, env = prepare(project, users)
+    if server == 'dev':
+        module = 'api.v1.app' if project == 'session_auth' else 'app'
+        command = [sys.executable, '-c', DEV_SERVER.format(module, port)]
+    elif project == 'session_auth':
+        env.update(API_HOST='127.0.0.1', API_PORT=str(port))
+        command = [sys.executable, '-m', 'api.v1.prefork']
+    else:
+        command = [sys.executable,
+                   os.path.join(PROJECTS[project], 'prefork.py'),
+                   '--host', '127.0.0.1', '--port', str(port)]
+    env['SERVER_WORKERS'] = str(workers)
+    process = subprocess.Popen(command, cwd=directory, env=env,
+                               stdout=subprocess.DEVNULL,
+                               stderr=subprocess.DEVNULL)
+    wait_until_up(port, process)
+    return process, port
+
+
+def scenarios(project: str, port: int) -> List[Tuple[str, str, Dict]]:
+    """Returns the (name, path, headers) of the scenarios of a project,
+    creating the state they need on the server.
+    """
+    if project == 'session_auth':
+        from models.user import User
+
+        user_id = sorted(User.all(), key=lambda u: u.id)[0].id
+        return [('GET /api/v1/status', '/api/v1/status', {}),
+                ('GET /api/v1/users/<id>',
+                 '/api/v1/users/' + user_id, {})]
+    form = {'Content-Type': 'application/x-www-form-urlencoded'}
+    body = urlencode({'email': 'bench@test', 'password': 'pw'})
+    request(port, 'POST', '/users', body, form)
+    response = request(port, 'POST', '/sessions', body, form)
+    cookie = response.getheader('Set-Cookie').split(';')[0]
+    return [('GET /', '/', {}),
+            ('GET /profile', '/profile', {'Cookie': cookie})]
+
+
+def client(port: int, path: str, headers: Dict, seconds: float,
+           results) -> None:
+    """Requests `path` until `seconds` have elapsed and puts the number
+    of successful and failed requests in `results`.
+    """
+    ok = failed = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            if request(port, 'GET', path, None, headers).status == 200:
+                ok += 1
+            else:
+                failed += 1
+        except OSError:
+            failed += 1
+    results.put((ok, failed))
+
+
+def load(port: int, path: str, headers: Dict, clients: int,
+         seconds: float) -> Tuple[float, int]:
+    """Runs `clients` client processes and returns the requests per
+    second and the number of failed requests.
+    """
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(
+        target=client, args=(port, path, headers, seconds, results))
+        for _ in range(clients)]
+    for process in processes:
+        process.start()
+    counts = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return (sum(c[0] for c in counts) / seconds,
+            sum(c[1] for c in counts))
+
+
+def memory(pid: int) -> Tuple[int, int]:
+    """Returns the PSS and private bytes of a process.
+    """
+    values = {}
+    with open('/proc/{}/smaps_rollup'.format(pid)) as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) == 3 and fields[2] == 'kB':
+                values[fields[0].rstrip(':')] = int(fields[1]) * 1024
+    private = values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+    return values.get('Pss', 0), private
+
+
+def processes(pid: int) -> List[int]:
+    """Returns a process followed by its children.
+    """
+    with open('/proc/{0}/task/{0}/children'.format(pid)) as f:
+        return [pid] + [int(child) for child in f.read().split()]
+
+
+def run(project: str, server: str, workers: int, args) -> None:
+    """Benchmarks one server and prints its results.
+    """
+    label = server if server == 'dev' else '{}x{}'.format(
+        server, workers)
+    process, port = start(project, server, workers, args.users)
+    try:
+        for name, path, headers in scenarios(project, port):
+            load(port, path, headers, args.clients, 1)
+            rate, failed = load(port, path, headers, args.clients,
+                                args.seconds)
+            print('{:<18} {:<12} {:<24} {:>9.0f} req/s  {} failed'.format(
+                project, label, name, rate, failed))
+        pids = processes(process.pid)
+        usage = [memory(pid) for pid in pids]
+        workers_usage = usage[1:] or usage
+        print('{:<18} {:<12} {} processes: {:.1f}MB PSS in total, '
+              '{:.1f}MB PSS and {:.1f}MB private per worker'.format(
+                  project, label, len(pids),
+                  sum(u[0] for u in usage) / 1e6,
+                  sum(u[0] for u in workers_usage) / len(workers_usage) / 1e6,
+                  sum(u[1] for u in workers_usage) / len(workers_usage) / 1e6))
+    finally:
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> int:
+    """Benchmarks every server of every project.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--projects', nargs='+', default=list(PROJECT_NAMES),
+                        choices=PROJECT_NAMES)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=[os.cpu_count() or 1])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=10000)
+    args = parser.parse_args()
+
+    for project in args.projects:
+        run(project, 'dev', 1, args)
+        for workers in args.workers:
+            run(project, 'prefork', workers, args)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""Memory used per session by the 0x02 in-memory session stores.
+
+Compares two layouts at 1,000,000 and 10,000,000 sessions:
+
+- `dict`: the former SessionExpAuth layout, a dict from the session id
+  string to a `{'user_id': ..., 'created_at': datetime}` dict.
+- `store`: api.v1.auth.session_store.SessionStore, 16-byte keys and
+  slotted records with interned user ids and integer timestamps.
+
+Each measurement runs in its own process and reports the growth of its
+resident memory while the sessions are created, spread over 100,000
+users.
+
+    ./session_memory.py
+    ./session_memory.py --sizes 1000000 --layouts store
+"""
+import argparse
+import subprocess
+import sys
+import time
+from datetime import datetime
+from uuid import uuid4
+
+from harness import use_project
+
+
+USERS = 100000
+LAYOUTS = ('dict', 'store')
+
+
+def rss() -> int:
+    """Returns the resident memory of this process, in bytes.
+    """
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * 4096
+
+
+def fill(layout: str, size: int) -> object:
+    """Creates `size` sessions with the given layout.
+    """
+    user_ids = [str(uuid4()) for _ in range(USERS)]
+    if layout == 'dict':
+        sessions = {}
+        for i in range(size):
+            sessions[str(uuid4())] = {
+                'user_id': user_ids[i % USERS],
+                'created_at': datetime.now(),
+            }
+        return sessions
+    use_project('session_auth')
+    from api.v1.auth.session_store import SessionStore
+
+    sessions = SessionStore()
+    for i in range(size):
+        sessions.add(str(uuid4()), user_ids[i % USERS])
+    return sessions
+
+
+def child(layout: str, size: int) -> None:
+    """Measures one layout and size, printing the bytes per session.
+    """
+    before = rss()
+    start = time.perf_counter()
+    sessions = fill(layout, size)
+    elapsed = time.perf_counter() - start
+    print((rss() - before) / len(sessions), elapsed)
+
+
+def main() -> int:
+    """Measures every layout at every size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1000000, 10000000])
+    parser.add_argument('--layouts', nargs='+', default=list(LAYOUTS),
+                        choices=LAYOUTS)
+    parser.add_argument('--child', nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        child(args.child[0], int(args.child[1]))
+        return 0
+
+    print('{:<8} {:>12} {:>16} {:>10} {:>10}'.format(
+        'layout', 'sessions', 'bytes/session', 'total', 'build'))
+    for size in args.sizes:
+        for layout in args.layouts:
+            result = subprocess.run(
+                [sys.executable, __file__, '--child', layout, str(size)],
+                capture_output=True, text=True)
+            if result.returncode != 0:
+                print('{:<8} {:>12,} failed: {}'.format(
+                    layout, size, result.stderr.strip().splitlines()[-1]))
+                continue
+            per_session, elapsed = map(float, result.stdout.split())
+            print('{:<8} {:>12,} {:>16.0f} {:>8.0f}MB {:>9.1f}s'.format(
+                layout, size, per_session, per_session * size / 1e6,
+                elapsed))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
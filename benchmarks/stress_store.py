@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""Multi-threaded stress test of the 0x02 model store (models.storage).
+
+Each thread runs a mix of reads (Base.search by email, Base.get and a
+Base.query page) and writes (Base.save of an existing user, and creating
+then removing a user) for a fixed time. The throughput is reported for
+each thread count, then the store is checked: every operation must have
+succeeded, the sorted indexes and negative caches must agree with the
+objects, and, with the JSON backend, the file must parse and hold
+exactly the stored users.
+
+    ./stress_store.py                      # 1, 4 and 16 threads
+    ./stress_store.py --threads 1 8 --storage sqlite
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from typing import List
+
+from fixtures import make_users
+from harness import use_project
+
+
+WRITE_RATIO = 0.2
+
+
+def worker(users: list, seconds: float, seed: int, counts: List[int],
+           errors: list) -> None:
+    """Runs the operation mix until `seconds` have elapsed.
+    counts[0] and counts[1] receive the number of reads and writes.
+    """
+    from models.user import User
+
+    rng = random.Random(seed)
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        user = rng.choice(users)
+        try:
+            if rng.random() < WRITE_RATIO:
+                if rng.random() < 0.5:
+                    user.first_name = str(rng.random())
+                    user.save()
+                else:
+                    new_user = User(email='stress{}@test'.format(rng.random()))
+                    new_user.save()
+                    if User.get(new_user.id) is None:
+                        raise AssertionError('saved user not found')
+                    new_user.remove()
+                counts[1] += 1
+            else:
+                choice = rng.random()
+                if choice < 0.4:
+                    if User.search({'email': user.email}) != [user]:
+                        raise AssertionError('search missed ' + user.email)
+                elif choice < 0.8:
+                    if User.get(user.id) is None:
+                        raise AssertionError('get missed ' + user.id)
+                else:
+                    list(User.query({'created_at__gte': user.created_at},
+                                    order_by='created_at', limit=10))
+                counts[0] += 1
+        except Exception as e:
+            errors.append(e)
+
+
+def run(users: list, threads: int, seconds: float) -> int:
+    """Runs `threads` workers, prints their throughput and returns the
+    number of errors.
+    """
+    counts = [[0, 0] for _ in range(threads)]
+    errors = []
+    workers = [threading.Thread(target=worker, args=(
+        users, seconds, i, counts[i], errors)) for i in range(threads)]
+    start = time.monotonic()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.monotonic() - start
+    reads = sum(c[0] for c in counts)
+    writes = sum(c[1] for c in counts)
+    print('{:>3} threads  {:>9.0f} ops/s  {:>9.0f} reads/s  {:>7.0f} '
+          'writes/s  {} errors'.format(
+              threads, (reads + writes) / elapsed, reads / elapsed,
+              writes / elapsed, len(errors)))
+    for error in errors[:5]:
+        print('  {}: {}'.format(type(error).__name__, error),
+              file=sys.stderr)
+    return len(errors)
+
+
+def check(users: list) -> List[str]:
+    """Returns the inconsistencies found in the store.
+    """
+    from models import storage
+    from models.base import DATA
+    from models.user import User
+
+    problems = []
+    if User.count() != len(users):
+        problems.append('{} users stored, {} expected'.format(
+            User.count(), len(users)))
+    ordered = list(User.query(order_by='created_at'))
+    if sorted(u.id for u in ordered) != sorted(u.id for u in users):
+        problems.append('the created_at index disagrees with the users')
+    for user in users:
+        if User.search({'email': user.email}) != [user]:
+            problems.append('search misses ' + user.email)
+            break
+    if storage.BACKEND.in_memory:
+        with open('.db_User.json') as f:
+            stored = json.load(f)
+        if set(stored) != set(DATA['User']):
+            problems.append('the file holds {} users, DATA {}'.format(
+                len(stored), len(DATA['User'])))
+    return problems
+
+
+def main() -> int:
+    """Runs the stress test for each thread count.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+',
+                        default=[1, 4, 16])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--storage', default='json',
+                        choices=('json', 'sqlite'))
+    args = parser.parse_args()
+
+    use_project('session_auth')
+    os.chdir(tempfile.mkdtemp(prefix='stress_store_'))
+    from models import storage
+    from models.user import User
+
+    users = make_users(args.users)
+    if args.storage == 'sqlite':
+        storage.use('sqlite')
+        storage.BACKEND.save_many(User, users)
+    else:
+        User.save_to_file()
+    print('{} users, {} backend, {:.0f}% writes'.format(
+        args.users, args.storage, 100 * WRITE_RATIO))
+    errors = 0
+    for threads in args.threads:
+        errors += run(users, threads, args.seconds)
+    problems = check(users)
+    for problem in problems:
+        print('INCONSISTENT: ' + problem, file=sys.stderr)
+    print('store consistent' if not problems else 'store inconsistent')
+    return 1 if errors or problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""Checks `BasicAuth.extract_credentials` of both projects against the
+parity corpus of basic_auth_corpus.py.
+
+Both projects name their packages `api` and `models`, so each one is
+checked by running the corpus script in its own interpreter.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.mark.parametrize('project', ['basic_auth', 'session_auth'])
+def test_extract_credentials_matches_method_chain(project):
+    """The single-pass parser agrees with the method chain on every
+    header of the corpus.
+    """
+    result = subprocess.run(
+        [sys.executable, os.path.join(HERE, 'basic_auth_corpus.py'),
+         project], capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert ' 0 mismatches' in result.stdout
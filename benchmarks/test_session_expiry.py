@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""Checks that the sliding expiry of the 0x02 sessions extends a session
+in use, for SESSION_IDLE_DURATION below SESSION_TOUCH_INTERVAL.
+
+Each check runs in its own interpreter, since it loads the 0x02 models
+and works in a scratch directory of its own. The clocks of the session
+store and of session_db_auth are replaced by one the check advances.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from harness import PROJECTS
+
+
+CHECK = '''
+from datetime import datetime, timedelta
+from api.v1.auth import get_auth
+from api.v1.auth import session_db_auth
+
+start = datetime.utcnow()
+clock = {"now": 0}
+
+
+class Clock(datetime):
+    @classmethod
+    def utcnow(cls):
+        return start + timedelta(seconds=clock["now"])
+
+
+session_db_auth.datetime = Clock
+auth = get_auth("%s")
+auth.user_id_by_session_id.now = lambda: int(start.timestamp()) + \\
+    clock["now"]
+session_id = auth.create_session("user-id")
+for now in (20, 40, 60, 80):
+    clock["now"] = now
+    assert auth.user_id_for_session_id(session_id) == "user-id", now
+clock["now"] = 111
+assert auth.user_id_for_session_id(session_id) is None
+'''
+
+
+@pytest.mark.parametrize('auth_type', ['session_exp_auth',
+                                       'session_db_auth'])
+def test_a_session_used_within_the_idle_duration_does_not_expire(
+        auth_type, tmp_path):
+    """A session used every 20 seconds stays valid with a 30 second
+    SESSION_IDLE_DURATION and the default SESSION_TOUCH_INTERVAL, then
+    expires once left idle for longer.
+    """
+    env = dict(os.environ, PYTHONPATH=PROJECTS['session_auth'],
+               SESSION_DURATION='3600', SESSION_IDLE_DURATION='30')
+    env.pop('SESSION_TOUCH_INTERVAL', None)
+    result = subprocess.run(
+        [sys.executable, '-c', CHECK % auth_type], cwd=tmp_path, env=env,
+        capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""Runs a short version of stress_store.py against both storage
+backends of the 0x02 model store.
+
+The stress test runs in its own interpreter, since it loads the 0x02
+models and works in a scratch directory of its own.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.mark.parametrize('storage', ['json', 'sqlite'])
+def test_concurrent_saves_and_removes_keep_the_store_consistent(storage):
+    """Concurrent searches, saves, creations and removals all succeed
+    and leave the indexes, caches and stored file consistent.
+    """
+    result = subprocess.run(
+        [sys.executable, os.path.join(HERE, 'stress_store.py'),
+         '--threads', '1', '8', '--seconds', '1', '--users', '200',
+         '--storage', storage],
+        capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert 'store consistent' in result.stdout